@@ -21,7 +21,7 @@ from src.lat_lab.models.user import Base
 from src.lat_lab.core.config import settings
 
 # 导入所有模型以确保它们被注册到metadata中
-from src.lat_lab.models import user, article, category, comment, tag, plugin
+from src.lat_lab.models import user, article, category, comment, tag, plugin, upload, email_outbox
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,35 @@
+"""为插件添加定时执行字段
+
+Revision ID: 20261019090000_add_plugin_schedule
+Revises: 20251110090000_add_must_change_password
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019090000_add_plugin_schedule'
+down_revision: Union[str, None] = '20251110090000_add_must_change_password'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # cron表达式及定时执行结果
+    op.add_column('plugins', sa.Column('schedule', sa.String(length=100), nullable=True))
+    op.add_column('plugins', sa.Column('schedule_params', sa.Text(), nullable=True))
+    op.add_column('plugins', sa.Column('last_run_at', sa.DateTime(), nullable=True))
+    op.add_column('plugins', sa.Column('last_output', sa.Text(), nullable=True))
+    op.add_column('plugins', sa.Column('last_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('plugins', 'last_error')
+    op.drop_column('plugins', 'last_output')
+    op.drop_column('plugins', 'last_run_at')
+    op.drop_column('plugins', 'schedule_params')
+    op.drop_column('plugins', 'schedule')
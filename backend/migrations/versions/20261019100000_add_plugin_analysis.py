@@ -0,0 +1,27 @@
+"""为插件添加代码静态分析结果字段
+
+Revision ID: 20261019100000_add_plugin_analysis
+Revises: 20261019090000_add_plugin_schedule
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019100000_add_plugin_analysis'
+down_revision: Union[str, None] = '20261019090000_add_plugin_schedule'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 已有插件的分析结果在首次运行时按需生成
+    op.add_column('plugins', sa.Column('analysis', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('plugins', 'analysis')
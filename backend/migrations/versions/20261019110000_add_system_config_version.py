@@ -0,0 +1,32 @@
+"""添加系统配置版本表
+
+Revision ID: 20261019110000_add_system_config_version
+Revises: 20261019100000_add_plugin_analysis
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019110000_add_system_config_version'
+down_revision: Union[str, None] = '20261019100000_add_plugin_analysis'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 单行版本表，配置每次变更时递增，各worker据此使本地缓存失效
+    version_table = op.create_table('system_config_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, comment='配置版本号'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(version_table, [{'id': 1, 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('system_config_version')
@@ -0,0 +1,57 @@
+"""添加按内容寻址的上传存储表
+
+Revision ID: 20261019120000_add_upload_storage
+Revises: 20261019110000_add_system_config_version
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019120000_add_upload_storage'
+down_revision: Union[str, None] = '20261019110000_add_system_config_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False, comment='内容SHA-256'),
+        sa.Column('filename', sa.String(length=80), nullable=False, comment='存储文件名（哈希+扩展名）'),
+        sa.Column('mime_type', sa.String(length=50), nullable=False, comment='MIME类型'),
+        sa.Column('size', sa.Integer(), nullable=False, comment='文件大小（字节）'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_blobs_id'), 'upload_blobs', ['id'], unique=False)
+    op.create_index(op.f('ix_upload_blobs_sha256'), 'upload_blobs', ['sha256'], unique=True)
+
+    op.create_table('upload_refs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('blob_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('kind', sa.String(length=20), nullable=False, comment='用途：image/avatar'),
+        sa.Column('original_filename', sa.String(length=255), nullable=True, comment='上传时的文件名'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='上传时间'),
+        sa.ForeignKeyConstraint(['blob_id'], ['upload_blobs.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_refs_id'), 'upload_refs', ['id'], unique=False)
+    op.create_index(op.f('ix_upload_refs_blob_id'), 'upload_refs', ['blob_id'], unique=False)
+    op.create_index(op.f('ix_upload_refs_user_id'), 'upload_refs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_refs_user_id'), table_name='upload_refs')
+    op.drop_index(op.f('ix_upload_refs_blob_id'), table_name='upload_refs')
+    op.drop_index(op.f('ix_upload_refs_id'), table_name='upload_refs')
+    op.drop_table('upload_refs')
+    op.drop_index(op.f('ix_upload_blobs_sha256'), table_name='upload_blobs')
+    op.drop_index(op.f('ix_upload_blobs_id'), table_name='upload_blobs')
+    op.drop_table('upload_blobs')
@@ -0,0 +1,44 @@
+"""添加邮件发件箱表
+
+Revision ID: 20261019130000_add_email_outbox
+Revises: 20261019120000_add_upload_storage
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019130000_add_email_outbox'
+down_revision: Union[str, None] = '20261019120000_add_upload_storage'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('to_email', sa.String(length=128), nullable=False, comment='收件人'),
+        sa.Column('template', sa.String(length=50), nullable=False, comment='邮件模板名称'),
+        sa.Column('context', sa.Text(), nullable=False, comment='模板参数（JSON）'),
+        sa.Column('status', sa.String(length=20), nullable=False, comment='状态：pending/sending/sent/failed'),
+        sa.Column('attempts', sa.Integer(), nullable=False, comment='已尝试发送次数'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, comment='下次发送时间'),
+        sa.Column('last_error', sa.Text(), nullable=True, comment='最近一次发送失败的原因'),
+        sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+        sa.Column('sent_at', sa.DateTime(), nullable=True, comment='发送成功时间'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_outbox_id'), 'email_outbox', ['id'], unique=False)
+    op.create_index(op.f('ix_email_outbox_status'), 'email_outbox', ['status'], unique=False)
+    op.create_index(op.f('ix_email_outbox_next_attempt_at'), 'email_outbox', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_outbox_next_attempt_at'), table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_status'), table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_id'), table_name='email_outbox')
+    op.drop_table('email_outbox')
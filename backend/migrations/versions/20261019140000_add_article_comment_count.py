@@ -0,0 +1,35 @@
+"""添加文章评论数字段
+
+Revision ID: 20261019140000_add_article_comment_count
+Revises: 20261019130000_add_email_outbox
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019140000_add_article_comment_count'
+down_revision: Union[str, None] = '20261019130000_add_email_outbox'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 只统计已审核通过的评论，由评论的创建、审核和删除在同一事务中维护
+    op.add_column('articles', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    # 回填已有文章的评论数
+    articles = sa.table('articles', sa.column('id', sa.Integer), sa.column('comment_count', sa.Integer))
+    comments = sa.table('comments', sa.column('article_id', sa.Integer), sa.column('is_approved', sa.Boolean))
+    approved_count = sa.select(sa.func.count()).where(
+        comments.c.article_id == articles.c.id,
+        comments.c.is_approved == sa.true()
+    ).scalar_subquery()
+    op.execute(articles.update().values(comment_count=approved_count))
+
+
+def downgrade() -> None:
+    op.drop_column('articles', 'comment_count')
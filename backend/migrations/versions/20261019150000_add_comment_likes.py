@@ -0,0 +1,34 @@
+"""添加评论点赞表
+
+Revision ID: 20261019150000_add_comment_likes
+Revises: 20261019140000_add_article_comment_count
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019150000_add_comment_likes'
+down_revision: Union[str, None] = '20261019140000_add_article_comment_count'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 已有的 comments.likes 计数无法对应到用户，保持不变
+    op.create_table('comment_likes',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('comment_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'comment_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('comment_likes')
@@ -0,0 +1,34 @@
+"""添加上传文件最近使用时间
+
+Revision ID: 20261019160000_add_upload_last_used_at
+Revises: 20261019150000_add_comment_likes
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019160000_add_upload_last_used_at'
+down_revision: Union[str, None] = '20261019150000_add_comment_likes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 垃圾回收的宽限期按最近使用时间计算，复用旧文件的上传不会被删除
+    op.add_column('upload_blobs', sa.Column('last_used_at', sa.DateTime(), nullable=True, comment='最近使用时间'))
+    # 回填已有文件（以最近一次上传引用的时间为准）
+    blobs = sa.table('upload_blobs', sa.column('id', sa.Integer), sa.column('created_at', sa.DateTime), sa.column('last_used_at', sa.DateTime))
+    refs = sa.table('upload_refs', sa.column('blob_id', sa.Integer), sa.column('created_at', sa.DateTime))
+    last_ref = sa.select(sa.func.max(refs.c.created_at)).where(refs.c.blob_id == blobs.c.id).scalar_subquery()
+    op.execute(blobs.update().values(last_used_at=sa.func.coalesce(last_ref, blobs.c.created_at)))
+    op.create_index(op.f('ix_upload_blobs_last_used_at'), 'upload_blobs', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_blobs_last_used_at'), table_name='upload_blobs')
+    op.drop_column('upload_blobs', 'last_used_at')
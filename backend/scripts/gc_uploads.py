@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+LAT-LAB 上传文件垃圾回收脚本
+删除没有任何引用的上传文件（例如被替换的旧头像）及其缩略图等变体
+"""
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.lat_lab.core.database import SessionLocal
+from src.lat_lab.services.uploads import upload_service
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="删除没有任何引用的上传文件")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不删除")
+    parser.add_argument("--grace", type=int, default=None, help="只删除创建超过该秒数的文件（默认使用配置）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = upload_service.collect_garbage(db, grace_seconds=args.grace, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    action = "可删除" if args.dry_run else "已删除"
+    logger.info(f"{action} {result['removed']} 个文件，共 {result['freed_bytes']} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+LAT-LAB 文章评论数修复脚本
+根据评论表重新计算每篇文章的已审核评论数（comment_count），修复不一致的计数
+"""
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.lat_lab.core.database import SessionLocal
+from src.lat_lab.crud.comment import recount_comment_counts
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="重新计算文章的已审核评论数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不修改")
+    parser.add_argument("--article", type=int, action="append", dest="article_ids", help="只修复指定文章（可重复）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        fixed = recount_comment_counts(db, article_ids=args.article_ids, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    action = "需要修复" if args.dry_run else "已修复"
+    logger.info(f"{action} {fixed} 篇文章的评论数")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.lat_lab.core.database import engine, Base
-from src.lat_lab.models import user, article, category, comment, tag, plugin, system
+from src.lat_lab.models import user, article, category, comment, tag, plugin, system, upload, email_outbox
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from src.lat_lab.api import user, auth, article, category, comment, plugin, rss, upload, tag, marketplace, admin
+from src.lat_lab.api import user, auth, article, category, comment, plugin, rss, upload, tag, marketplace, admin, home
 
 api_router = APIRouter()
 
@@ -17,4 +17,5 @@ api_router.include_router(tag.router, tags=["标签"])
 api_router.include_router(tag.public_router, tags=["公共标签"])
 api_router.include_router(marketplace.router, tags=["插件市场"])
 api_router.include_router(admin.router, tags=["管理员"])
-api_router.include_router(admin.public_router, tags=["公共配置"]) 
\ No newline at end of file
+api_router.include_router(admin.public_router, tags=["公共配置"])
+api_router.include_router(home.router, tags=["首页"]) 
\ No newline at end of file
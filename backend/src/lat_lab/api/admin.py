@@ -2,17 +2,24 @@
 管理员专用API接口
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import Dict, Any
-import json
 from datetime import datetime
 
 from src.lat_lab.core.deps import get_db, get_current_admin_user
+from src.lat_lab.core.password_hasher import password_hasher
 from src.lat_lab.core.rate_limiter import rate_limiter
 from src.lat_lab.models.user import User
-from src.lat_lab.models.system import SystemConfig
+from src.lat_lab.services.system_config import system_config_service
+from src.lat_lab.services.dev_tools_bundle import dev_tools_bundle_service
+from src.lat_lab.services.email_outbox import email_outbox_service
+from src.lat_lab.services.live_events import live_event_hub
+from src.lat_lab.services.home import get_blog_owner, invalidate_home_cache
+from src.lat_lab.services.uploads import upload_service
+from src.lat_lab.utils.http_cache import cached_response
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -23,26 +30,7 @@ public_router = APIRouter(prefix="/public", tags=["public"])
 def get_public_about_section(db: Session = Depends(get_db)):
     """获取关于博主区域的配置内容（公开API，不需要权限）"""
     try:
-        # 查询系统配置中的关于博主信息
-        config = db.query(SystemConfig).filter(SystemConfig.key == "about_section").first()
-        
-        if config:
-            about_data = json.loads(config.value)
-            # 数据兼容性处理：如果存在旧的socialLinks字段，转换为social_links
-            if "socialLinks" in about_data and "social_links" not in about_data:
-                about_data["social_links"] = about_data["socialLinks"]
-                del about_data["socialLinks"]
-        else:
-            # 默认配置 - 统一使用下划线命名
-            about_data = {
-                "title": "关于博主",
-                "description": "欢迎来到我的博客！这里记录了我的学习、思考和分享。",
-                "social_links": [
-                    {"name": "GitHub", "url": "#", "icon": "github"},
-                    {"name": "Twitter", "url": "#", "icon": "twitter"},
-                    {"name": "知乎", "url": "#", "icon": "zhihu"}
-                ]
-            }
+        about_data = system_config_service.get_about_section(db)
         
         return {
             "success": True,
@@ -58,36 +46,68 @@ def get_public_about_section(db: Session = Depends(get_db)):
 def get_public_blog_owner(db: Session = Depends(get_db)):
     """获取博主信息（第一个用户，公开API，不需要权限）"""
     try:
-        # 获取第一个用户作为博主
-        first_user = db.query(User).order_by(User.id).first()
-        
-        if first_user:
-            return {
-                "success": True,
-                "data": {
-                    "id": first_user.id,
-                    "username": first_user.username,
-                    "avatar": first_user.avatar,
-                    "bio": first_user.bio
-                }
-            }
-        else:
-            # 如果没有用户，返回默认信息
-            return {
-                "success": True,
-                "data": {
-                    "id": None,
-                    "username": "LAT-Lab",
-                    "avatar": None,
-                    "bio": None
-                }
-            }
+        return {
+            "success": True,
+            "data": get_blog_owner(db)
+        }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="获取博主信息失败"
         )
 
+# 带内容哈希的资源可以被浏览器和CDN永久缓存
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _get_dev_tools_bundle(db: Session) -> Dict[str, Any]:
+    try:
+        return dev_tools_bundle_service.get_bundle(db)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取开发工具样式失败"
+        )
+
+
+@public_router.get("/dev-tools/manifest")
+def get_dev_tools_manifest(request: Request, db: Session = Depends(get_db)):
+    """获取开发工具样式包的地址（公开API，内容变化时地址随之变化）"""
+    bundle = _get_dev_tools_bundle(db)
+    manifest = {
+        "version": bundle["hash"],
+        "css_url": str(request.app.url_path_for("get_dev_tools_css", bundle_hash=bundle["hash"])),
+        "texts_url": str(request.app.url_path_for("get_dev_tools_texts", bundle_hash=bundle["hash"])),
+    }
+    body = json.dumps(manifest).encode("utf-8")
+    return cached_response(request, body, etag=f'"{bundle["hash"]}"')
+
+
+@public_router.get("/dev-tools/bundle.{bundle_hash}.css")
+def get_dev_tools_css(bundle_hash: str, db: Session = Depends(get_db)):
+    """获取开发工具样式（公开API）"""
+    bundle = _get_dev_tools_bundle(db)
+    if bundle_hash != bundle["hash"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="样式包不存在或已过期")
+    return Response(
+        content=bundle["css"],
+        media_type="text/css",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{bundle_hash}"'}
+    )
+
+
+@public_router.get("/dev-tools/texts.{bundle_hash}.json")
+def get_dev_tools_texts(bundle_hash: str, db: Session = Depends(get_db)):
+    """获取开发工具文本替换配置（公开API）"""
+    bundle = _get_dev_tools_bundle(db)
+    if bundle_hash != bundle["hash"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="样式包不存在或已过期")
+    return Response(
+        content=bundle["texts"],
+        media_type="application/json",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{bundle_hash}"'}
+    )
+
 
 @router.get("/rate-limit/stats", response_model=Dict[str, Any])
 def get_rate_limit_stats(
@@ -108,6 +128,40 @@ def get_rate_limit_stats(
         )
 
 
+@router.get("/password-hashing/stats", response_model=Dict[str, Any])
+def get_password_hashing_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """获取密码哈希进程池和耗时统计，用于调整bcrypt成本因子（仅管理员）"""
+    return {
+        "success": True,
+        "data": password_hasher.get_stats()
+    }
+
+
+@router.get("/email-outbox/stats", response_model=Dict[str, Any])
+def get_email_outbox_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """按状态统计发件箱中的邮件数量（仅管理员）"""
+    return {
+        "success": True,
+        "data": email_outbox_service.get_stats(db)
+    }
+
+
+@router.get("/live-events/stats", response_model=Dict[str, Any])
+def get_live_events_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """获取本进程的实时事件连接统计（仅管理员）"""
+    return {
+        "success": True,
+        "data": live_event_hub.get_stats()
+    }
+
+
 @router.post("/rate-limit/clear", response_model=Dict[str, Any])
 def clear_rate_limit_records(
     db: Session = Depends(get_db),
@@ -130,6 +184,26 @@ def clear_rate_limit_records(
         )
 
 
+@router.post("/uploads/gc", response_model=Dict[str, Any])
+def collect_upload_garbage(
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """删除没有任何引用的上传文件（仅管理员）"""
+    try:
+        result = upload_service.collect_garbage(db, dry_run=dry_run)
+        return {
+            "success": True,
+            "data": result
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="清理上传文件失败"
+        )
+
+
 @router.get("/about-section", response_model=Dict[str, Any])
 def get_about_section(
     db: Session = Depends(get_db),
@@ -137,26 +211,7 @@ def get_about_section(
 ):
     """获取关于博主区域的配置内容"""
     try:
-        # 查询系统配置中的关于博主信息
-        config = db.query(SystemConfig).filter(SystemConfig.key == "about_section").first()
-        
-        if config:
-            about_data = json.loads(config.value)
-            # 数据兼容性处理：如果存在旧的socialLinks字段，转换为social_links
-            if "socialLinks" in about_data and "social_links" not in about_data:
-                about_data["social_links"] = about_data["socialLinks"]
-                del about_data["socialLinks"]
-        else:
-            # 默认配置 - 统一使用下划线命名
-            about_data = {
-                "title": "关于博主",
-                "description": "欢迎来到我的博客！这里记录了我的学习、思考和分享。",
-                "social_links": [
-                    {"name": "GitHub", "url": "#", "icon": "github"},
-                    {"name": "Twitter", "url": "#", "icon": "twitter"},
-                    {"name": "知乎", "url": "#", "icon": "zhihu"}
-                ]
-            }
+        about_data = system_config_service.get_about_section(db)
         
         return {
             "success": True,
@@ -188,23 +243,8 @@ def update_about_section(
             if field not in about_data:
                 raise HTTPException(status_code=400, detail=f"缺少必需字段: {field}")
         
-        # 查询是否存在配置
-        config = db.query(SystemConfig).filter(SystemConfig.key == "about_section").first()
-        
-        if config:
-            # 更新现有配置
-            config.value = json.dumps(about_data, ensure_ascii=False)
-            config.updated_at = datetime.utcnow()
-        else:
-            # 创建新配置
-            config = SystemConfig(
-                key="about_section",
-                value=json.dumps(about_data, ensure_ascii=False),
-                description="关于博主区域配置"
-            )
-            db.add(config)
-        
-        db.commit()
+        system_config_service.set_config(db, "about_section", about_data, "关于博主区域配置")
+        invalidate_home_cache()
         
         return {
             "success": True,
@@ -214,11 +254,10 @@ def update_about_section(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="更新配置失败"
-        ) 
+        )
 
 
 @router.get("/dev-tools-config", response_model=Dict[str, Any])
@@ -229,11 +268,9 @@ def get_dev_tools_config(
     """获取开发工具配置"""
     try:
         # 查询系统配置中的开发工具信息
-        config = db.query(SystemConfig).filter(SystemConfig.key == "dev_tools_config").first()
+        dev_tools_data = system_config_service.get_config(db, "dev_tools_config")
         
-        if config:
-            dev_tools_data = json.loads(config.value)
-        else:
+        if not dev_tools_data:
             # 默认配置
             dev_tools_data = {
                 "styles": [],
@@ -271,23 +308,8 @@ def update_dev_tools_config(
         # 添加时间戳
         config_data["last_updated"] = datetime.utcnow().isoformat()
         
-        # 查询是否存在配置
-        config = db.query(SystemConfig).filter(SystemConfig.key == "dev_tools_config").first()
-        
-        if config:
-            # 更新现有配置
-            config.value = json.dumps(config_data, ensure_ascii=False)
-            config.updated_at = datetime.utcnow()
-        else:
-            # 创建新配置
-            config = SystemConfig(
-                key="dev_tools_config",
-                value=json.dumps(config_data, ensure_ascii=False),
-                description="开发工具配置"
-            )
-            db.add(config)
-        
-        db.commit()
+        system_config_service.set_config(db, "dev_tools_config", config_data, "开发工具配置")
+        dev_tools_bundle_service.rebuild(db)
         
         return {
             "success": True,
@@ -297,7 +319,6 @@ def update_dev_tools_config(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="更新开发工具配置失败"
@@ -312,34 +333,31 @@ def clear_dev_tools_config(
 ):
     """清除开发工具配置"""
     try:
-        config = db.query(SystemConfig).filter(SystemConfig.key == "dev_tools_config").first()
+        dev_tools_data = system_config_service.get_config(db, "dev_tools_config")
         
-        if config:
+        if dev_tools_data is not None:
             if page:
                 # 清除特定页面的配置
-                dev_tools_data = json.loads(config.value)
                 if "page_data" in dev_tools_data and page in dev_tools_data["page_data"]:
                     del dev_tools_data["page_data"][page]
-                    config.value = json.dumps(dev_tools_data, ensure_ascii=False)
-                    config.updated_at = datetime.utcnow()
-                    db.commit()
+                    system_config_service.set_config(db, "dev_tools_config", dev_tools_data)
                     message = f"页面 {page} 的配置已清除"
                 else:
                     message = f"页面 {page} 的配置不存在"
             else:
                 # 清除所有配置
-                db.delete(config)
-                db.commit()
+                system_config_service.delete_config(db, "dev_tools_config")
                 message = "所有开发工具配置已清除"
         else:
             message = "配置不存在"
         
+        dev_tools_bundle_service.rebuild(db)
+        
         return {
             "success": True,
             "message": message
         }
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="清除开发工具配置失败"
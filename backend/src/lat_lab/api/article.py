@@ -1,10 +1,16 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from src.lat_lab.schemas.article import Article, ArticleCreate, ArticleUpdate, ArticleDetail, Tag, ArticleStatus, ArticleVisibility
-from src.lat_lab.crud.article import get_article, get_articles, create_article, update_article, delete_article, increment_view_count, update_like_count
-from src.lat_lab.core.deps import get_db, get_current_user, get_current_author_or_admin, get_optional_user
+from src.lat_lab.schemas.article import Article, ArticleCreate, ArticleUpdate, ArticleDetail, Tag, ArticleStatus, ArticleVisibility, ArticleBulkModeration
+from src.lat_lab.crud.article import get_article, get_articles, create_article, update_article, delete_article, increment_view_count, update_like_count, bulk_moderate_articles
+from src.lat_lab.core.config import settings
+from src.lat_lab.core.deps import get_db, get_current_user, get_current_author_or_admin, get_optional_user, get_current_admin_user
+from src.lat_lab.services.home import invalidate_home_cache
+from src.lat_lab.services.live_events import live_event_hub
 from src.lat_lab.models.user import User, RoleEnum
 from src.lat_lab.models.tag import Tag as TagModel
 from src.lat_lab.models.article import Article as ArticleModel
@@ -37,7 +43,9 @@ def create_new_article(
     # 根据用户角色决定是否自动审核通过
     auto_approve = current_user.role == RoleEnum.admin
     
-    return create_article(db, article, current_user.id, auto_approve=auto_approve)
+    db_article = create_article(db, article, current_user.id, auto_approve=auto_approve)
+    invalidate_home_cache()
+    return db_article
 
 @router.get("/", response_model=List[Article], response_model_exclude={"password"})
 def read_articles(
@@ -148,6 +156,7 @@ def read_user_articles(
                 "author_id": article.author_id,
                 "view_count": article.view_count,
                 "likes_count": article.likes_count if article.likes_count is not None else 0,
+                "comment_count": article.comment_count or 0,
                 "created_at": article.created_at,
                 "updated_at": article.updated_at,
                 "tags": article.tags,
@@ -369,6 +378,7 @@ def update_article_by_id(
             detail="更新文章失败"
         )
     
+    invalidate_home_cache()
     return updated_article
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -405,7 +415,8 @@ def delete_article_by_id(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="删除文章失败"
         )
-        
+    
+    invalidate_home_cache()
     return None
 
 @router.post("/{article_id}/like", response_model=Dict[str, Any])
@@ -461,6 +472,11 @@ def like_article(
         # 获取更新后的点赞状态
         is_liked = getattr(updated_article, 'current_user_liked', has_liked)
         
+        if is_liked != has_liked:
+            live_event_hub.publish(article_id, "like-count-changed", {
+                "target": "article", "id": article_id, "likes": updated_article.likes_count
+            })
+        
         return {
             "success": True,
             "likes_count": updated_article.likes_count,
@@ -518,6 +534,7 @@ def publish_article(
             detail="发布文章失败"
         )
     
+    invalidate_home_cache()
     return updated_article 
 
 @router.get("/{article_id}/like-status", response_model=Dict[str, Any])
@@ -556,6 +573,66 @@ def get_like_status(
         "is_liked": is_liked
     }
 
+@router.get("/{article_id}/events")
+async def stream_article_events(
+    article_id: int,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """订阅文章的实时事件（Server-Sent Events）
+    
+    事件类型：
+        - comment-created: 新的已审核评论，数据与评论列表中的评论相同
+        - comment-approved: 评论审核通过
+        - like-count-changed: 点赞数变化，数据为 {target: article/comment, id, likes}
+        - resync: 事件积压过多或评论被批量审核，客户端应重新获取评论
+    """
+    if not settings.LIVE_EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail="实时事件未启用")
+    
+    db_article = await run_in_threadpool(get_article, db, article_id, current_user.id if current_user else None)
+    if db_article is None:
+        raise HTTPException(status_code=404, detail="文章不存在或您没有权限查看")
+    # 连接会长期保持，提前归还数据库连接
+    db.close()
+    
+    if live_event_hub.is_full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="实时连接数已达上限，请稍后重试",
+            headers={"Retry-After": "30"}
+        )
+    
+    async def generate():
+        # 在生成器中订阅，保证连接断开时一定会执行取消订阅
+        subscription = live_event_hub.subscribe(article_id)
+        if subscription is None:
+            # 检查之后名额被其他连接占满，客户端稍后自动重连
+            yield "retry: 30000\n\n"
+            return
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.LIVE_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # 心跳，避免代理因读超时断开空闲连接
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            live_event_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 
 @router.put("/{article_id}/approve", response_model=Article)
@@ -588,6 +665,7 @@ def approve_article(
     db_article.is_approved = True
     db.commit()
     db.refresh(db_article)
+    invalidate_home_cache()
     
     return db_article
 
@@ -621,6 +699,7 @@ def reject_article(
     # 删除文章（拒绝即删除）
     db.delete(db_article)
     db.commit()
+    invalidate_home_cache()
     
     return {
         "success": True,
@@ -628,6 +707,43 @@ def reject_article(
         "reason": reason
     }
 
+@router.post("/moderation", response_model=Dict[str, Any])
+def bulk_moderate(
+    moderation: ArticleBulkModeration,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """批量审核通过、拒绝或删除文章（仅管理员）
+    
+    按ID列表和/或作者、创建时间范围选择文章，审核通过和拒绝只处理待审核的文章
+    """
+    if moderation.ids is None and moderation.author_id is None \
+            and moderation.created_after is None and moderation.created_before is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请至少指定文章ID列表或一个筛选条件"
+        )
+    
+    try:
+        affected = bulk_moderate_articles(db, moderation)
+    except Exception as e:
+        db.rollback()
+        from src.lat_lab.utils.security import SecurityError
+        SecurityError.log_error_safe(e, "批量审核文章", {"action": moderation.action.value, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="批量审核文章失败"
+        )
+    
+    if affected:
+        invalidate_home_cache()
+    
+    return {
+        "success": True,
+        "action": moderation.action.value,
+        "affected": affected
+    }
+
 @router.get("/stats/approval", response_model=Dict[str, Any])
 def get_approval_stats(
     db: Session = Depends(get_db),
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta
 from src.lat_lab.core.deps import get_db, get_current_user, get_current_admin_user
 from src.lat_lab.core.security import create_access_token
 from src.lat_lab.core.rate_limiter import create_rate_limit_dependency
+from src.lat_lab.core.password_hasher import password_hasher
 from src.lat_lab.core.config import settings
 from src.lat_lab.schemas.user import Token, UserCreate, UserOut, EmailVerification
-from src.lat_lab.crud.user import authenticate_user, create_user, get_user_by_email, get_user_by_username, verify_email, regenerate_verification_token
+from src.lat_lab.crud.user import create_user, get_user_by_email, get_user_by_username, get_user_by_login, verify_email, regenerate_verification_token
 from src.lat_lab.models.user import RoleEnum, User as UserModel
 from src.lat_lab.core.email import send_verification_email, generate_verification_token
+from src.lat_lab.services.email_outbox import email_outbox_service
 from src.lat_lab.utils.username_validator import validate_username
 import logging
 
@@ -37,7 +40,7 @@ resend_verification_rate_limit = create_rate_limit_dependency(
 )
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
     _rate_limit: bool = Depends(login_rate_limit)
@@ -45,9 +48,12 @@ def login_for_access_token(
     """
     用户登录接口，支持邮箱或用户名登录
     
-    使用邮箱作为JWT token的subject，确保token的稳定性
+    使用邮箱作为JWT token的subject，确保token的稳定性；
+    密码验证在密码哈希进程池中进行
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await run_in_threadpool(get_user_by_login, db, form_data.username)
+    if user and not await password_hasher.verify(form_data.password, user.hashed_password):
+        user = None
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,10 +75,21 @@ def login_for_access_token(
         "username": user.username
     }
 
+def _registration_role(db: Session, user: UserCreate) -> RoleEnum:
+    """检查注册信息并返回新用户的角色"""
+    # 统一错误提示，避免基于差异的账号枚举
+    username_exists = get_user_by_username(db, user.username) is not None
+    email_exists = get_user_by_email(db, user.email) is not None
+    if username_exists or email_exists:
+        raise HTTPException(status_code=400, detail="注册信息无效或已存在")
+    
+    # First user is automatically an admin
+    is_first_user = db.query(UserModel).count() == 0
+    return RoleEnum.admin if is_first_user else RoleEnum.user
+
 @router.post("/register", response_model=UserOut)
-def register(
+async def register(
     user: UserCreate, 
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _rate_limit: bool = Depends(register_rate_limit)
 ):
@@ -81,29 +98,24 @@ def register(
     if not is_valid:
         raise HTTPException(status_code=400, detail=error_message)
     
-    # 统一错误提示，避免基于差异的账号枚举
-    username_exists = get_user_by_username(db, user.username) is not None
-    email_exists = get_user_by_email(db, user.email) is not None
-    if username_exists or email_exists:
-        raise HTTPException(status_code=400, detail="注册信息无效或已存在")
-    
-    # First user is automatically an admin
-    is_first_user = db.query(UserModel).count() == 0
-    role = RoleEnum.admin if is_first_user else RoleEnum.user
+    role = await run_in_threadpool(_registration_role, db, user)
+    is_first_user = role == RoleEnum.admin
     
-    # 创建用户
-    db_user = create_user(db, user, role=role)
+    # 在密码哈希进程池中计算哈希后创建用户
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = await run_in_threadpool(create_user, db, user, role=role, hashed_password=hashed_password)
     
     # 如果不是管理员，发送验证邮件
     if not is_first_user:
-        # 使用后台任务发送邮件，避免阻塞用户注册流程
-        background_tasks.add_task(
-            send_verification_email,
+        # 写入发件箱，由后台投递线程发送，避免阻塞用户注册流程
+        await run_in_threadpool(
+            email_outbox_service.enqueue_verification,
+            db,
             email=db_user.email,
             username=db_user.username,
             token=db_user.verification_token
         )
-        logger.info(f"验证邮件已加入后台任务队列，用户ID: {db_user.id}, 邮箱: {db_user.email}")
+        logger.info(f"验证邮件已加入发件箱，用户ID: {db_user.id}, 邮箱: {db_user.email}")
     
     return db_user
 
@@ -128,7 +140,6 @@ def verify_user_email(
 
 @router.post("/resend-verification", response_model=dict)
 def resend_verification_email(
-    background_tasks: BackgroundTasks,
     email: str,
     db: Session = Depends(get_db),
     _rate_limit: bool = Depends(resend_verification_rate_limit)
@@ -152,9 +163,9 @@ def resend_verification_email(
     # 重新生成验证令牌
     user = regenerate_verification_token(db, user.id)
     
-    # 发送验证邮件
-    background_tasks.add_task(
-        send_verification_email,
+    # 写入发件箱，由后台投递线程发送
+    email_outbox_service.enqueue_verification(
+        db,
         email=user.email,
         username=user.username,
         token=user.verification_token
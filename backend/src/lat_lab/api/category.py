@@ -5,6 +5,7 @@ from src.lat_lab.schemas.article import Category, CategoryCreate
 from src.lat_lab.crud.category import get_category, get_categories, create_category, update_category, delete_category, get_category_by_name
 from src.lat_lab.core.deps import get_db, get_current_user, get_current_admin_user
 from src.lat_lab.models.user import User, RoleEnum
+from src.lat_lab.services.home import invalidate_home_cache
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -40,7 +41,9 @@ def create_new_category(
     if get_category_by_name(db, category.name):
         raise HTTPException(status_code=400, detail="分类名已存在")
     
-    return create_category(db, category)
+    db_category = create_category(db, category)
+    invalidate_home_cache()
+    return db_category
 
 @router.put("/{category_id}", response_model=Category)
 def update_category_by_id(
@@ -59,7 +62,9 @@ def update_category_by_id(
     if existing_category and existing_category.id != category_id:
         raise HTTPException(status_code=400, detail="分类名已存在")
     
-    return update_category(db, category_id, category_update)
+    db_category = update_category(db, category_id, category_update)
+    invalidate_home_cache()
+    return db_category
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_category_by_id(
@@ -73,4 +78,5 @@ def delete_category_by_id(
         raise HTTPException(status_code=404, detail="分类不存在")
     
     delete_category(db, category_id)
+    invalidate_home_cache()
     return None 
\ No newline at end of file
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from src.lat_lab.schemas.comment import Comment, CommentCreate, CommentUpdate, CommentLike
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from sqlalchemy.orm import Session, joinedload
+from typing import Any, Dict, List, Optional
+from src.lat_lab.schemas.comment import Comment, CommentCreate, CommentUpdate, CommentLike, CommentBulkModeration
 from src.lat_lab.crud.comment import (
     get_comment, get_comments_by_article, get_comment_replies,
-    create_comment, update_comment, delete_comment, like_comment
+    create_comment, update_comment, delete_comment, like_comment, get_liked_comment_ids,
+    bulk_moderate_comments
 )
 from src.lat_lab.crud.article import get_article
 from src.lat_lab.core.deps import get_db, get_current_user, get_current_admin_user, get_optional_user
 from src.lat_lab.models.user import User, RoleEnum
 from src.lat_lab.models.comment import Comment as CommentModel
+from src.lat_lab.services.home import invalidate_home_cache
+from src.lat_lab.services.live_events import live_event_hub, comment_event_data
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
+# 批量查询点赞状态时一次最多查询的评论数量
+MAX_LIKED_QUERY_IDS = 500
+
 @router.get("/article/{article_id}", response_model=List[Comment])
 def read_article_comments(
     article_id: int,
@@ -182,6 +188,10 @@ def create_new_comment(
     # 创建评论
     db_comment = create_comment(db, comment, current_user.id, auto_approve=auto_approve)
     
+    # 只向读者推送已审核的评论
+    if db_comment.is_approved:
+        live_event_hub.publish(db_comment.article_id, "comment-created", comment_event_data(db_comment, current_user))
+    
     # 构造符合响应模型的数据
     result = {
         "id": db_comment.id,
@@ -230,8 +240,12 @@ def update_comment_by_id(
         )
     
     # 更新评论
+    was_approved = bool(db_comment.is_approved)
     updated_comment = update_comment(db, comment_id, comment_update)
     
+    if updated_comment.is_approved and not was_approved:
+        live_event_hub.publish(updated_comment.article_id, "comment-approved", comment_event_data(updated_comment))
+    
     # 构造符合响应模型的数据
     result = {
         "id": updated_comment.id,
@@ -280,35 +294,97 @@ def like_comment_by_id(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """点赞评论"""
-    db_comment = get_comment(db, comment_id)
+    """点赞评论（重复点赞不会增加点赞数）"""
+    db_comment = db.query(CommentModel).options(joinedload(CommentModel.user)).filter(
+        CommentModel.id == comment_id
+    ).first()
     if not db_comment:
         raise HTTPException(status_code=404, detail="评论不存在")
     
-    # 点赞评论
-    liked_comment = like_comment(db, comment_id)
-    
-    # 构造符合响应模型的数据
+    # 构造符合响应模型的数据（点赞会提交事务，先读取评论和作者信息）
     result = {
-        "id": liked_comment.id,
-        "content": liked_comment.content,
-        "article_id": liked_comment.article_id,
-        "parent_id": liked_comment.parent_id,
-        "user_id": liked_comment.user_id,
-        "likes": liked_comment.likes,
-        "is_approved": liked_comment.is_approved,
-        "created_at": liked_comment.created_at,
+        "id": db_comment.id,
+        "content": db_comment.content,
+        "article_id": db_comment.article_id,
+        "parent_id": db_comment.parent_id,
+        "user_id": db_comment.user_id,
+        "likes": db_comment.likes,
+        "is_approved": db_comment.is_approved,
+        "created_at": db_comment.created_at,
         "user": {
-            "id": liked_comment.user.id,
-            "username": liked_comment.user.username,
-            "email": liked_comment.user.email,
-            "role": liked_comment.user.role
+            "id": db_comment.user.id,
+            "username": db_comment.user.username,
+            "email": db_comment.user.email,
+            "role": db_comment.user.role
         },
         "replies": []
     }
     
+    # 点赞评论
+    previous_likes = result["likes"] or 0
+    result["likes"] = like_comment(db, comment_id, current_user.id) or 0
+    if result["likes"] != previous_likes:
+        live_event_hub.publish(result["article_id"], "like-count-changed", {
+            "target": "comment", "id": comment_id, "likes": result["likes"]
+        })
+    
     return result
 
+@router.get("/liked", response_model=List[int])
+def read_liked_comment_ids(
+    ids: List[int] = Query(..., description="要查询的评论ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """批量查询当前用户点赞过哪些评论（一次请求获取整个评论区的点赞状态）"""
+    if len(ids) > MAX_LIKED_QUERY_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多查询 {MAX_LIKED_QUERY_IDS} 条评论"
+        )
+    
+    return get_liked_comment_ids(db, current_user.id, ids)
+
+@router.post("/moderation", response_model=Dict[str, Any])
+def bulk_moderate(
+    moderation: CommentBulkModeration,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """批量审核通过、拒绝（隐藏）或删除评论（仅管理员）
+    
+    按ID列表和/或评论者、文章、创建时间范围选择评论，并同步文章的评论数
+    """
+    if moderation.ids is None and moderation.user_id is None and moderation.article_id is None \
+            and moderation.created_after is None and moderation.created_before is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请至少指定评论ID列表或一个筛选条件"
+        )
+    
+    try:
+        affected, article_ids = bulk_moderate_comments(db, moderation)
+    except Exception as e:
+        db.rollback()
+        from src.lat_lab.utils.security import SecurityError
+        SecurityError.log_error_safe(e, "批量审核评论", {"action": moderation.action.value, "user_id": current_user.id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="批量审核评论失败"
+        )
+    
+    # 文章评论数已变化；评论区变化较多，通知正在阅读的客户端重新获取评论
+    if affected:
+        invalidate_home_cache()
+        for article_id in article_ids:
+            live_event_hub.publish(article_id, "resync", {})
+    
+    return {
+        "success": True,
+        "action": moderation.action.value,
+        "affected": affected
+    }
+
 @router.get("/", response_model=List[Comment])
 def read_all_comments(
     skip: int = 0,
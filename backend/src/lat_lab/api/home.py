@@ -0,0 +1,52 @@
+"""
+首页聚合API接口
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import Optional
+
+from src.lat_lab.core.deps import get_optional_user
+from src.lat_lab.models.user import User
+from src.lat_lab.services.home import home_service
+from src.lat_lab.utils.http_cache import cached_response
+
+router = APIRouter(prefix="/home", tags=["home"])
+
+
+@router.get("")
+async def read_home(
+    request: Request,
+    skip: int = Query(0, ge=0, description="跳过的文章数量"),
+    limit: int = Query(10, ge=1, le=100, description="返回的文章数量"),
+    category_id: Optional[int] = Query(None, description="分类ID"),
+    tag: Optional[str] = Query(None, description="标签名称"),
+    search: Optional[str] = Query(None, description="搜索关键词"),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """
+    获取首页首屏数据（公开API，支持访客模式）
+
+    一次返回文章列表、分类、标签、关于博主、博主信息和首页小部件，带组合ETag
+    """
+    params = {
+        "skip": skip,
+        "limit": limit,
+        "category_id": category_id,
+        "tag": tag,
+        "search": search
+    }
+    current_user_id = current_user.id if current_user else None
+
+    try:
+        body, etag = await home_service.get_home(params, current_user_id)
+    except Exception as e:
+        from src.lat_lab.utils.security import SecurityError
+        SecurityError.log_error_safe(e, "获取首页数据")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="获取首页数据失败"
+        )
+
+    # 登录用户的文章列表可能包含私有文章，不能被共享缓存保存
+    cache_control = "private, no-cache" if current_user_id else "no-cache"
+    return cached_response(request, body, etag=etag, cache_control=cache_control)
@@ -6,14 +6,15 @@
 """
 
 import os
-from typing import Dict, List, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from typing import Dict, List, Any, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 import logging
 from src.lat_lab.services.marketplace import marketplace_service
 from src.lat_lab.core.config import settings
 from src.lat_lab.core.deps import get_current_user, get_current_admin_user
 from src.lat_lab.models.user import User
-from pydantic import BaseModel, Field
+from src.lat_lab.utils.http_cache import cached_response
+from pydantic import BaseModel, Field, TypeAdapter
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -66,8 +67,25 @@ class SourceSettings(BaseModel):
     source: str = Field(..., description="数据源类型，'local' 或 'git'")
     git_repo: Optional[str] = Field(None, description="Git仓库地址 (仅当source为'git'时需要)")
 
+# 各视图的序列化器，预编码结果按数据版本缓存在服务中
+_marketplace_data_adapter = TypeAdapter(MarketplaceData)
+_info_adapter = TypeAdapter(MarketplaceInfo)
+_plugin_adapter = TypeAdapter(Plugin)
+_categories_adapter = TypeAdapter(List[Category])
+_tags_adapter = TypeAdapter(List[str])
+
+def _encoded_view(view: str, adapter: TypeAdapter, extract) -> Optional[Tuple[bytes, str]]:
+    """通过响应模型编码视图（每个数据版本只编码一次）"""
+    def encoder(data: Dict[str, Any]) -> Optional[bytes]:
+        value = extract(data)
+        if value is None:
+            return None
+        return adapter.dump_json(adapter.validate_python(value))
+    return marketplace_service.get_encoded(view, encoder)
+
 @router.get("/", response_model=MarketplaceData)
 def get_marketplace_data(
+    request: Request,
     force_refresh: bool = False,
     current_user: User = Depends(get_current_user)
 ):
@@ -75,28 +93,42 @@ def get_marketplace_data(
     获取完整的插件市场数据
     """
     try:
-        data = marketplace_service.get_marketplace_data(force_refresh=force_refresh)
-        if not data:
+        if force_refresh:
+            marketplace_service.get_marketplace_data(force_refresh=True)
+        encoded = _encoded_view("data", _marketplace_data_adapter, lambda data: data or None)
+        if not encoded:
             logger.error("插件市场数据为空")
             raise HTTPException(status_code=404, detail="插件市场数据不可用")
-        return data
+        return cached_response(request, *encoded)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"获取插件市场数据失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取插件市场数据失败")
 
+@router.get("/health", response_model=Dict[str, Any])
+def get_marketplace_health():
+    """
+    获取插件市场缓存状态（缓存时长、是否过期、是否正在刷新）
+    """
+    return marketplace_service.get_health()
+
 @router.get("/info", response_model=MarketplaceInfo)
 def get_marketplace_info(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     获取插件市场信息
     """
     try:
-        info = marketplace_service.get_marketplace_info()
-        if not info:
+        encoded = _encoded_view("info", _info_adapter, lambda data: data.get("marketplace_info") or None)
+        if not encoded:
             logger.error("插件市场信息为空")
             raise HTTPException(status_code=404, detail="插件市场信息不可用")
-        return info
+        return cached_response(request, *encoded)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"获取插件市场信息失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取插件市场信息失败")
@@ -107,10 +139,14 @@ def get_plugins(
     tags: Optional[List[str]] = Query(None),
     search: Optional[str] = None,
     featured: Optional[bool] = None,
+    sort_by: Optional[str] = Query(None, description="排序字段: name、downloads、rating、created_at、updated_at"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
     current_user: User = Depends(get_current_user)
 ):
     """
-    获取插件列表，支持筛选
+    获取插件列表，支持筛选、排序和分页
     """
     try:
         logger.info(f"获取插件列表: category_id={category_id}, tags={tags}, search={search}, featured={featured}")
@@ -118,7 +154,11 @@ def get_plugins(
             category_id=category_id,
             tags=tags,
             search_term=search,
-            featured=featured
+            featured=featured,
+            sort_by=sort_by,
+            descending=order == "desc",
+            skip=skip,
+            limit=limit
         )
         logger.info(f"成功获取插件列表，共{len(plugins)}个插件")
         return plugins
@@ -129,47 +169,53 @@ def get_plugins(
 @router.get("/plugins/{plugin_id}", response_model=Plugin)
 def get_plugin(
     plugin_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     获取插件详情
     """
     try:
-        plugin = marketplace_service.get_plugin_by_id(plugin_id)
-        if not plugin:
+        encoded = _encoded_view(
+            f"plugin:{plugin_id}", _plugin_adapter,
+            lambda data: marketplace_service.get_plugin_by_id(plugin_id)
+        )
+        if not encoded:
             logger.warning(f"未找到插件: {plugin_id}")
             raise HTTPException(status_code=404, detail=f"未找到ID为'{plugin_id}'的插件")
-        return plugin
+        return cached_response(request, *encoded)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"获取插件详情失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取插件详情失败")
 
 @router.get("/categories", response_model=List[Category])
 def get_categories(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     获取所有分类
     """
     try:
-        categories = marketplace_service.get_categories()
-        logger.info(f"成功获取分类列表，共{len(categories)}个分类")
-        return categories
+        encoded = _encoded_view("categories", _categories_adapter, lambda data: data.get("categories", []))
+        return cached_response(request, *encoded)
     except Exception as e:
         logger.exception(f"获取分类列表失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取分类列表失败")
 
 @router.get("/tags", response_model=List[str])
 def get_tags(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     获取所有标签
     """
     try:
-        tags = marketplace_service.get_tags()
-        logger.info(f"成功获取标签列表，共{len(tags)}个标签")
-        return tags
+        encoded = _encoded_view("tags", _tags_adapter, lambda data: data.get("tags", []))
+        return cached_response(request, *encoded)
     except Exception as e:
         logger.exception(f"获取标签列表失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取标签列表失败")
@@ -1,23 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-import subprocess
-import tempfile
 import os
+import json
 import importlib.util
-import sys
 from src.lat_lab.schemas.plugin import (
-    Plugin, PluginCreate, PluginUpdate, PluginDetail
+    Plugin, PluginCreate, PluginUpdate, PluginDetail, PluginSummary,
+    PluginScheduleUpdate, PluginScheduleStatus, PluginSchedulerStatus, PluginBatchRun
 )
 from src.lat_lab.crud.plugin import (
     get_plugin, get_plugin_by_name, get_plugins, get_plugin_detail,
-    create_plugin, update_plugin, delete_plugin, activate_plugin
+    create_plugin, update_plugin, delete_plugin, activate_plugin,
+    set_plugin_schedule
 )
 from src.lat_lab.core.deps import get_db, get_current_admin_user, get_current_user, get_optional_user
-from src.lat_lab.core.rate_limiter import create_rate_limit_dependency
+from src.lat_lab.core.rate_limiter import create_rate_limit_dependency, check_rate_limit
 from src.lat_lab.models.user import User
 from src.lat_lab.core.config import settings
 from src.lat_lab.utils.security import secure_filename
+from src.lat_lab.utils.http_cache import cached_response
+from src.lat_lab.utils.cron import validate_cron_expression
+from src.lat_lab.services.plugin_runner import plugin_runner, PluginExecutionError, PluginTimeoutError
+from src.lat_lab.services.plugin_scheduler import plugin_scheduler
+from src.lat_lab.services.plugin_examples import plugin_example_index
+from src.lat_lab.services.plugin_analyzer import plugin_analyzer
+from src.lat_lab.services.home import list_home_widgets
 from datetime import datetime
 
 router = APIRouter(prefix="/plugins", tags=["plugins"])
@@ -60,67 +68,16 @@ def list_example_plugins(
         if not os.path.exists(settings.PLUGIN_EXAMPLES_DIR):
             return []
     
-    examples = []
-    
-    # 遍历目录获取所有.py文件
-    for filename in os.listdir(settings.PLUGIN_EXAMPLES_DIR):
-        if filename.endswith('.py'):
-            example_name = filename[:-3]  # 去掉.py后缀
-            # 使用安全的文件名
-            safe_example_name = secure_filename(example_name)
-            example_path = os.path.join(settings.PLUGIN_EXAMPLES_DIR, filename)
-            
-            # 读取文件前几行获取描述
-            description = ""
-            try:
-                with open(example_path, 'r', encoding='utf-8') as f:
-                    for i, line in enumerate(f):
-                        if i >= 10:  # 只读取前10行
-                            break
-                        if line.startswith('#'):
-                            if description:
-                                description += " "
-                            description += line[1:].strip()
-                        elif line.strip() and not line.startswith('#'):
-                            break
-            except UnicodeDecodeError:
-                # 尝试使用不同编码
-                try:
-                    with open(example_path, 'r', encoding='latin1') as f:
-                        content = f.read()
-                        # 将内容重新写入文件，确保UTF-8编码
-                        with open(example_path, 'w', encoding='utf-8') as fw:
-                            fw.write(content)
-                        
-                        # 重新提取描述
-                        for i, line in enumerate(content.split('\n')):
-                            if i >= 10:  # 只读取前10行
-                                break
-                            if line.startswith('#'):
-                                if description:
-                                    description += " "
-                                description += line[1:].strip()
-                            elif line.strip() and not line.startswith('#'):
-                                break
-                except Exception:
-                    description = "无法读取描述"
-            except Exception:
-                description = "无法读取描述"
-            
-            examples.append({
-                "name": safe_example_name,
-                "description": description
-            })
-    
-    # 添加README
-    readme_path = os.path.join(settings.PLUGIN_EXAMPLES_DIR, "README.md")
-    if os.path.exists(readme_path):
-        examples.append({
-            "name": "README",
-            "description": "插件系统使用和开发说明"
-        })
-    
-    return examples
+    # 示例内容来自内存索引，仅在目录变化时重新读取磁盘
+    return plugin_example_index.list_examples()
+
+@router.post("/examples/reload", response_model=Dict[str, Any])
+def reload_example_plugins(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """重新加载示例插件索引（仅管理员）"""
+    count = plugin_example_index.reload()
+    return {"success": True, "count": count}
 
 @router.get("/examples/{example_name}", response_model=Dict[str, Any])
 def get_example_plugin(
@@ -138,100 +95,74 @@ def get_example_plugin(
             raise HTTPException(status_code=500, detail="无法创建插件示例目录")
         raise HTTPException(status_code=404, detail="插件示例目录不存在")
     
-    # 构建示例文件路径
     # 移除可能存在的.py后缀
     example_name = example_name.replace('.py', '')
     # 应用安全验证
     safe_example_name = secure_filename(example_name)
-    example_path = os.path.join(settings.PLUGIN_EXAMPLES_DIR, f"{safe_example_name}.py")
+    example = plugin_example_index.get_example(safe_example_name)
     
-    # 检查示例文件是否存在
-    if not os.path.exists(example_path):
+    # 检查示例是否存在
+    if example is None:
         # 如果找不到指定的示例，返回README
         if safe_example_name.lower() == "readme":
-            readme_path = os.path.join(settings.PLUGIN_EXAMPLES_DIR, "README.md")
-            if os.path.exists(readme_path):
-                try:
-                    with open(readme_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    return {
-                        "name": "插件开发指南",
-                        "description": "插件系统使用和开发说明",
-                        "code": content
-                    }
-                except UnicodeDecodeError:
-                    # 尝试使用不同编码
-                    try:
-                        with open(readme_path, 'r', encoding='latin1') as f:
-                            content = f.read()
-                            # 将内容重新写入文件，确保UTF-8编码
-                            with open(readme_path, 'w', encoding='utf-8') as fw:
-                                fw.write(content)
-                        return {
-                            "name": "插件开发指南",
-                            "description": "插件系统使用和开发说明",
-                            "code": content
-                        }
-                    except Exception as e:
-                        raise HTTPException(status_code=500, detail="读取README文件失败")
+            readme = plugin_example_index.get_readme()
+            if readme is not None:
+                return {
+                    "name": "插件开发指南",
+                    "description": "插件系统使用和开发说明",
+                    "code": readme
+                }
         
         # 显示可用的示例插件列表
-        available_examples = []
-        try:
-            for filename in os.listdir(settings.PLUGIN_EXAMPLES_DIR):
-                if filename.endswith('.py'):
-                    available_examples.append(filename[:-3])  # 去掉.py后缀
-        except Exception:
-            available_examples = []
-        
+        available_examples = plugin_example_index.names()
         examples_str = ", ".join(available_examples) if available_examples else "无"
         raise HTTPException(
             status_code=404, 
             detail=f"插件示例 '{example_name}' 不存在。可用示例: {examples_str}"
         )
     
-    # 读取示例文件内容
-    try:
-        with open(example_path, 'r', encoding='utf-8') as f:
-            code = f.read()
-    except UnicodeDecodeError:
-        # 尝试使用不同编码
-        try:
-            with open(example_path, 'r', encoding='latin1') as f:
-                code = f.read()
-                # 将内容重新写入文件，确保UTF-8编码
-                with open(example_path, 'w', encoding='utf-8') as fw:
-                    fw.write(code)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail="读取插件文件失败")
-    
-    # 解析插件描述（从注释中提取）
-    description = ""
-    lines = code.split('\n')
-    for line in lines[:10]:  # 只查看前10行
-        if line.startswith('#'):
-            if description:
-                description += " "
-            description += line[1:].strip()
-        elif line.strip() and not line.startswith('#'):
-            break
+    if example["code"] is None:
+        raise HTTPException(status_code=500, detail="读取插件文件失败")
     
     return {
         "name": f"示例插件 - {example_name}",
-        "description": description,
-        "code": code
+        "description": example["description"],
+        "code": example["code"],
+        "hash": example["hash"]
     }
 
-@router.get("/", response_model=List[Plugin])
+@router.get("/schedules", response_model=PluginSchedulerStatus)
+def get_plugin_schedules(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """获取插件定时调度状态（仅管理员）"""
+    return plugin_scheduler.get_status(db)
+
+@router.get("/", response_model=List[PluginSummary])
 async def read_plugins(
     request: Request,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
     active_only: bool = False,
+    name: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    cursor: Optional[int] = Query(None, description="上一页最后一个插件的ID"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_user)
 ):
-    """获取所有插件（仅管理员）或获取激活的插件（所有用户）"""
+    """获取所有插件（仅管理员）或获取激活的插件（所有用户）
+    
+    列表不返回插件代码，需要代码时请调用插件详情接口；
+    如果还有下一页，响应头 X-Next-Cursor 给出下一页的游标；cursor 和 skip 不能同时使用
+    """
+    if cursor is not None and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor 和 skip 不能同时使用"
+        )
+    
     # 如果不是请求激活的插件，检查用户是否为管理员
     if not active_only and (not current_user or current_user.role != 'admin'):
         raise HTTPException(
@@ -239,7 +170,20 @@ async def read_plugins(
             detail="只有管理员可以查看所有插件"
         )
     
-    return get_plugins(db, skip=skip, limit=limit, active_only=active_only)
+    plugins = get_plugins(
+        db,
+        skip=skip,
+        limit=limit,
+        active_only=active_only,
+        name=name,
+        is_active=is_active,
+        cursor=cursor
+    )
+    
+    if len(plugins) == limit:
+        response.headers["X-Next-Cursor"] = str(plugins[-1].id)
+    
+    return plugins
 
 @router.get("/{plugin_id}", response_model=Plugin)
 def read_plugin(
@@ -339,315 +283,27 @@ async def run_plugin(
             detail="只有管理员可以运行未激活的插件"
         )
     
-    # 已由权限检查控制未激活插件的运行权限
-    if False and not db_plugin.is_active:
-        raise HTTPException(status_code=400, detail="插件未激活，无法运行")
+    # 定时插件在无参数调用时直接返回最近一次的输出
+    if not params and db_plugin.schedule and db_plugin.last_output is not None:
+        return {
+            "success": True,
+            "output": db_plugin.last_output,
+            "cached": True,
+            "last_run_at": db_plugin.last_run_at
+        }
     
-    # 创建临时文件
-    temp_path = ""
-    wrapper_path = ""
+    # 根据保存时的静态分析结果快速拒绝无法运行的插件，无需启动沙箱
+    analysis = plugin_analyzer.get_analysis(db, db_plugin)
+    if analysis["errors"]:
+        raise HTTPException(status_code=400, detail="插件代码无法运行: " + "；".join(analysis["errors"]))
     
     try:
-        with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w', encoding='utf-8') as temp:
-            temp_path = temp.name
-            
-            # 如果有参数，将参数添加到代码中
-            plugin_code = db_plugin.code
-            if params:
-                param_lines = []
-                for key, value in params.items():
-                        param_lines.append(f"{key} = {repr(value)}")
-                
-                # 将参数添加到代码顶部
-                param_code = "\n".join(param_lines)
-                plugin_code = param_code + "\n\n" + plugin_code
-                
-                # 打印调试信息
-                print(f"插件参数: {params}")
-            
-            temp.write(plugin_code)
-        
-        # 在沙箱中运行插件
-        if settings.PLUGIN_SANDBOX_ENABLED:
-            # 创建一个包装脚本，安全地执行插件并捕获结果
-            wrapper_code = """# -*- coding: utf-8 -*-
-import os
-import sys
-import json
-import traceback
-import types
-
-# 确保使用UTF-8编码
-import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
-
-# 添加当前目录到路径以便导入
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-# 首先打印出参数和环境信息，用于调试（写入stderr，避免污染插件输出）
-print("Python版本:", sys.version, file=sys.stderr)
-print("参数:", sys.argv, file=sys.stderr)
-print("当前目录:", os.getcwd(), file=sys.stderr)
-print("文件目录:", os.path.dirname(os.path.abspath(__file__)), file=sys.stderr)
-print("模块路径:", sys.path, file=sys.stderr)
-
-# 从环境变量中安全获取prompt参数
-plugin_prompt = os.environ.get('PLUGIN_PROMPT', '')
-
-# 定义安全的标准库白名单（仅限安全子集）
-SAFE_MODULES = [
-    'datetime', 'json', 'base64', 'hashlib', 'math', 
-    'random', 're', 'time', 'uuid',
-    'collections', 'io', 'string'
-]
-
-# 创建安全的执行环境
-safe_globals = dict()
-
-# 定义受限的内置函数集合
-safe_builtins = {}
-
-# 添加安全的内置函数
-for name in ['abs', 'all', 'any', 'ascii', 'bin', 'bool', 'bytes', 'chr', 
-            'complex', 'dict', 'dir', 'divmod', 'enumerate', 'filter', 
-            'float', 'format', 'frozenset', 'hash', 'hex', 'int', 'isinstance',
-            'issubclass', 'iter', 'len', 'list', 'map', 'max', 'min', 'next',
-            'object', 'oct', 'ord', 'pow', 'print', 'range', 'repr', 'reversed',
-            'round', 'set', 'slice', 'sorted', 'str', 'sum', 'tuple', 'type', 'zip']:
-    try:
-        if isinstance(__builtins__, dict):
-            if name in __builtins__:
-                safe_builtins[name] = __builtins__[name]
-        else:
-            if hasattr(__builtins__, name):
-                safe_builtins[name] = getattr(__builtins__, name)
-    except (AttributeError, KeyError):
-        pass
-
-# 实现受限导入：仅允许白名单模块和伪 requests
-_allowed_modules = set([m.split('.')[0] for m in SAFE_MODULES])
-_allowed_modules.add('requests')
-
-class SafeRequests:
-    def __init__(self):
-        try:
-            import requests as real_requests
-            self._requests = real_requests
-        except Exception:
-            self._requests = None
-    def get(self, url, **kwargs):
-        if not self._requests:
-            return {"error": "requests模块不可用"}
-        try:
-            allowed_domains = ['api.openweathermap.org', 'api.openrouter.ai', 'picsum.photos']
-            from urllib.parse import urlparse
-            domain = urlparse(url).netloc
-            if not any(allowed_domain in domain for allowed_domain in allowed_domains):
-                return {"error": "不允许访问域名: " + domain}
-            if 'timeout' not in kwargs:
-                kwargs['timeout'] = 3
-            response = self._requests.get(url, **kwargs)
-            return response
-        except Exception as e:
-            return {"error": str(e)}
-    def post(self, url, **kwargs):
-        if not self._requests:
-            return {"error": "requests模块不可用"}
-        try:
-            allowed_domains = ['api.openrouter.ai']
-            from urllib.parse import urlparse
-            domain = urlparse(url).netloc
-            if not any(allowed_domain in domain for allowed_domain in allowed_domains):
-                return {"error": "不允许访问域名: " + domain}
-            if 'timeout' not in kwargs:
-                kwargs['timeout'] = 3
-            response = self._requests.post(url, **kwargs)
-            return response
-        except Exception as e:
-            return {"error": str(e)}
-
-_safe_requests = SafeRequests()
-SafeRequestsModule = types.SimpleNamespace(get=_safe_requests.get, post=_safe_requests.post)
-
-def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
-    root = name.split('.')[0]
-    if root == 'requests':
-        return SafeRequestsModule
-    if root not in _allowed_modules:
-        raise ImportError("模块不允许导入: " + root)
-    return __import__(name, globals, locals, fromlist, level)
-
-# 将受限导入注入内置
-safe_builtins['__import__'] = _restricted_import
-
-# 将安全内置注入执行环境
-safe_globals['__builtins__'] = safe_builtins
-
-# 预加载安全模块到全局（便于直接使用）
-for module_name in SAFE_MODULES:
-    try:
-        if '.' in module_name:
-            package, submodule = module_name.split('.', 1)
-            module = __import__(package, fromlist=[submodule])
-            safe_module = getattr(module, submodule)
-        else:
-            safe_module = __import__(module_name)
-        safe_globals[module_name.split('.')[-1]] = safe_module
-    except ImportError:
-        pass
-
-# 也提供一个 requests 变量（非必需，import 更常见）
-safe_globals['requests'] = _safe_requests
-
-# 将prompt参数安全地传递给插件
-safe_globals['prompt'] = plugin_prompt
-
-# 执行插件代码
-try:
-    local_vars = {}
-    
-    # 读取原始代码文件
-    plugin_path = "TEMP_PATH_PLACEHOLDER"
-    with open(plugin_path, "r", encoding="utf-8") as code_file:
-        plugin_code = code_file.read()
-    
-    # 执行插件代码
-    exec(plugin_code, safe_globals, local_vars)
-    
-    # 获取结果
-    if 'result' in local_vars:
-        print(local_vars['result'])
-    else:
-        print("错误: 插件未定义'result'变量")
-except Exception as e:
-    # 只输出安全的错误信息，不包含堆栈跟踪
-    error_msg = "插件执行错误: " + str(type(e).__name__)
-    print(error_msg)
-    sys.exit(1)
-"""
-            
-            # 替换临时文件路径，避免使用format和特殊字符
-            wrapper_code = wrapper_code.replace("TEMP_PATH_PLACEHOLDER", temp_path.replace("\\", "\\\\"))
-            
-            # 创建包装器脚本文件
-            wrapper_path = temp_path + "_wrapper.py"
-            with open(wrapper_path, 'w', encoding='utf-8') as f:
-                f.write(wrapper_code)
-            
-            # 准备运行参数 - 移除不安全的命令行参数传递
-            run_args = [sys.executable, wrapper_path]
-            
-            # 通过环境变量安全传递prompt参数，避免命令行注入
-            env = os.environ.copy()
-            if 'prompt' in params:
-                # 将prompt参数通过环境变量传递，避免命令行注入风险
-                env['PLUGIN_PROMPT'] = str(params['prompt'])
-            else:
-                # 确保环境变量存在，即使没有prompt参数
-                env['PLUGIN_PROMPT'] = ''
-            
-            # 运行包装器脚本
-            result = subprocess.run(
-                run_args,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                timeout=settings.PLUGIN_TIMEOUT_SECONDS,
-                env=env
-            )
-            
-            # 删除包装器脚本
-            try:
-                if os.path.exists(wrapper_path):
-                    os.unlink(wrapper_path)
-            except:
-                pass
-            
-            if result.returncode != 0:
-                # 错误处理
-                from src.lat_lab.utils.security import SecurityError
-                SecurityError.log_error_safe(
-                    Exception(f"插件运行失败，返回码: {result.returncode}"),
-                    "plugin_subprocess_execution",
-                    {
-                        "plugin_id": plugin_id,
-                        "return_code": result.returncode,
-                        "stderr_length": len(result.stderr) if result.stderr else 0
-                    }
-                )
-                
-                raise HTTPException(
-                    status_code=500,
-                    detail="插件运行失败"
-                )
-            
-            output = result.stdout
-            
-            # 如果没有输出，记录错误
-            if not output.strip():
-                output = "警告: 插件没有生成任何输出"
-                
-        else:
-            # 不安全的执行方式，仅用于开发环境
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                code = f.read()
-            
-            # 警告：在生产环境中，永远不要直接执行用户提供的代码
-            # 这里仅作为示例，实际应该使用更安全的沙箱机制
-            safe_builtins = {}
-            
-            # 获取安全内置函数
-            for name in ['abs', 'all', 'any', 'ascii', 'bin', 'bool', 'bytes', 'chr', 
-                        'complex', 'dict', 'dir', 'divmod', 'enumerate', 'filter', 
-                        'float', 'format', 'frozenset', 'hash', 'hex', 'int', 'isinstance',
-                        'issubclass', 'iter', 'len', 'list', 'map', 'max', 'min', 'next',
-                        'object', 'oct', 'ord', 'pow', 'print', 'range', 'repr', 'reversed',
-                        'round', 'set', 'slice', 'sorted', 'str', 'sum', 'tuple', 'type', 'zip']:
-                if isinstance(__builtins__, dict):
-                    if name in __builtins__:
-                        safe_builtins[name] = __builtins__[name]
-                else:
-                    if hasattr(__builtins__, name):
-                        safe_builtins[name] = getattr(__builtins__, name)
-            
-            local_vars = {}
-            # 允许访问部分安全模块
-            global_vars = {'__builtins__': safe_builtins}
-            
-            # 允许导入一些安全的模块
-            for module_name in ['datetime', 'json', 'base64', 'math', 'random', 're']:
-                try:
-                    module = __import__(module_name)
-                    global_vars[module_name] = module
-                except ImportError:
-                    pass
-            
-            # 添加prompt参数支持（从环境变量获取）
-            if 'prompt' in params:
-                global_vars['prompt'] = params['prompt']
-            
-            # 执行代码
-            exec(code, global_vars, local_vars)
-            
-            if 'result' in local_vars:
-                output = str(local_vars.get('result'))
-            else:
-                output = "警告: 插件没有定义'result'变量"
-                
-                # 调试信息
-                var_names = list(local_vars.keys())
-                if var_names:
-                    output += "\n\n可用变量: " + ', '.join(var_names)
-        
-        # 返回结果
+        output = plugin_runner.run(db_plugin.code, params, plugin_id=plugin_id, analysis=analysis)
         return {"success": True, "output": output}
-    
-    except subprocess.TimeoutExpired:
-        raise HTTPException(
-            status_code=500,
-            detail="插件执行超时（" + str(settings.PLUGIN_TIMEOUT_SECONDS) + "秒）"
-        )
+    except PluginTimeoutError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except PluginExecutionError:
+        raise HTTPException(status_code=500, detail="插件运行失败")
     except Exception as e:
         # 错误处理
         from src.lat_lab.utils.security import SecurityError
@@ -661,14 +317,118 @@ except Exception as e:
                 "operation": "plugin_execution"
             }
         )
-    finally:
-        # 清理临时文件
-        for path in [temp_path, wrapper_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.unlink(path)
-                except:
-                    pass
+
+@router.post("/{plugin_id}/run/batch")
+def run_plugin_batch(
+    plugin_id: int,
+    batch: PluginBatchRun,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量运行插件，对每组参数执行一次并以NDJSON逐行返回结果
+    
+    所有输入在同一个沙箱进程中依次执行，每行包含 index、success 以及 output 或 error；
+    每组参数按一次插件运行计入速率限制
+    """
+    max_items = min(settings.PLUGIN_BATCH_MAX_ITEMS, settings.RATE_LIMIT_PLUGIN_REQUESTS)
+    if len(batch.items) > max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"单次批量运行最多{max_items}组参数"
+        )
+    
+    # 剩余的运行次数不足以执行全部输入时拒绝，不会只执行一部分
+    check_rate_limit(
+        request, "plugin_run",
+        settings.RATE_LIMIT_PLUGIN_REQUESTS, settings.RATE_LIMIT_PLUGIN_WINDOW,
+        cost=max(1, len(batch.items))
+    )
+    
+    db_plugin = get_plugin(db, plugin_id)
+    if not db_plugin:
+        raise HTTPException(status_code=404, detail="插件不存在")
+    
+    if not db_plugin.is_active and current_user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以运行未激活的插件"
+        )
+    
+    analysis = plugin_analyzer.get_analysis(db, db_plugin)
+    if analysis["errors"]:
+        raise HTTPException(status_code=400, detail="插件代码无法运行: " + "；".join(analysis["errors"]))
+    
+    # 在开始流式返回前取出代码，避免响应过程中依赖数据库会话
+    code = db_plugin.code
+    
+    def generate():
+        for item in plugin_runner.run_batch(code, batch.items, plugin_id=plugin_id):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/{plugin_id}/output", response_model=Dict[str, Any])
+def get_plugin_output(
+    plugin_id: int,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """获取定时插件最近一次的输出 - 支持访客模式"""
+    db_plugin = get_plugin(db, plugin_id)
+    if not db_plugin:
+        raise HTTPException(status_code=404, detail="插件不存在")
+    
+    if not db_plugin.is_active and (not current_user or current_user.role != 'admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以查看未激活的插件"
+        )
+    
+    if not db_plugin.schedule:
+        raise HTTPException(status_code=400, detail="该插件未设置定时执行")
+    
+    if db_plugin.last_output is None:
+        raise HTTPException(status_code=404, detail="插件尚未生成输出")
+    
+    return {
+        "success": True,
+        "output": db_plugin.last_output,
+        "last_run_at": db_plugin.last_run_at
+    }
+
+@router.put("/{plugin_id}/schedule", response_model=PluginScheduleStatus)
+def update_plugin_schedule(
+    plugin_id: int,
+    schedule_update: PluginScheduleUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """设置或取消插件的定时执行（仅管理员）"""
+    db_plugin = get_plugin(db, plugin_id)
+    if not db_plugin:
+        raise HTTPException(status_code=404, detail="插件不存在")
+    
+    schedule = (schedule_update.schedule or "").strip()
+    if schedule and not validate_cron_expression(schedule):
+        raise HTTPException(status_code=400, detail="无效的cron表达式")
+    
+    db_plugin = set_plugin_schedule(db, plugin_id, schedule or None, schedule_update.params)
+    return plugin_scheduler.describe(db_plugin)
+
+@router.get("/{plugin_id}/analysis", response_model=Dict[str, Any])
+def get_plugin_analysis(
+    plugin_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """获取插件代码的静态分析结果（仅管理员）"""
+    db_plugin = get_plugin(db, plugin_id)
+    if not db_plugin:
+        raise HTTPException(status_code=404, detail="插件不存在")
+    
+    return plugin_analyzer.get_analysis(db, db_plugin)
 
 @router.get("/{plugin_id}/detail", response_model=PluginDetail)
 def get_plugin_detail_route(
@@ -698,36 +458,51 @@ def get_plugin_detail_route(
     return db_plugin
 
 # 插件市场相关路由
+def _encode_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
 @router.get("/marketplace/info", response_model=Dict[str, Any])
 def get_marketplace_info(
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """获取插件市场基本信息"""
     try:
         from src.lat_lab.services.marketplace import marketplace_service
-        return marketplace_service.get_marketplace_info()
+        encoded = marketplace_service.get_encoded(
+            "raw:info", lambda data: _encode_json(data.get("marketplace_info", {}))
+        )
+        return cached_response(request, *encoded)
     except Exception as e:
         raise HTTPException(status_code=500, detail="获取插件市场信息失败")
 
 @router.get("/marketplace/categories", response_model=List[Dict[str, Any]])
 def get_marketplace_categories(
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """获取插件市场分类列表"""
     try:
         from src.lat_lab.services.marketplace import marketplace_service
-        return marketplace_service.get_categories()
+        encoded = marketplace_service.get_encoded(
+            "raw:categories", lambda data: _encode_json(data.get("categories", []))
+        )
+        return cached_response(request, *encoded)
     except Exception as e:
         raise HTTPException(status_code=500, detail="获取插件市场分类失败")
 
 @router.get("/marketplace/tags", response_model=List[str])
 def get_marketplace_tags(
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """获取插件市场标签列表"""
     try:
         from src.lat_lab.services.marketplace import marketplace_service
-        return marketplace_service.get_tags()
+        encoded = marketplace_service.get_encoded(
+            "raw:tags", lambda data: _encode_json(data.get("tags", []))
+        )
+        return cached_response(request, *encoded)
     except Exception as e:
         raise HTTPException(status_code=500, detail="获取插件市场标签失败")
 
@@ -753,13 +528,11 @@ def get_marketplace_plugins(
             category_id=category_id,
             tags=tag_list,
             search_term=search,
-            featured=featured
+            featured=featured,
+            skip=skip,
+            limit=limit
         )
         
-        # 分页
-        total = len(plugins)
-        plugins = plugins[skip:min(skip+limit, total)]
-        
         return plugins
     except Exception as e:
         raise HTTPException(status_code=500, detail="获取插件市场插件列表失败")
@@ -767,17 +540,22 @@ def get_marketplace_plugins(
 @router.get("/marketplace/plugins/{plugin_id}", response_model=Dict[str, Any])
 def get_marketplace_plugin(
     plugin_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """获取插件市场插件详情"""
     try:
         from src.lat_lab.services.marketplace import marketplace_service
-        plugin = marketplace_service.get_plugin_by_id(plugin_id)
         
-        if not plugin:
+        def encode_plugin(data: Dict[str, Any]) -> Optional[bytes]:
+            plugin = marketplace_service.get_plugin_by_id(plugin_id)
+            return _encode_json(plugin) if plugin else None
+        
+        encoded = marketplace_service.get_encoded(f"raw:plugin:{plugin_id}", encode_plugin)
+        if not encoded:
             raise HTTPException(status_code=404, detail=f"插件ID '{plugin_id}' 不存在")
         
-        return plugin
+        return cached_response(request, *encoded)
     except HTTPException:
         raise
     except Exception as e:
@@ -949,17 +727,7 @@ def get_home_widgets(
 ):
     """获取首页小部件列表 - 支持访客模式"""
     try:
-        # 获取所有激活的插件
-        active_plugins = get_plugins(db, active_only=True)
-        
-        widgets = []
-        for plugin in active_plugins:
-            # 检查插件是否有首页小部件配置
-            # 这里需要根据插件的具体实现来判断
-            # 目前返回空数组作为兼容
-            pass
-        
-        return widgets
+        return list_home_widgets(db)
     except Exception as e:
         # 访客模式下出错时返回空数组而不是抛出异常
         return [] 
\ No newline at end of file
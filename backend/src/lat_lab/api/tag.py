@@ -4,6 +4,7 @@ from typing import List
 from src.lat_lab.core.deps import get_db, get_current_admin
 from src.lat_lab.models.tag import Tag
 from src.lat_lab.models.user import User
+from src.lat_lab.services.home import invalidate_home_cache
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/admin/tags", tags=["tags"])
@@ -89,6 +90,7 @@ def create_tag(
     db.add(new_tag)
     db.commit()
     db.refresh(new_tag)
+    invalidate_home_cache()
     
     return {
         "id": new_tag.id,
@@ -125,6 +127,7 @@ def update_tag(
     db_tag.name = tag.name
     db.commit()
     db.refresh(db_tag)
+    invalidate_home_cache()
     
     return {
         "id": db_tag.id,
@@ -151,5 +154,6 @@ def delete_tag(
     # 删除标签
     db.delete(db_tag)
     db.commit()
+    invalidate_home_cache()
     
     return None 
\ No newline at end of file
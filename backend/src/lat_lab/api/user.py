@@ -2,16 +2,18 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
 import os
-import uuid
 from src.lat_lab.schemas.user import UserOut, UserUpdate, Token, PasswordReset
 from src.lat_lab.crud.user import get_user, get_users, update_user, delete_user
 from src.lat_lab.core.deps import get_db, get_current_user, get_current_admin_user
 from src.lat_lab.models.user import User
 from src.lat_lab.core.security import get_password_hash
 from src.lat_lab.core.config import settings
-from src.lat_lab.utils.security import secure_filename, detect_image_type
+from src.lat_lab.utils.security import secure_filename
+from src.lat_lab.services.uploads import upload_service
 from src.lat_lab.utils.username_validator import validate_username
 from src.lat_lab.models.user import RoleEnum
+from src.lat_lab.services.home import invalidate_home_cache
+from src.lat_lab.core.user_cache import invalidate_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -48,7 +50,10 @@ def update_current_user(
             )
     
     try:
-        return update_user(db, current_user.id, user_update)
+        updated_user = update_user(db, current_user.id, user_update)
+        # 用户信息会出现在首页的文章作者和博主信息中
+        invalidate_home_cache()
+        return updated_user
     except ValueError as e:
         # 处理用户名重复错误
         raise HTTPException(
@@ -86,6 +91,7 @@ def update_username(
     try:
         user_update = UserUpdate(username=new_username)
         updated_user = update_user(db, current_user.id, user_update)
+        invalidate_home_cache()
         
         # 返回更新后的用户信息，包含提示信息
         return {
@@ -105,32 +111,13 @@ async def upload_avatar(
     current_user: User = Depends(get_current_user)
 ):
     """上传用户头像"""
-    # 读取并限制文件大小
-    content = await file.read(settings.MAX_UPLOAD_SIZE + 1)
-    if len(content) == 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件内容为空")
-    if len(content) > settings.MAX_UPLOAD_SIZE:
-        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="文件过大")
-
-    # 基于魔数检测图片类型（拒绝svg等）
-    mime, detected_ext = detect_image_type(content)
-    if not mime or not detected_ext:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不支持的图片格式")
-
-    # 生成唯一文件名（基于检测到的扩展名）
-    unique_filename = f"avatar_{current_user.id}_{uuid.uuid4()}{detected_ext}"
-
-    # 使用安全路径构建
-    file_path = os.path.join(str(settings.AVATARS_DIR), unique_filename)
-
     try:
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
-        try:
-            os.chmod(file_path, 0o644)
-        except Exception:
-            pass
+        # 替换头像时释放旧头像的引用，旧文件由垃圾回收删除
+        result = await upload_service.save_image(
+            db, file, kind="avatar", user_id=current_user.id, replace=True
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         from src.lat_lab.utils.security import SecurityError
         SecurityError.log_error_safe(e, "头像上传", {"user_id": current_user.id})
@@ -139,14 +126,18 @@ async def upload_avatar(
             detail="头像上传失败"
         )
     
-    # 更新用户头像URL，确保路径正确
-    avatar_url = f"/uploads/avatars/{unique_filename}"
+    avatar_url = result["url"]
     
     # 更新用户信息
     user_update = UserUpdate(avatar=avatar_url)
     updated_user = update_user(db, current_user.id, user_update)
+    invalidate_home_cache()
     
-    return {"url": avatar_url, "success": True}
+    return {
+        "url": avatar_url,
+        "success": True,
+        "variants": result["variants"]
+    }
 
 @router.get("", response_model=List[UserOut])
 def read_users(
@@ -189,7 +180,9 @@ def update_user_by_admin(
             )
     
     try:
-        return update_user(db, user_id, user_update)
+        updated_user = update_user(db, user_id, user_update)
+        invalidate_home_cache()
+        return updated_user
     except ValueError as e:
         # 处理用户名重复错误
         raise HTTPException(
@@ -213,6 +206,7 @@ def reset_user_password(
     hashed_password = get_password_hash(password_reset.new_password)
     db_user.hashed_password = hashed_password
     db.commit()
+    invalidate_user(user_id)
     
     return {"detail": "密码重置成功"}
 
@@ -230,4 +224,5 @@ def delete_user_by_admin(
     if not result:
         raise HTTPException(status_code=404, detail="用户不存在")
     
+    invalidate_home_cache()
     return None 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import secrets
+import tempfile
 from typing import Optional, List
 from pydantic_settings import BaseSettings
 from pathlib import Path
@@ -35,9 +36,24 @@ class Settings(BaseSettings):
     # 插件设置
     PLUGIN_SANDBOX_ENABLED: bool = True  # 沙箱模式
     PLUGIN_TIMEOUT_SECONDS: int = 5
+    PLUGIN_BATCH_MAX_ITEMS: int = 200  # 批量运行单次最多输入数量
+    PLUGIN_RESULT_CACHE_SIZE: int = 256  # 确定性插件输出缓存条目数，0表示不缓存
     PLUGIN_DIR: Path = BASE_DIR / "plugins"
     PLUGIN_EXAMPLES_DIR: Path = PLUGIN_EXAMPLES_DIR
     PLUGIN_MARKETPLACE_CONFIG: Path = BASE_DIR / "marketplace_config.json"
+    PLUGIN_SCHEDULER_ENABLED: bool = os.getenv("PLUGIN_SCHEDULER_ENABLED", "true").lower() == "true"
+    PLUGIN_SCHEDULER_INTERVAL_SECONDS: int = 30  # 调度器检查间隔
+    PLUGIN_HTTP_CACHE_ENABLED: bool = os.getenv("PLUGIN_HTTP_CACHE_ENABLED", "true").lower() == "true"
+    PLUGIN_HTTP_CACHE_DIR: Path = DATA_DIR / "plugin_http_cache"
+    PLUGIN_HTTP_CACHE_MAX_TTL: int = 600  # 插件HTTP响应最长缓存时间，单位秒（仍以Cache-Control为准）
+    PLUGIN_HTTP_COALESCE_WAIT_SECONDS: float = 3.0  # 等待其他进程完成相同请求的最长时间
+
+    # 系统配置缓存：各进程检查配置版本的最短间隔（秒）
+    SYSTEM_CONFIG_VERSION_CHECK_SECONDS: float = 1.0
+
+    # 首页聚合接口缓存
+    HOME_CACHE_TTL_SECONDS: float = 30.0
+    HOME_CACHE_MAX_ENTRIES: int = 128  # 不同文章筛选条件的缓存条目上限
 
     # 邮件设置
     MAIL_SERVER: str = os.getenv("MAIL_SERVER", "smtp.example.com") 
@@ -47,6 +63,16 @@ class Settings(BaseSettings):
     MAIL_FROM: str = os.getenv("MAIL_FROM", "your-email@example.com")  
     MAIL_TLS: bool = os.getenv("MAIL_TLS", "true").lower() == "true"
     MAIL_SSL: bool = os.getenv("MAIL_SSL", "false").lower() == "true"
+    MAIL_TIMEOUT_SECONDS: float = 30.0  # SMTP连接和发送超时
+    
+    # 邮件发件箱：后台线程批量投递，失败时按指数退避重试
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_INTERVAL_SECONDS: float = 10.0  # 检查待发送邮件的间隔
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20  # 每个SMTP连接发送的最大邮件数
+    EMAIL_MAX_ATTEMPTS: int = 5  # 超过后标记为发送失败
+    EMAIL_RETRY_BASE_SECONDS: int = 30  # 第n次重试等待 base * 2^(n-1) 秒
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
+    EMAIL_SEND_LEASE_SECONDS: int = 300  # 发送中的邮件超过该时间未完成（进程退出）时重新投递，每封邮件发送前续期
     
     # 验证令牌设置
     VERIFICATION_TOKEN_EXPIRE_HOURS: int = 24  # 验证令牌24小时过期
@@ -57,10 +83,45 @@ class Settings(BaseSettings):
     # CORS设置
     CORS_ORIGINS: List[str] = ["*"]
     
+    # 密码哈希：bcrypt成本因子，以及计算哈希的进程池（0个进程表示在线程池中计算）
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32  # 排队等待的任务上限，超过时返回503
+
+    # 认证用户缓存：按令牌主体缓存用户快照，0表示不缓存
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 1024
+
+    # 文章实时事件（SSE）：新评论、评论审核通过、点赞数变化
+    LIVE_EVENTS_ENABLED: bool = True
+    LIVE_EVENTS_MAX_SUBSCRIBERS: int = 1000  # 每个进程同时订阅的连接上限，超过时返回503
+    LIVE_EVENTS_QUEUE_SIZE: int = 64  # 每个连接积压的事件上限，超过时通知客户端重新加载并断开
+    LIVE_EVENTS_HEARTBEAT_SECONDS: float = 15.0  # 没有事件时发送心跳的间隔（需小于代理的读超时）
+
     # 上传文件配置
     UPLOADS_DIR: Path = UPLOADS_DIR
     AVATARS_DIR: Path = UPLOADS_DIR / "avatars"
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # 5MB
+    # 上传图片变体（缩略图、中等尺寸、WebP），需要安装Pillow
+    IMAGE_VARIANTS_ENABLED: bool = os.getenv("IMAGE_VARIANTS_ENABLED", "true").lower() == "true"
+    IMAGE_VARIANT_WORKERS: int = 2  # 图片处理进程数
+    IMAGE_VARIANT_TIMEOUT_SECONDS: float = 10.0  # 上传请求等待变体生成的最长时间
+    UPLOAD_GC_GRACE_SECONDS: int = 3600  # 垃圾回收只删除超过该时间未被使用且无引用的上传文件
+    UPLOADS_CACHE_MAX_AGE: int = 3600  # 非内容哈希命名的旧上传文件的缓存时间（秒）
+    # 设置后 /uploads 只返回 X-Accel-Redirect 头，由nginx发送文件（例如 /_protected_uploads/）
+    UPLOADS_ACCEL_REDIRECT_PREFIX: str = ""
+
+    # 上传文件存储后端：local（上传目录）或 s3（S3兼容对象存储，需要安装boto3）
+    STORAGE_BACKEND: str = "local"
+    UPLOADS_STAGING_DIR: Path = Path(tempfile.gettempdir()) / "lat_lab_uploads"  # 远程存储时上传文件的本地暂存目录
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: str = ""  # 使用MinIO等S3兼容服务时设置，例如 http://minio:9000
+    S3_REGION: str = ""
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PREFIX: str = ""  # 对象键前缀
+    S3_PUBLIC_BASE_URL: str = ""  # 存储桶或CDN的公开访问地址，为空时 /uploads 重定向到预签名地址
+    S3_SIGNED_URL_EXPIRES: int = 3600  # 预签名地址有效期（秒）
 
     # 速率限制配置
     RATE_LIMIT_ENABLED: bool = True
@@ -83,6 +144,9 @@ class Settings(BaseSettings):
     PLUGIN_MARKETPLACE_GIT_PATH: str = "marketplace_config.json"
     PLUGIN_MARKETPLACE_GIT_TOKEN: str = ""
     PLUGIN_MARKETPLACE_CACHE_TTL: int = 3600  # 缓存时间，单位秒
+    PLUGIN_MARKETPLACE_GITHUB_API: str = "https://api.github.com"
+    PLUGIN_MARKETPLACE_GIT_MAX_WORKERS: int = 8  # 并发下载插件文件的最大线程数
+    PLUGIN_MARKETPLACE_GIT_CACHE_PATH: Path = DATA_DIR / "marketplace_git_cache.json"  # 最近一次成功拉取的数据
 
     @property
     def SQLALCHEMY_DATABASE_URI(self):
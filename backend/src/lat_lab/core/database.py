@@ -24,5 +24,5 @@ def get_db():
 def create_db_and_tables():
     """创建数据库和表"""
     # 导入所有模型以便创建表
-    from src.lat_lab.models import user, article, category, comment, tag, plugin, system
+    from src.lat_lab.models import user, article, category, comment, tag, plugin, system, upload, email_outbox
     Base.metadata.create_all(bind=engine) 
\ No newline at end of file
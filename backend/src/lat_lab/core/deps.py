@@ -8,6 +8,7 @@ from src.lat_lab.core.security import SECRET_KEY, ALGORITHM
 from src.lat_lab.schemas.user import TokenData
 from src.lat_lab.models.user import User, RoleEnum
 from src.lat_lab.crud.user import get_user_by_username, get_user_by_email
+from src.lat_lab.core.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -45,8 +46,8 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    # 使用邮箱查找用户，确保token的稳定性
-    user = get_user_by_email(db, email=email)
+    # 使用邮箱查找用户，确保token的稳定性（短时间缓存，返回游离的用户快照）
+    user = user_cache.get(email, lambda: get_user_by_email(db, email=email))
     if user is None:
         raise credentials_exception
     return user
@@ -74,8 +75,8 @@ async def get_optional_user(
         if email is None:
             return None
         
-        # 使用邮箱查找用户
-        user = get_user_by_email(db, email=email)
+        # 使用邮箱查找用户（短时间缓存，返回游离的用户快照）
+        user = user_cache.get(email, lambda: get_user_by_email(db, email=email))
         return user
     except JWTError:
         # JWT解析失败，如果是访客模式则允许，否则返回None
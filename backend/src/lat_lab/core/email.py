@@ -1,7 +1,10 @@
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+import html
 import logging
+from functools import lru_cache
+from typing import Any, Dict, Tuple
 from src.lat_lab.core.config import settings
 import secrets
 import string
@@ -24,29 +27,21 @@ def is_token_expired(token_created_at):
     expiry_time = token_created_at + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
     return datetime.now() > expiry_time
 
-def send_verification_email(email, username, token):
-    """发送验证邮件"""
-    try:
-        # 创建邮件内容
-        verification_link = f"{settings.BASE_URL}/verify-email?token={token}"
-        
-        message = MIMEMultipart()
-        message["From"] = settings.MAIL_FROM
-        message["To"] = email
-        message["Subject"] = "验证您的LAT-Lab账号"
-        
-        # 邮件HTML内容
-        html = f"""
+# 邮件模板：名称 -> (主题, HTML模板)，模板使用 string.Template 的 $变量 语法
+EMAIL_TEMPLATES: Dict[str, Tuple[str, str]] = {
+    "verification": (
+        "验证您的LAT-Lab账号",
+        """
         <html>
         <head>
             <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #4c84ff; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; background-color: #f9f9f9; }}
-                .button {{ display: inline-block; padding: 10px 20px; background-color: #4c84ff; color: white; 
-                          text-decoration: none; border-radius: 5px; margin: 20px 0; }}
-                .footer {{ text-align: center; margin-top: 20px; font-size: 12px; color: #666; }}
+                body { font-family: Arial, sans-serif; line-height: 1.6; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .header { background-color: #4c84ff; color: white; padding: 20px; text-align: center; }
+                .content { padding: 20px; background-color: #f9f9f9; }
+                .button { display: inline-block; padding: 10px 20px; background-color: #4c84ff; color: white; 
+                          text-decoration: none; border-radius: 5px; margin: 20px 0; }
+                .footer { text-align: center; margin-top: 20px; font-size: 12px; color: #666; }
             </style>
         </head>
         <body>
@@ -55,98 +50,154 @@ def send_verification_email(email, username, token):
                     <h1>LAT-Lab 邮箱验证</h1>
                 </div>
                 <div class="content">
-                    <p>尊敬的 {username}，</p>
+                    <p>尊敬的 $username，</p>
                     <p>感谢您注册LAT-Lab！请点击下面的按钮验证您的邮箱地址：</p>
                     <p style="text-align: center;">
-                        <a href="{verification_link}" class="button">验证邮箱</a>
+                        <a href="$verification_link" class="button">验证邮箱</a>
                     </p>
                     <p>或者，您可以复制以下链接到浏览器地址栏：</p>
-                    <p>{verification_link}</p>
+                    <p>$verification_link</p>
                     <p>此链接将在24小时后过期。</p>
                     <p>如果您没有注册LAT-Lab账号，请忽略此邮件。</p>
                 </div>
                 <div class="footer">
                     <p>此邮件由系统自动发送，请勿回复。</p>
-                    <p>&copy; {datetime.now().year} LAT-Lab. 保留所有权利。</p>
+                    <p>&copy; $year LAT-Lab. 保留所有权利。</p>
                 </div>
             </div>
         </body>
         </html>
         """
-        
-        # 添加HTML内容
-        message.attach(MIMEText(html, "html"))
-        
-        # 根据配置和环境选择合适的连接方式
-        mail_domain = settings.MAIL_USERNAME.split('@')[-1].lower()
-        
-        # 首先尝试SSL连接（如果配置中启用）
-        if settings.MAIL_SSL:
-            try:
-                logger.info("配置中启用SSL，优先尝试SSL连接")
-                server = smtplib.SMTP_SSL(settings.MAIL_SERVER, 465)
-                server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-                
-                logger.info(f"SSL连接成功，发送邮件到: {email}")
-                server.send_message(message)
-                server.quit()
-                
-                logger.info(f"验证邮件已成功发送至 {email}")
-                return True
-                
-            except Exception as ssl_error:
-                logger.warning(f"SSL连接失败: {str(ssl_error)}，尝试降级到无SSL连接")
-        
-        # 根据邮箱类型选择合适的连接方式
-        if mail_domain == '163.com':
-            # 163邮箱推荐使用25端口
-            logger.info("检测到163邮箱，使用标准SMTP连接")
-            server = smtplib.SMTP(settings.MAIL_SERVER, 25)
-            server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-            
-        elif mail_domain in ['gmail.com', 'googlemail.com']:
-            # Gmail推荐使用587端口+TLS
-            logger.info("检测到Gmail邮箱，使用TLS连接")
-            server = smtplib.SMTP(settings.MAIL_SERVER, 587)
+    ),
+}
+
+@lru_cache(maxsize=None)
+def _compile_template(name: str) -> Tuple[str, string.Template]:
+    """解析邮件模板（每个模板只解析一次）"""
+    if name not in EMAIL_TEMPLATES:
+        raise ValueError(f"未知的邮件模板: {name}")
+    subject, body = EMAIL_TEMPLATES[name]
+    return subject, string.Template(body)
+
+def render_email(name: str, context: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    渲染邮件模板
+
+    Returns:
+        Tuple[str, str]: (主题, HTML内容)
+    """
+    subject, template = _compile_template(name)
+    values = {key: html.escape(str(value)) for key, value in context.items()}
+    values.setdefault("year", str(datetime.now().year))
+    return subject, template.substitute(values)
+
+def verification_context(username, token) -> Dict[str, Any]:
+    """验证邮件的模板参数"""
+    return {
+        "username": username,
+        "verification_link": f"{settings.BASE_URL}/verify-email?token={token}"
+    }
+
+def build_message(to_email: str, subject: str, html_content: str) -> MIMEMultipart:
+    """构造HTML邮件"""
+    message = MIMEMultipart()
+    message["From"] = settings.MAIL_FROM
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.attach(MIMEText(html_content, "html"))
+    return message
+
+def _login(server: smtplib.SMTP):
+    # 只有未配置账号时才跳过登录（例如本地调试用的SMTP服务）；
+    # 配置了账号时总是登录，服务器未公布AUTH时由smtplib报错，而不是以匿名方式发送
+    if settings.MAIL_USERNAME:
+        logger.info(f"尝试登录邮箱: {settings.MAIL_USERNAME}")
+        server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+
+def _connect_ssl() -> smtplib.SMTP:
+    server = smtplib.SMTP_SSL(settings.MAIL_SERVER, 465, timeout=settings.MAIL_TIMEOUT_SECONDS)
+    _login(server)
+    return server
+
+def _connect_standard() -> smtplib.SMTP:
+    mail_domain = settings.MAIL_USERNAME.split('@')[-1].lower()
+    
+    if mail_domain == '163.com':
+        # 163邮箱推荐使用25端口
+        logger.info("检测到163邮箱，使用标准SMTP连接")
+        server = smtplib.SMTP(settings.MAIL_SERVER, 25, timeout=settings.MAIL_TIMEOUT_SECONDS)
+    elif mail_domain in ['gmail.com', 'googlemail.com']:
+        # Gmail推荐使用587端口+TLS
+        logger.info("检测到Gmail邮箱，使用TLS连接")
+        server = smtplib.SMTP(settings.MAIL_SERVER, 587, timeout=settings.MAIL_TIMEOUT_SECONDS)
+        server.starttls()
+    else:
+        # 其他邮箱尝试标准连接方式
+        logger.info(f"使用配置的连接方式: {settings.MAIL_SERVER}:{settings.MAIL_PORT}")
+        server = smtplib.SMTP(settings.MAIL_SERVER, settings.MAIL_PORT, timeout=settings.MAIL_TIMEOUT_SECONDS)
+        if settings.MAIL_TLS:
+            logger.info("启用TLS加密")
             server.starttls()
-            server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-            
-        else:
-            # 其他邮箱尝试标准连接方式
-            logger.info(f"使用配置的连接方式: {settings.MAIL_SERVER}:{settings.MAIL_PORT}")
-            server = smtplib.SMTP(settings.MAIL_SERVER, settings.MAIL_PORT)
-            
-            if settings.MAIL_TLS:
-                logger.info("启用TLS加密")
-                server.starttls()
-                
-            logger.info(f"尝试登录邮箱: {settings.MAIL_USERNAME}")
-            server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-        
-        # 发送邮件
-        logger.info(f"发送邮件到: {email}")
-        server.send_message(message)
+    
+    try:
+        _login(server)
+    except Exception:
+        close_smtp_connection(server)
+        raise
+    return server
+
+def open_smtp_connection() -> smtplib.SMTP:
+    """
+    打开并登录SMTP连接，可以连续发送多封邮件
+
+    配置启用SSL时优先尝试SSL连接，否则按邮箱类型选择连接方式，
+    标准连接失败时再尝试SSL连接作为最后的备选方案
+    """
+    if settings.MAIL_SSL:
+        try:
+            logger.info("配置中启用SSL，优先尝试SSL连接")
+            return _connect_ssl()
+        except Exception as ssl_error:
+            logger.warning(f"SSL连接失败: {str(ssl_error)}，尝试降级到无SSL连接")
+    
+    try:
+        return _connect_standard()
+    except Exception as e:
+        if settings.MAIL_SSL:
+            raise
+        logger.warning(f"标准连接失败: {str(e)}，尝试SSL连接作为最后的备选方案")
+        return _connect_ssl()
+
+def close_smtp_connection(server: smtplib.SMTP):
+    """关闭SMTP连接（忽略已断开的连接）"""
+    try:
         server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+def send_verification_email(email, username, token):
+    """
+    立即发送验证邮件（使用单独的SMTP连接）
+
+    注册和重新发送验证邮件通过发件箱投递，这里用于测试邮件配置
+    """
+    try:
+        subject, html_content = render_email("verification", verification_context(username, token))
+        message = build_message(email, subject, html_content)
+        
+        server = open_smtp_connection()
+        try:
+            logger.info(f"发送邮件到: {email}")
+            server.send_message(message)
+        finally:
+            close_smtp_connection(server)
         
         logger.info(f"验证邮件已成功发送至 {email}")
         return True
             
     except Exception as e:
         logger.error(f"发送验证邮件失败: {str(e)}", exc_info=True)
-        
-        # 如果配置中没有启用SSL，但标准连接失败，尝试SSL作为最后的备选方案
-        if not settings.MAIL_SSL:
-            try:
-                logger.info("标准连接失败，尝试SSL连接作为最后的备选方案")
-                server_ssl = smtplib.SMTP_SSL(settings.MAIL_SERVER, 465)
-                server_ssl.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-                
-                server_ssl.send_message(message)
-                server_ssl.quit()
-                
-                logger.info(f"使用SSL连接成功发送验证邮件至 {email}")
-                return True
-            except Exception as ssl_error:
-                logger.error(f"SSL连接发送邮件也失败: {str(ssl_error)}", exc_info=True)
-        
-        return False 
\ No newline at end of file
+        return False
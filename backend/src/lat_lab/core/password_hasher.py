@@ -0,0 +1,147 @@
+"""
+密码哈希进程池模块
+bcrypt 的哈希和验证是CPU密集的，在独立的、大小受限的进程池中计算，
+不占用事件循环和Starlette默认线程池（其他同步接口也依赖它）。
+排队的任务超过上限时立即返回503，并记录计算耗时和排队耗时，用于调整 BCRYPT_ROUNDS。
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from src.lat_lab.core.config import settings
+from src.lat_lab.core.security import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+# 每种操作保留最近的耗时样本数量
+_SAMPLE_SIZE = 512
+
+
+def _timed(func: Callable, *args) -> Tuple[Any, float]:
+    """在工作进程中执行并返回计算耗时"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class _LatencyStats:
+    """单个操作的耗时统计"""
+
+    def __init__(self):
+        self.count = 0
+        # (总耗时, 计算耗时)
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=_SAMPLE_SIZE)
+
+    def observe(self, total: float, compute: float):
+        self.count += 1
+        self.samples.append((total, compute))
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"count": self.count}
+        compute = sorted(c for _, c in self.samples)
+        wait = [t - c for t, c in self.samples]
+        return {
+            "count": self.count,
+            "compute_avg_ms": round(sum(compute) / len(compute) * 1000, 2),
+            "compute_p50_ms": round(compute[len(compute) // 2] * 1000, 2),
+            "compute_p95_ms": round(compute[min(len(compute) - 1, int(len(compute) * 0.95))] * 1000, 2),
+            "compute_max_ms": round(compute[-1] * 1000, 2),
+            "queue_wait_avg_ms": round(max(0.0, sum(wait) / len(wait)) * 1000, 2),
+        }
+
+
+class PasswordHasher:
+    """密码哈希进程池"""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 正在计算和排队的任务数（只在事件循环中修改）
+        self._in_flight = 0
+        self._rejected = 0
+        self._stats = {"hash": _LatencyStats(), "verify": _LatencyStats()}
+
+    @property
+    def capacity(self) -> int:
+        """同时计算和排队的任务上限"""
+        return max(1, settings.PASSWORD_HASH_WORKERS) + settings.PASSWORD_HASH_QUEUE_SIZE
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+            return self._executor
+
+    async def _run(self, operation: str, func: Callable, *args):
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            logger.warning(f"密码哈希队列已满（{self._in_flight}），拒绝请求")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="服务繁忙，请稍后重试",
+                headers={"Retry-After": "1"}
+            )
+
+        self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            if settings.PASSWORD_HASH_WORKERS <= 0:
+                # 不使用进程池（例如不允许创建子进程的环境）
+                result, compute = await run_in_threadpool(_timed, func, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, compute = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+        except BrokenProcessPool:
+            # 工作进程异常退出，下次使用时重建进程池
+            logger.error("密码哈希进程池已损坏，将重新创建")
+            self.shutdown()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="服务繁忙，请稍后重试",
+                headers={"Retry-After": "1"}
+            )
+        finally:
+            self._in_flight -= 1
+
+        self._stats[operation].observe(time.perf_counter() - start, compute)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """生成密码哈希"""
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """验证密码"""
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取进程池和耗时统计"""
+        return {
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+            "hash": self._stats["hash"].summary(),
+            "verify": self._stats["verify"].summary(),
+        }
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+# 全局密码哈希实例
+password_hasher = PasswordHasher()
@@ -77,7 +77,8 @@ class RateLimiter:
         logger.debug(f"清理完成，当前记录数: {len(self._requests)}")
     
     def is_allowed(self, request: Request, endpoint: str, max_requests: int, 
-                   window_seconds: int) -> Tuple[bool, Optional[int]]:
+                   window_seconds: int, cost: int = 1) -> Tuple[bool, Optional[int]]:
+        """检查请求是否允许，cost 为本次请求占用的次数（例如批量操作按条目数计算）"""
         current_time = time.time()
         ip = self._get_client_ip(request)
         
@@ -103,9 +104,9 @@ class RateLimiter:
             request_times.popleft()
         
         # 检查是否超过限制
-        if len(request_times) >= max_requests:
+        if len(request_times) + cost > max_requests:
             # 计算等待时间
-            oldest_request = request_times[0]
+            oldest_request = request_times[0] if request_times else current_time
             retry_after = int(oldest_request + window_seconds - current_time) + 1
             
             logger.warning(f"IP {ip} 在端点 {endpoint} 达到速率限制: "
@@ -122,7 +123,7 @@ class RateLimiter:
             return False, retry_after
         
         # 记录当前请求
-        request_times.append(current_time)
+        request_times.extend([current_time] * cost)
         
         return True, None
     
@@ -187,6 +188,24 @@ def rate_limit(endpoint: str, max_requests: int, window_seconds: int):
     return decorator
 
 
+def check_rate_limit(request: Request, endpoint: str, max_requests: int, window_seconds: int, cost: int = 1):
+    """检查速率限制，超过时抛出429（用于占用次数取决于请求内容的接口）"""
+    allowed, retry_after = rate_limiter.is_allowed(
+        request, endpoint, max_requests, window_seconds, cost
+    )
+    
+    if not allowed:
+        headers = {}
+        if retry_after:
+            headers["Retry-After"] = str(retry_after)
+        
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="请求过于频繁，请稍后重试",
+            headers=headers
+        )
+
+
 def create_rate_limit_dependency(endpoint: str, max_requests: int, window_seconds: int):
     def rate_limit_dependency(request: Request):
         allowed, retry_after = rate_limiter.is_allowed(
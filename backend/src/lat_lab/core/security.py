@@ -42,7 +42,7 @@ def get_password_hash(password: str) -> str:
         password = password[:72]
     
     # 使用 bcrypt.hashpw 直接生成哈希
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
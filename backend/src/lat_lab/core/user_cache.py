@@ -0,0 +1,109 @@
+"""
+认证用户缓存模块
+按令牌主体（邮箱）缓存用户的列值快照，认证请求在TTL内不再查询用户表。
+
+每次命中都根据快照构造一个新的游离（detached）User对象返回：对它的修改不会写回缓存或数据库，
+也不会影响其他请求；访问未加载的关系属性会抛出 DetachedInstanceError。
+用户更新、角色变化、重置密码、邮箱验证和删除后调用 invalidate_user；
+多进程部署时其他进程中的快照在TTL后过期。
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.lat_lab.core.config import settings
+from src.lat_lab.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_COLUMN_KEYS = tuple(attr.key for attr in inspect(User).column_attrs)
+
+
+class UserCache:
+    """认证用户快照缓存（TTL + LRU）"""
+
+    def __init__(self):
+        # 令牌主体 -> (过期时间, 列值快照)
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次失效加一，查询期间发生过失效的结果不写入缓存
+        self._generation = 0
+
+    @staticmethod
+    def _snapshot(user: User) -> Dict[str, Any]:
+        return {key: getattr(user, key) for key in _COLUMN_KEYS}
+
+    @staticmethod
+    def _materialize(snapshot: Dict[str, Any]) -> User:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def get(self, subject: str, loader: Callable[[], Optional[User]]) -> Optional[User]:
+        """
+        获取令牌主体对应的用户
+
+        Args:
+            subject: 令牌主体（邮箱）
+            loader: 未命中时从数据库查询用户
+
+        Returns:
+            Optional[User]: 游离的用户对象，用户不存在时返回None（不缓存）
+        """
+        if settings.USER_CACHE_TTL_SECONDS <= 0:
+            user = loader()
+            return self._materialize(self._snapshot(user)) if user else None
+
+        with self._lock:
+            entry = self._cache.get(subject)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self._cache.move_to_end(subject)
+                    snapshot = entry[1]
+                else:
+                    del self._cache[subject]
+                    entry = None
+            generation = self._generation
+
+        if entry is not None:
+            return self._materialize(snapshot)
+
+        user = loader()
+        if user is None:
+            return None
+
+        snapshot = self._snapshot(user)
+        with self._lock:
+            if generation == self._generation:
+                self._cache[subject] = (time.monotonic() + settings.USER_CACHE_TTL_SECONDS, snapshot)
+                self._cache.move_to_end(subject)
+                while len(self._cache) > settings.USER_CACHE_MAX_ENTRIES:
+                    self._cache.popitem(last=False)
+        return self._materialize(snapshot)
+
+    def invalidate_user(self, user_id: int):
+        """清除指定用户的快照"""
+        with self._lock:
+            self._generation += 1
+            for subject in [s for s, (_, snapshot) in self._cache.items() if snapshot["id"] == user_id]:
+                del self._cache[subject]
+
+    def clear(self):
+        """清除全部快照"""
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+
+# 全局用户缓存实例
+user_cache = UserCache()
+
+
+def invalidate_user(user_id: int):
+    """用户信息变化后清除其缓存快照"""
+    user_cache.invalidate_user(user_id)
@@ -5,8 +5,9 @@ from datetime import datetime
 from src.lat_lab.models.article import Article, ArticleStatus, article_likes, ArticleView
 from src.lat_lab.models.tag import Tag, article_tags
 from src.lat_lab.models.category import Category
-from src.lat_lab.schemas.article import ArticleCreate, ArticleUpdate
+from src.lat_lab.schemas.article import ArticleCreate, ArticleUpdate, ArticleBulkModeration, ArticleModerationAction
 from src.lat_lab.models.user import User
+from src.lat_lab.crud.comment import BULK_BATCH_SIZE, delete_comments_by_articles
 
 def get_article(db: Session, article_id: int, current_user_id: Optional[int] = None):
     """
@@ -414,4 +415,49 @@ def update_like_count(db: Session, article_id: int, increment: bool = True, curr
     except Exception as e:
         db.rollback()
         print(f"更新点赞数失败: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
+
+def bulk_moderate_articles(db: Session, moderation: ArticleBulkModeration) -> int:
+    """
+    批量审核文章，每批只执行一条 UPDATE/DELETE
+    
+    Args:
+        db: 数据库会话
+        moderation: 操作和选择条件（ID列表与筛选条件同时给出时取交集）
+    
+    Returns:
+        int: 受影响的文章数量
+    """
+    conditions = []
+    if moderation.ids is not None:
+        conditions.append(Article.id.in_(moderation.ids))
+    if moderation.author_id is not None:
+        conditions.append(Article.author_id == moderation.author_id)
+    if moderation.created_after is not None:
+        conditions.append(Article.created_at >= moderation.created_after)
+    if moderation.created_before is not None:
+        conditions.append(Article.created_at < moderation.created_before)
+    
+    # 审核通过和拒绝只处理待审核的文章
+    if moderation.action != ArticleModerationAction.delete:
+        conditions.append(or_(Article.is_approved == False, Article.is_approved == None))
+    
+    if moderation.action == ArticleModerationAction.approve:
+        affected = db.query(Article).filter(*conditions).update(
+            {Article.is_approved: True}, synchronize_session=False
+        )
+        db.commit()
+        return affected
+    
+    # 拒绝即删除：连同评论、浏览记录、点赞和标签关联一起删除
+    article_ids = [article_id for article_id, in db.query(Article.id).filter(*conditions)]
+    affected = 0
+    for i in range(0, len(article_ids), BULK_BATCH_SIZE):
+        chunk = article_ids[i:i + BULK_BATCH_SIZE]
+        delete_comments_by_articles(db, chunk)
+        db.query(ArticleView).filter(ArticleView.article_id.in_(chunk)).delete(synchronize_session=False)
+        db.execute(article_likes.delete().where(article_likes.c.article_id.in_(chunk)))
+        db.execute(article_tags.delete().where(article_tags.c.article_id.in_(chunk)))
+        affected += db.query(Article).filter(Article.id.in_(chunk)).delete(synchronize_session=False)
+    db.commit()
+    return affected
@@ -1,8 +1,17 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional
-from src.lat_lab.models.comment import Comment
-from src.lat_lab.schemas.comment import CommentCreate, CommentUpdate
+from sqlalchemy import desc, func, or_
+from sqlalchemy.exc import IntegrityError
+from typing import Iterable, List, Optional, Tuple
+from src.lat_lab.models.article import Article
+from src.lat_lab.models.comment import Comment, comment_likes
+from src.lat_lab.schemas.comment import CommentCreate, CommentUpdate, CommentBulkModeration, CommentModerationAction
+
+# 批量操作时每条语句处理的最大ID数量
+BULK_BATCH_SIZE = 500
+
+def _chunks(ids: List[int], size: int = BULK_BATCH_SIZE):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
 
 def get_comment(db: Session, comment_id: int):
     return db.query(Comment).filter(Comment.id == comment_id).first()
@@ -36,6 +45,13 @@ def get_comment_replies(
     
     return query.order_by(Comment.created_at).all()
 
+def _adjust_comment_count(db: Session, article_id: int, delta: int):
+    """在当前事务中原子地调整文章的已审核评论数（不提交）"""
+    query = db.query(Article).filter(Article.id == article_id)
+    if delta < 0:
+        query = query.filter(Article.comment_count >= -delta)
+    query.update({Article.comment_count: Article.comment_count + delta}, synchronize_session=False)
+
 def create_comment(db: Session, comment: CommentCreate, user_id: int, auto_approve: bool = False):
     db_comment = Comment(
         content=comment.content,
@@ -45,6 +61,8 @@ def create_comment(db: Session, comment: CommentCreate, user_id: int, auto_appro
         is_approved=auto_approve
     )
     db.add(db_comment)
+    if auto_approve:
+        _adjust_comment_count(db, comment.article_id, 1)
     db.commit()
     db.refresh(db_comment)
     return db_comment
@@ -54,10 +72,15 @@ def update_comment(db: Session, comment_id: int, comment_update: CommentUpdate):
     if not db_comment:
         return None
     
+    was_approved = bool(db_comment.is_approved)
     update_data = comment_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_comment, key, value)
     
+    # 审核状态变化时同步文章评论数
+    if bool(db_comment.is_approved) != was_approved:
+        _adjust_comment_count(db, db_comment.article_id, 1 if db_comment.is_approved else -1)
+    
     db.commit()
     db.refresh(db_comment)
     return db_comment
@@ -67,16 +90,147 @@ def delete_comment(db: Session, comment_id: int):
     if not db_comment:
         return False
     
+    if db_comment.is_approved:
+        _adjust_comment_count(db, db_comment.article_id, -1)
     db.delete(db_comment)
     db.commit()
     return True
 
-def like_comment(db: Session, comment_id: int):
-    db_comment = get_comment(db, comment_id)
-    if not db_comment:
-        return None
+def discount_user_comments(db: Session, user_id: int):
+    """删除用户（级联删除其评论）前，在同一事务中扣除其已审核评论的文章评论数（不提交）"""
+    rows = db.query(Comment.article_id, func.count(Comment.id)).filter(
+        Comment.user_id == user_id,
+        Comment.is_approved == True
+    ).group_by(Comment.article_id).all()
+    for article_id, count in rows:
+        _adjust_comment_count(db, article_id, -count)
+
+def recount_comment_counts(db: Session, article_ids: Optional[Iterable[int]] = None, dry_run: bool = False) -> int:
+    """
+    根据评论表重新计算文章的已审核评论数（一次 GROUP BY 查询，只更新不一致的文章）
+    
+    Args:
+        db: 数据库会话
+        article_ids: 只修复这些文章，为空时修复全部文章
+        dry_run: 只统计，不修改
+    
+    Returns:
+        int: 评论数不一致的文章数量
+    """
+    counts = db.query(Comment.article_id, func.count(Comment.id)).filter(Comment.is_approved == True)
+    articles = db.query(Article.id, Article.comment_count)
+    if article_ids is not None:
+        article_ids = list(article_ids)
+        counts = counts.filter(Comment.article_id.in_(article_ids))
+        articles = articles.filter(Article.id.in_(article_ids))
+    actual = dict(counts.group_by(Comment.article_id).all())
+    
+    changes = [
+        {"id": article_id, "comment_count": actual.get(article_id, 0)}
+        for article_id, stored in articles.all()
+        if stored != actual.get(article_id, 0)
+    ]
+    if changes and not dry_run:
+        db.bulk_update_mappings(Article, changes)
+        db.commit()
+    return len(changes)
+
+def like_comment(db: Session, comment_id: int, user_id: int) -> Optional[int]:
+    """
+    点赞评论（每个用户只计一次）
+    
+    先插入点赞记录，插入成功（用户此前没有点赞）才原子地增加点赞数，
+    重复点赞由主键约束拒绝，并发点赞也不会丢失计数。
+    
+    Returns:
+        Optional[int]: 点赞后的点赞数，评论不存在时返回None
+    """
+    try:
+        db.execute(comment_likes.insert().values(user_id=user_id, comment_id=comment_id))
+    except IntegrityError:
+        # 已经点赞过（或评论不存在）
+        db.rollback()
+    else:
+        db.query(Comment).filter(Comment.id == comment_id).update(
+            {Comment.likes: func.coalesce(Comment.likes, 0) + 1},
+            synchronize_session=False
+        )
+        db.commit()
+    return db.query(Comment.likes).filter(Comment.id == comment_id).scalar()
+
+def get_liked_comment_ids(db: Session, user_id: int, comment_ids: Iterable[int]) -> List[int]:
+    """一次查询返回用户点赞过的评论ID（用于整个评论区的点赞状态）"""
+    comment_ids = list(comment_ids)
+    if not comment_ids:
+        return []
+    rows = db.query(comment_likes.c.comment_id).filter(
+        comment_likes.c.user_id == user_id,
+        comment_likes.c.comment_id.in_(comment_ids)
+    ).all()
+    return sorted(comment_id for comment_id, in rows)
+
+def delete_comments_by_articles(db: Session, article_ids: List[int]) -> int:
+    """删除文章的全部评论及其点赞记录（不提交，用于批量删除文章）"""
+    deleted = 0
+    for chunk in _chunks(article_ids):
+        comment_ids = db.query(Comment.id).filter(Comment.article_id.in_(chunk))
+        db.execute(comment_likes.delete().where(comment_likes.c.comment_id.in_(comment_ids.scalar_subquery())))
+        # 先断开回复关系，避免自引用外键按行检查时失败
+        db.query(Comment).filter(Comment.article_id.in_(chunk), Comment.parent_id != None).update(
+            {Comment.parent_id: None}, synchronize_session=False
+        )
+        deleted += db.query(Comment).filter(Comment.article_id.in_(chunk)).delete(synchronize_session=False)
+    return deleted
+
+def bulk_moderate_comments(db: Session, moderation: CommentBulkModeration) -> Tuple[int, List[int]]:
+    """
+    批量审核评论，每批只执行一条 UPDATE/DELETE，并重新计算受影响文章的评论数
     
-    db_comment.likes += 1
+    Args:
+        db: 数据库会话
+        moderation: 操作和选择条件（ID列表与筛选条件同时给出时取交集）
+    
+    Returns:
+        Tuple[int, List[int]]: 受影响的评论数量，以及受影响的文章ID
+    """
+    conditions = []
+    if moderation.ids is not None:
+        conditions.append(Comment.id.in_(moderation.ids))
+    if moderation.user_id is not None:
+        conditions.append(Comment.user_id == moderation.user_id)
+    if moderation.article_id is not None:
+        conditions.append(Comment.article_id == moderation.article_id)
+    if moderation.created_after is not None:
+        conditions.append(Comment.created_at >= moderation.created_after)
+    if moderation.created_before is not None:
+        conditions.append(Comment.created_at < moderation.created_before)
+    
+    # 只处理状态确实会改变的评论
+    if moderation.action == CommentModerationAction.approve:
+        conditions.append(or_(Comment.is_approved == False, Comment.is_approved == None))
+    elif moderation.action == CommentModerationAction.reject:
+        conditions.append(Comment.is_approved == True)
+    
+    if moderation.action == CommentModerationAction.delete:
+        rows = db.query(Comment.id, Comment.article_id).filter(*conditions).all()
+        article_ids = sorted({article_id for _, article_id in rows})
+        affected = 0
+        for chunk in _chunks([comment_id for comment_id, _ in rows]):
+            db.execute(comment_likes.delete().where(comment_likes.c.comment_id.in_(chunk)))
+            # 被删除评论的回复变为顶层评论（与删除单条评论相同）
+            db.query(Comment).filter(Comment.parent_id.in_(chunk)).update(
+                {Comment.parent_id: None}, synchronize_session=False
+            )
+            affected += db.query(Comment).filter(Comment.id.in_(chunk)).delete(synchronize_session=False)
+    else:
+        article_ids = [article_id for article_id, in db.query(Comment.article_id).filter(*conditions).distinct()]
+        affected = db.query(Comment).filter(*conditions).update(
+            {Comment.is_approved: moderation.action == CommentModerationAction.approve},
+            synchronize_session=False
+        )
+    
+    # 按实际结果重新计算评论数，并与上面的修改一起提交
+    if article_ids:
+        recount_comment_counts(db, article_ids)
     db.commit()
-    db.refresh(db_comment)
-    return db_comment 
\ No newline at end of file
+    return affected, article_ids
@@ -1,7 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 from typing import List, Optional, Dict, Any
+import json
 from src.lat_lab.models.plugin import Plugin
 from src.lat_lab.schemas.plugin import PluginCreate, PluginUpdate
+from src.lat_lab.services.plugin_analyzer import plugin_analyzer
 
 def get_plugin(db: Session, plugin_id: int):
     return db.query(Plugin).filter(Plugin.id == plugin_id).first()
@@ -9,19 +11,51 @@ def get_plugin(db: Session, plugin_id: int):
 def get_plugin_by_name(db: Session, name: str):
     return db.query(Plugin).filter(Plugin.name == name).first()
 
-def get_plugins(db: Session, skip: int = 0, limit: int = 100, active_only: bool = False):
+def get_plugins(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    active_only: bool = False,
+    name: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    cursor: Optional[int] = None,
+    include_code: bool = False
+):
+    """
+    获取插件列表
+    
+    列表默认不加载 code 和 last_output 等大字段；
+    传入 cursor（上一页最后一个插件ID）时使用游标分页，忽略 skip
+    """
     query = db.query(Plugin)
     
+    if not include_code:
+        query = query.options(defer(Plugin.code), defer(Plugin.last_output), defer(Plugin.analysis))
+    
     if active_only:
         query = query.filter(Plugin.is_active == True)
     
-    return query.offset(skip).limit(limit).all()
+    if is_active is not None:
+        query = query.filter(Plugin.is_active == is_active)
+    
+    if name:
+        query = query.filter(Plugin.name.like(f"%{name}%"))
+    
+    query = query.order_by(Plugin.id)
+    
+    if cursor is not None:
+        query = query.filter(Plugin.id > cursor)
+    elif skip:
+        query = query.offset(skip)
+    
+    return query.limit(limit).all()
 
 def create_plugin(db: Session, plugin: PluginCreate, user_id: int):
     db_plugin = Plugin(
         name=plugin.name,
         description=plugin.description,
         code=plugin.code,
+        analysis=plugin_analyzer.dumps(plugin.code),
         creator_id=user_id,
         version=plugin.version,
         is_public=plugin.is_public
@@ -42,6 +76,10 @@ def update_plugin(db: Session, plugin_id: int, plugin: PluginUpdate):
     for key, value in update_data.items():
         setattr(db_plugin, key, value)
     
+    # 代码变化时重新生成静态分析结果
+    if "code" in update_data:
+        db_plugin.analysis = plugin_analyzer.dumps(db_plugin.code)
+    
     db.commit()
     db.refresh(db_plugin)
     return db_plugin
@@ -65,5 +103,22 @@ def activate_plugin(db: Session, plugin_id: int, active: bool = True):
     db.refresh(db_plugin)
     return db_plugin
 
+def set_plugin_schedule(db: Session, plugin_id: int, schedule: Optional[str], params: Optional[Dict[str, Any]] = None):
+    db_plugin = get_plugin(db, plugin_id)
+    if not db_plugin:
+        return None
+    
+    db_plugin.schedule = schedule
+    db_plugin.schedule_params = json.dumps(params, ensure_ascii=False) if schedule and params else None
+    
+    # 调度设置变更后清空旧输出，下一轮调度立即重新执行
+    db_plugin.last_run_at = None
+    db_plugin.last_output = None
+    db_plugin.last_error = None
+    
+    db.commit()
+    db.refresh(db_plugin)
+    return db_plugin
+
 def get_plugin_detail(db: Session, plugin_id: int):
     return db.query(Plugin).filter(Plugin.id == plugin_id).first() 
\ No newline at end of file
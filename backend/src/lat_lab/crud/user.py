@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from src.lat_lab.models.user import User, RoleEnum
+from src.lat_lab.models.upload import UploadRef
 from src.lat_lab.schemas.user import UserCreate, UserUpdate
 from src.lat_lab.core.security import get_password_hash, verify_password
 from src.lat_lab.core.email import generate_verification_token, is_token_expired
+from src.lat_lab.core.user_cache import invalidate_user
+from src.lat_lab.crud.comment import discount_user_comments
 from typing import Optional, List
 from datetime import datetime
 
@@ -21,14 +24,21 @@ def get_user_by_verification_token(db: Session, token: str):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: UserCreate, role: RoleEnum = RoleEnum.user, send_verification: bool = True):
+def create_user(
+    db: Session,
+    user: UserCreate,
+    role: RoleEnum = RoleEnum.user,
+    send_verification: bool = True,
+    hashed_password: Optional[str] = None
+):
     # 生成验证令牌
     verification_token = generate_verification_token()
     
     db_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=get_password_hash(user.password),
+        # 调用方可以传入在密码哈希进程池中预先计算的哈希
+        hashed_password=hashed_password or get_password_hash(user.password),
         role=role,
         verification_token=verification_token,
         token_created_at=datetime.now(),
@@ -79,6 +89,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
         setattr(db_user, key, value)
     
     db.commit()
+    invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -99,6 +110,7 @@ def verify_email(db: Session, token: str):
     user.token_created_at = None
     
     db.commit()
+    invalidate_user(user.id)
     db.refresh(user)
     return user
 
@@ -117,6 +129,7 @@ def regenerate_verification_token(db: Session, user_id: int):
     user.token_created_at = datetime.now()
     
     db.commit()
+    invalidate_user(user_id)
     db.refresh(user)
     return user
 
@@ -125,10 +138,30 @@ def delete_user(db: Session, user_id: int):
     if not db_user:
         return False
     
+    # 用户的评论随用户级联删除，同步扣除文章评论数
+    discount_user_comments(db, user_id)
+    # 头像引用随用户删除（文件由垃圾回收清理）；其他上传的文件可能仍被引用，只清空上传者
+    db.query(UploadRef).filter(UploadRef.user_id == user_id, UploadRef.kind == "avatar").delete(
+        synchronize_session=False
+    )
+    db.query(UploadRef).filter(UploadRef.user_id == user_id).update(
+        {UploadRef.user_id: None}, synchronize_session=False
+    )
     db.delete(db_user)
     db.commit()
+    invalidate_user(user_id)
     return True
 
+def get_user_by_login(db: Session, login_identifier: str):
+    """通过邮箱或用户名查找登录用户"""
+    # 首先尝试通过邮箱查找用户
+    user = get_user_by_email(db, login_identifier)
+    
+    # 如果邮箱没找到，尝试通过用户名查找
+    if not user:
+        user = get_user_by_username(db, login_identifier)
+    return user
+
 def authenticate_user(db: Session, login_identifier: str, password: str):
     """
     用户认证函数，支持邮箱或用户名登录
@@ -141,12 +174,7 @@ def authenticate_user(db: Session, login_identifier: str, password: str):
     Returns:
         认证成功的用户对象，失败返回False
     """
-    # 首先尝试通过邮箱查找用户
-    user = get_user_by_email(db, login_identifier)
-    
-    # 如果邮箱没找到，尝试通过用户名查找
-    if not user:
-        user = get_user_by_username(db, login_identifier)
+    user = get_user_by_login(db, login_identifier)
     
     # 如果用户不存在或密码错误，返回False
     if not user or not verify_password(password, user.hashed_password):
@@ -17,7 +17,6 @@ from typing import Dict, List, Any, Optional
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -26,6 +25,8 @@ from src.lat_lab.api import api_router
 from src.lat_lab.core.config import settings, DATA_DIR
 from src.lat_lab.core.database import create_db_and_tables
 from src.lat_lab.core.rate_limiter import rate_limiter
+from src.lat_lab.services.storage import get_storage
+from src.lat_lab.utils.static_uploads import UploadsStaticFiles
 
 # 配置日志
 logging.basicConfig(
@@ -101,7 +102,8 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": detail}
+        content={"detail": detail},
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(RequestValidationError)
@@ -164,10 +166,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-# 挂载静态文件目录
-app.mount("/uploads", StaticFiles(directory=str(settings.UPLOADS_DIR)), name="uploads")
+# 挂载静态文件目录（内容哈希命名的文件长期缓存，可交给nginx发送；远程存储时重定向到存储地址）
+app.mount(
+    "/uploads",
+    UploadsStaticFiles(
+        directory=str(settings.UPLOADS_DIR),
+        accel_redirect_prefix=settings.UPLOADS_ACCEL_REDIRECT_PREFIX,
+        storage=get_storage()
+    ),
+    name="uploads"
+)
 
 # 注册API路由
 app.include_router(api_router, prefix="/api")
@@ -192,14 +203,22 @@ async def startup_event():
     except Exception as e:
         logger.error(f"数据库初始化失败: {str(e)}")
     
-    # 加载插件市场配置
+    # 预加载系统配置
+    try:
+        from src.lat_lab.services.system_config import system_config_service
+        from src.lat_lab.core.database import SessionLocal
+        db = SessionLocal()
+        try:
+            system_config_service.preload(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"预加载系统配置失败: {str(e)}")
+    
+    # 在后台预加载插件市场数据，不阻塞启动（首次请求时若仍未加载会同步等待）
     try:
         from src.lat_lab.services.marketplace import marketplace_service
-        marketplace_data = marketplace_service.get_marketplace_data(force_refresh=True)
-        if marketplace_data:
-            logger.info(f"成功加载插件市场数据，共{len(marketplace_data.get('plugins', []))}个插件")
-        else:
-            logger.warning("未能加载插件市场数据")
+        marketplace_service.refresh_in_background()
     except Exception as e:
         logger.error(f"加载插件市场配置失败: {str(e)}")
     
@@ -216,8 +235,42 @@ async def startup_event():
     except Exception as e:
         logger.error(f"初始化插件管理器失败: {str(e)}")
     
+    # 启动插件定时调度器
+    if settings.PLUGIN_SCHEDULER_ENABLED:
+        try:
+            from src.lat_lab.services.plugin_scheduler import plugin_scheduler
+            plugin_scheduler.start()
+        except Exception as e:
+            logger.error(f"启动插件调度器失败: {str(e)}")
+    
+    # 启动邮件投递线程（重启前未发送的邮件会继续投递）
+    if settings.EMAIL_OUTBOX_ENABLED:
+        try:
+            from src.lat_lab.services.email_outbox import email_outbox_service
+            email_outbox_service.start()
+        except Exception as e:
+            logger.error(f"启动邮件投递线程失败: {str(e)}")
+    
     logger.info("应用初始化完成!")
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """应用关闭时执行的事件"""
+    from src.lat_lab.services.plugin_scheduler import plugin_scheduler
+    plugin_scheduler.stop()
+    
+    from src.lat_lab.services.image_variants import image_variant_service
+    image_variant_service.shutdown()
+    
+    from src.lat_lab.core.password_hasher import password_hasher
+    password_hasher.shutdown()
+    
+    from src.lat_lab.services.email_outbox import email_outbox_service
+    email_outbox_service.stop()
+    
+    from src.lat_lab.services.live_events import live_event_hub
+    live_event_hub.close_all()
+
 @app.get("/")
 def root():
     """API根路径"""
@@ -2,4 +2,4 @@
 数据模型模块
 """
 
-from . import article, category, comment, plugin, tag, user, system 
\ No newline at end of file
+from . import article, category, comment, plugin, tag, user, system, upload, email_outbox
\ No newline at end of file
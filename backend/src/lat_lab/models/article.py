@@ -46,6 +46,7 @@ class Article(Base):
     is_pinned = Column(Boolean, default=False)
     view_count = Column(Integer, default=0)
     likes_count = Column(Integer, default=0)
+    comment_count = Column(Integer, default=0, nullable=False, server_default="0")  # 已审核通过的评论数
     is_approved = Column(Boolean, default=False)  # 添加审核字段
     status = Column(Enum(ArticleStatus), default=ArticleStatus.published, nullable=False)
     published_at = Column(DateTime(timezone=True), nullable=True)
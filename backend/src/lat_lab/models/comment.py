@@ -1,8 +1,17 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Boolean, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.lat_lab.core.database import Base
 
+# 用户评论点赞关联表（主键保证每个用户对每条评论只能点赞一次）
+comment_likes = Table(
+    "comment_likes",
+    Base.metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("comment_id", Integer, ForeignKey("comments.id", ondelete="CASCADE"), primary_key=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now())
+)
+
 class Comment(Base):
     __tablename__ = "comments"
 
@@ -20,4 +29,7 @@ class Comment(Base):
     # 关联关系
     article = relationship("Article", back_populates="comments")
     user = relationship("User", back_populates="comments")
-    replies = relationship("Comment", backref="parent", remote_side=[id]) 
\ No newline at end of file
+    replies = relationship("Comment", backref="parent", remote_side=[id])
+    
+    # 点赞关联（删除评论或用户时同时删除点赞记录）
+    liked_by = relationship("User", secondary=comment_likes, backref="liked_comments")
@@ -0,0 +1,26 @@
+"""
+邮件发件箱数据模型
+
+需要发送的邮件先写入发件箱，由后台投递线程批量发送并在失败时按退避时间重试，
+应用重启不会丢失尚未发送的邮件。
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from src.lat_lab.core.database import Base
+
+
+class EmailOutbox(Base):
+    """邮件发件箱表"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(128), nullable=False, comment="收件人")
+    template = Column(String(50), nullable=False, comment="邮件模板名称")
+    context = Column(Text, nullable=False, comment="模板参数（JSON）")
+    status = Column(String(20), nullable=False, default="pending", index=True, comment="状态：pending/sending/sent/failed")
+    attempts = Column(Integer, nullable=False, default=0, comment="已尝试发送次数")
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True, comment="下次发送时间")
+    last_error = Column(Text, nullable=True, comment="最近一次发送失败的原因")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
+    sent_at = Column(DateTime, nullable=True, comment="发送成功时间")
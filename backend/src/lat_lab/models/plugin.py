@@ -18,6 +18,16 @@ class Plugin(Base):
     # 可见性控制
     is_public = Column(Boolean, default=True)  # 是否公开
     
+    # 保存时生成的代码静态分析结果（JSON格式）
+    analysis = Column(Text, nullable=True)
+    
+    # 定时执行（cron表达式为空表示不定时执行）
+    schedule = Column(String(100), nullable=True)
+    schedule_params = Column(Text, nullable=True)  # 定时执行参数（JSON格式）
+    last_run_at = Column(DateTime, nullable=True)  # 最近一次定时执行时间
+    last_output = Column(Text, nullable=True)      # 最近一次成功执行的输出
+    last_error = Column(Text, nullable=True)       # 最近一次执行的错误信息
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -15,4 +15,12 @@ class SystemConfig(Base):
     value = Column(Text, nullable=False, comment="配置值（JSON格式）")
     description = Column(String(255), nullable=True, comment="配置描述")
     created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="更新时间") 
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="更新时间")
+
+
+class SystemConfigVersion(Base):
+    """系统配置版本表（仅一行），每次修改配置时递增，用于多进程间的缓存失效"""
+    __tablename__ = "system_config_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, comment="配置版本号")
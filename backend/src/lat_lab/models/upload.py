@@ -0,0 +1,42 @@
+"""
+上传文件相关数据模型
+
+上传的文件按内容寻址保存：相同内容只保存一个文件（UploadBlob），
+每次上传只增加一条引用记录（UploadRef）。没有任何引用的文件由垃圾回收删除。
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from src.lat_lab.core.database import Base
+
+
+class UploadBlob(Base):
+    """上传文件内容表，每个不同的文件内容一行"""
+    __tablename__ = "upload_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False, comment="内容SHA-256")
+    filename = Column(String(80), nullable=False, comment="存储文件名（哈希+扩展名）")
+    mime_type = Column(String(50), nullable=False, comment="MIME类型")
+    size = Column(Integer, nullable=False, comment="文件大小（字节）")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
+    # 每次上传复用时更新，垃圾回收只删除超过宽限期未被使用的文件
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True, comment="最近使用时间")
+
+    refs = relationship("UploadRef", back_populates="blob")
+
+
+class UploadRef(Base):
+    """上传引用表，每次上传一行（头像被替换时删除旧引用）"""
+    __tablename__ = "upload_refs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    blob_id = Column(Integer, ForeignKey("upload_blobs.id"), nullable=False, index=True)
+    # 删除用户时保留引用（文件可能仍被文章内容使用），只清空上传者
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    kind = Column(String(20), nullable=False, default="image", comment="用途：image/avatar")
+    original_filename = Column(String(255), nullable=True, comment="上传时的文件名")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="上传时间")
+
+    blob = relationship("UploadBlob", back_populates="refs")
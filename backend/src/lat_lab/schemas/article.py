@@ -71,6 +71,7 @@ class Article(ArticleBase):
     author_id: int
     view_count: int
     likes_count: Optional[int] = 0
+    comment_count: Optional[int] = 0
     created_at: datetime
     updated_at: datetime
     tags: List[Tag] = []
@@ -84,4 +85,19 @@ class ArticleDetail(Article):
     author: Optional[UserOut] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ArticleModerationAction(str, Enum):
+    approve = "approve"
+    reject = "reject"  # 拒绝待审核的文章（与单篇拒绝相同，拒绝即删除）
+    delete = "delete"
+
+
+class ArticleBulkModeration(BaseModel):
+    """批量审核文章：按ID列表和/或筛选条件选择文章，至少需要一个条件"""
+    action: ArticleModerationAction
+    ids: Optional[List[int]] = Field(None, max_length=1000)
+    author_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
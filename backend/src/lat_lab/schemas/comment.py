@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from enum import Enum
 
 class CommentBase(BaseModel):
     content: str
@@ -27,4 +28,18 @@ class CommentUpdate(BaseModel):
     is_approved: Optional[bool] = None
 
 class CommentLike(BaseModel):
-    comment_id: int 
\ No newline at end of file
+    comment_id: int
+
+class CommentModerationAction(str, Enum):
+    approve = "approve"
+    reject = "reject"  # 取消审核通过，评论对读者隐藏
+    delete = "delete"
+
+class CommentBulkModeration(BaseModel):
+    """批量审核评论：按ID列表和/或筛选条件选择评论，至少需要一个条件"""
+    action: CommentModerationAction
+    ids: Optional[List[int]] = Field(None, max_length=1000)
+    user_id: Optional[int] = None
+    article_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
@@ -68,6 +68,25 @@ class Plugin(PluginBase):
     id: int
     creator_id: int
     is_active: bool
+    schedule: Optional[str] = None
+    last_run_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class PluginSummary(BaseModel):
+    """插件列表项（不包含代码）"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    version: Optional[str] = "0.1.0"
+    is_public: Optional[bool] = True
+    creator_id: int
+    is_active: bool
+    schedule: Optional[str] = None
+    last_run_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     
@@ -80,6 +99,33 @@ class PluginDetail(Plugin):
     class Config:
         from_attributes = True
 
+class PluginScheduleUpdate(BaseModel):
+    """定时执行设置，schedule为空表示取消定时执行"""
+    schedule: Optional[str] = Field(None, max_length=100, description="cron表达式，例如 */5 * * * *")
+    params: Optional[Dict[str, Any]] = None
+
+class PluginBatchRun(BaseModel):
+    """批量运行请求，每项为一组插件参数"""
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+
+class PluginScheduleStatus(BaseModel):
+    id: int
+    name: str
+    is_active: bool
+    schedule: Optional[str] = None
+    schedule_params: Dict[str, Any] = {}
+    last_run_at: Optional[datetime] = None
+    next_run_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    has_output: bool = False
+
+class PluginSchedulerStatus(BaseModel):
+    enabled: bool
+    running: bool
+    interval_seconds: int
+    last_tick: Optional[datetime] = None
+    plugins: List[PluginScheduleStatus] = []
+
 class PluginSearchQuery(BaseModel):
     query: Optional[str] = None
     category_id: Optional[int] = None
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+开发工具样式包服务
+将 dev_tools_config 编译为CSS和文本映射两个静态资源，按内容哈希生成URL，
+前端页面加载时无需解析配置JSON或查询数据库即可应用站点样式
+"""
+
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+from src.lat_lab.services.system_config import system_config_service
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+DEV_TOOLS_CONFIG_KEY = "dev_tools_config"
+
+# 对所有页面生效的配置：通用首页配置和 current（与前端加载器的应用顺序一致，后者优先）
+COMMON_PAGES = ['/', '/home', '/index']
+GLOBAL_PAGE = 'current'
+
+_CSS_VARIABLE_RE = re.compile(r'^--[A-Za-z0-9_-]+$')
+_CSS_PROPERTY_RE = re.compile(r'^-?[a-z][a-z-]*$')
+_IMPORTANT_RE = re.compile(r'\s*!\s*important\s*$', re.IGNORECASE)
+# 值和选择器中不允许出现可以跳出当前规则的字符
+_UNSAFE_CSS_CHARS = set('{}<>;\\\n\r')
+
+
+def _is_safe(value: Any) -> bool:
+    return isinstance(value, str) and value.strip() != "" and not (set(value) & _UNSAFE_CSS_CHARS)
+
+
+def _css_property(name: Any) -> Optional[str]:
+    """将前端使用的 element.style 属性名（驼峰）转换为CSS属性名"""
+    if not isinstance(name, str):
+        return None
+    prop = re.sub(r'([A-Z])', lambda m: '-' + m.group(1).lower(), name)
+    return prop if _CSS_PROPERTY_RE.match(prop) else None
+
+
+def _changed(items: Any, value_key: str) -> List[Dict[str, Any]]:
+    """只保留被修改过的配置项"""
+    if not isinstance(items, list):
+        return []
+    return [
+        item for item in items
+        if isinstance(item, dict) and item.get(value_key) != item.get("originalValue")
+    ]
+
+
+def compile_bundle(config: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    编译开发工具配置
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: (CSS文本, 文本映射)。页面专属的样式挂在
+        :root[data-dev-page="<路径>"] 下，文本映射按 global/pages 分组
+    """
+    page_data = config.get("page_data") or {}
+    if not isinstance(page_data, dict):
+        page_data = {}
+
+    scopes: List[Tuple[Optional[str], Dict[str, Any]]] = []
+    common_path = next((p for p in COMMON_PAGES if isinstance(page_data.get(p), dict)), None)
+    if common_path:
+        scopes.append((None, page_data[common_path]))
+    if isinstance(page_data.get(GLOBAL_PAGE), dict):
+        scopes.append((None, page_data[GLOBAL_PAGE]))
+    for path, page_config in page_data.items():
+        if path not in (GLOBAL_PAGE, common_path) and isinstance(page_config, dict):
+            scopes.append((path, page_config))
+
+    css_blocks: List[str] = []
+    texts: Dict[str, Any] = {"global": {}, "pages": {}}
+
+    for path, page_config in scopes:
+        root = ":root" if path is None else f":root[data-dev-page={json.dumps(path)}]"
+
+        variables = [
+            f"  {style['name']}: {style['value']};"
+            for style in _changed(page_config.get("styles"), "value")
+            if isinstance(style.get("name"), str) and _CSS_VARIABLE_RE.match(style["name"]) and _is_safe(style.get("value"))
+        ]
+        if variables:
+            css_blocks.append(root + " {\n" + "\n".join(variables) + "\n}")
+
+        for layout in _changed(page_config.get("layouts"), "currentValue"):
+            prop = _css_property(layout.get("property"))
+            selector = layout.get("selector")
+            value = layout.get("currentValue")
+            if not prop or not _is_safe(selector) or not _is_safe(str(value) if value is not None else None):
+                continue
+            scoped = ", ".join(f"{root} {part.strip()}" for part in selector.split(",") if part.strip())
+            # 布局修改原先以内联样式应用，加 !important 保持其优先于组件样式绑定和更具体的规则
+            value = _IMPORTANT_RE.sub("", str(value))
+            css_blocks.append(f"{scoped} {{ {prop}: {value} !important; }}")
+
+        page_texts = {
+            text["selector"]: text["currentValue"]
+            for text in _changed(page_config.get("texts"), "currentValue")
+            if isinstance(text.get("selector"), str) and isinstance(text.get("currentValue"), str)
+        }
+        if page_texts:
+            if path is None:
+                texts["global"].update(page_texts)
+            else:
+                texts["pages"].setdefault(path, {}).update(page_texts)
+
+    css = "/* LAT-LAB dev tools bundle */\n" + "\n".join(css_blocks) + "\n"
+    return css, texts
+
+
+class DevToolsBundleService:
+    """开发工具样式包服务"""
+
+    def __init__(self):
+        """初始化服务"""
+        self._bundle: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def get_bundle(self, db: Session) -> Dict[str, Any]:
+        """
+        获取当前样式包
+
+        配置版本未变化时直接返回已编译的结果（配置版本由系统配置服务跨进程维护）
+        """
+        config = system_config_service.get_config(db, DEV_TOOLS_CONFIG_KEY)
+        bundle = self._bundle
+        if bundle is not None and bundle["config_version"] == system_config_service.version:
+            return bundle
+        return self.rebuild(db, config)
+
+    def rebuild(self, db: Session, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """重新编译样式包（开发工具配置更新后调用）"""
+        if config is None:
+            config = system_config_service.get_config(db, DEV_TOOLS_CONFIG_KEY)
+        version = system_config_service.version
+
+        css, texts = compile_bundle(config or {})
+        css_bytes = css.encode("utf-8")
+        texts_bytes = json.dumps(texts, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        content_hash = hashlib.sha256(css_bytes + b"\0" + texts_bytes).hexdigest()[:16]
+
+        bundle = {
+            "config_version": version,
+            "hash": content_hash,
+            "css": css_bytes,
+            "texts": texts_bytes,
+        }
+        with self._lock:
+            self._bundle = bundle
+        logger.info(f"开发工具样式包已重建: {content_hash}")
+        return bundle
+
+
+# 创建服务实例
+dev_tools_bundle_service = DevToolsBundleService()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+邮件发件箱投递服务
+需要发送的邮件先写入发件箱表，后台线程批量取出到期的邮件，
+每批复用一个已登录的SMTP连接发送；失败的邮件按指数退避重试，超过次数后标记为失败。
+多个worker同时运行时通过条件更新抢占邮件，每封邮件发送前续期租约，避免重复发送；
+无法连接SMTP服务器时邮件退回队列等待，不计入发送次数
+"""
+
+import json
+import smtplib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from src.lat_lab.core.config import settings
+from src.lat_lab.core.database import SessionLocal
+from src.lat_lab.core.email import (
+    EMAIL_TEMPLATES, build_message, close_smtp_connection, open_smtp_connection,
+    render_email, verification_context
+)
+from src.lat_lab.models.email_outbox import EmailOutbox
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 保存的错误信息最大长度
+MAX_ERROR_LENGTH = 500
+
+
+class EmailOutboxService:
+    """邮件发件箱投递服务"""
+
+    def __init__(self, smtp_factory: Callable[[], smtplib.SMTP] = open_smtp_connection):
+        """
+        初始化服务
+
+        Args:
+            smtp_factory: 创建已登录SMTP连接的函数（测试时可以连接本地SMTP替身）
+        """
+        self.smtp_factory = smtp_factory
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        # 连续无法连接SMTP服务器的次数，用于计算退回队列的等待时间
+        self._connect_failures = 0
+
+    @property
+    def is_running(self) -> bool:
+        """投递线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台投递线程"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="email-outbox", daemon=True)
+        self._thread.start()
+        logger.info(f"邮件投递线程已启动，检查间隔 {settings.EMAIL_OUTBOX_INTERVAL_SECONDS} 秒")
+
+    def stop(self, timeout: float = 5.0):
+        """停止后台投递线程（未发送的邮件保留在发件箱中）"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info("邮件投递线程已停止")
+
+    def wake(self):
+        """有新邮件时唤醒投递线程，不必等待下一次检查"""
+        self._wake_event.set()
+
+    def _loop(self):
+        """投递循环"""
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            try:
+                # 一批发满时说明可能还有积压，立即继续
+                if self.deliver_batch() >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+                    continue
+            except Exception as e:
+                logger.error(f"邮件投递异常: {str(e)}")
+            self._wake_event.wait(settings.EMAIL_OUTBOX_INTERVAL_SECONDS)
+
+    def enqueue(self, db: Session, to_email: str, template: str, context: Dict[str, Any]) -> EmailOutbox:
+        """
+        把邮件写入发件箱
+
+        Args:
+            db: 数据库会话
+            to_email: 收件人
+            template: 邮件模板名称
+            context: 模板参数
+
+        Returns:
+            EmailOutbox: 发件箱记录
+        """
+        if template not in EMAIL_TEMPLATES:
+            raise ValueError(f"未知的邮件模板: {template}")
+
+        message = EmailOutbox(
+            to_email=to_email,
+            template=template,
+            context=json.dumps(context, ensure_ascii=False),
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.add(message)
+        db.commit()
+        db.refresh(message)
+        self.wake()
+        return message
+
+    def enqueue_verification(self, db: Session, email: str, username: str, token: str) -> EmailOutbox:
+        """把验证邮件写入发件箱"""
+        return self.enqueue(db, email, "verification", verification_context(username, token))
+
+    def _claim(self, db: Session, now: datetime) -> List[EmailOutbox]:
+        """抢占一批到期的邮件（包括发送租约已过期的邮件）"""
+        lease_cutoff = now - timedelta(seconds=settings.EMAIL_SEND_LEASE_SECONDS)
+        candidates = db.query(EmailOutbox.id, EmailOutbox.status, EmailOutbox.next_attempt_at).filter(
+            or_(
+                and_(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now),
+                and_(EmailOutbox.status == "sending", EmailOutbox.next_attempt_at <= lease_cutoff)
+            )
+        ).order_by(EmailOutbox.next_attempt_at).limit(settings.EMAIL_OUTBOX_BATCH_SIZE).all()
+
+        claimed_ids = []
+        for message_id, status, next_attempt_at in candidates:
+            # 发送中的邮件以 next_attempt_at 记录抢占时间，作为租约起点
+            updated = db.query(EmailOutbox).filter(
+                EmailOutbox.id == message_id,
+                EmailOutbox.status == status,
+                EmailOutbox.next_attempt_at == next_attempt_at
+            ).update({EmailOutbox.status: "sending", EmailOutbox.next_attempt_at: now}, synchronize_session=False)
+            if updated == 1:
+                claimed_ids.append(message_id)
+        db.commit()
+
+        if not claimed_ids:
+            return []
+        return db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed_ids)).order_by(EmailOutbox.id).all()
+
+    def _renew_lease(self, db: Session, message: EmailOutbox) -> bool:
+        """
+        发送前续期租约，避免发送较慢的一批邮件被其他worker当作过期邮件重新抢占
+
+        Returns:
+            bool: False 表示租约已过期并被其他worker抢占，不应再发送
+        """
+        updated = db.query(EmailOutbox).filter(
+            EmailOutbox.id == message.id,
+            EmailOutbox.status == "sending",
+            EmailOutbox.next_attempt_at == message.next_attempt_at
+        ).update({EmailOutbox.next_attempt_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return updated == 1
+
+    def _release(self, db: Session, messages: List[EmailOutbox], error: str):
+        """无法连接SMTP服务器时把邮件退回队列，不计入发送次数"""
+        self._connect_failures += 1
+        delay = min(
+            settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (self._connect_failures - 1),
+            settings.EMAIL_RETRY_MAX_SECONDS
+        )
+        next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        for message in messages:
+            db.query(EmailOutbox).filter(
+                EmailOutbox.id == message.id,
+                EmailOutbox.status == "sending",
+                EmailOutbox.next_attempt_at == message.next_attempt_at
+            ).update({
+                EmailOutbox.status: "pending",
+                EmailOutbox.next_attempt_at: next_attempt_at,
+                EmailOutbox.last_error: error[:MAX_ERROR_LENGTH]
+            }, synchronize_session=False)
+        db.commit()
+        logger.warning(f"无法连接SMTP服务器，{len(messages)} 封邮件 {delay} 秒后重试: {error}")
+
+    @staticmethod
+    def _schedule_retry(message: EmailOutbox, error: str, permanent: bool = False):
+        """记录失败并安排重试，超过次数或无法重试的错误标记为失败"""
+        message.attempts += 1
+        message.last_error = error[:MAX_ERROR_LENGTH]
+        if permanent or message.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            message.status = "failed"
+            logger.error(f"邮件 {message.id} 发送失败，不再重试: {error}")
+            return
+        delay = min(settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (message.attempts - 1), settings.EMAIL_RETRY_MAX_SECONDS)
+        message.status = "pending"
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"邮件 {message.id} 发送失败，{delay} 秒后重试: {error}")
+
+    def deliver_batch(self) -> int:
+        """
+        发送一批到期的邮件
+
+        Returns:
+            int: 本批抢占的邮件数量（无法连接SMTP服务器时返回0，等待下一次检查）
+        """
+        db = SessionLocal()
+        try:
+            messages = self._claim(db, datetime.utcnow())
+            if not messages:
+                return 0
+
+            try:
+                server = self.smtp_factory()
+            except Exception as e:
+                self._release(db, messages, f"SMTP连接失败: {str(e)}")
+                return 0
+            self._connect_failures = 0
+
+            sent = 0
+            try:
+                for index, message in enumerate(messages):
+                    if not self._renew_lease(db, message):
+                        logger.warning(f"邮件 {message.id} 的发送租约已被其他进程抢占，跳过")
+                        continue
+                    try:
+                        subject, html_content = render_email(message.template, json.loads(message.context))
+                        mime = build_message(message.to_email, subject, html_content)
+                        try:
+                            server.send_message(mime)
+                        except smtplib.SMTPServerDisconnected:
+                            # 服务器关闭了连接，重新连接后再试一次
+                            close_smtp_connection(server)
+                            server = None
+                            try:
+                                server = self.smtp_factory()
+                            except Exception as e:
+                                self._release(db, messages[index:], f"SMTP连接失败: {str(e)}")
+                                break
+                            server.send_message(mime)
+                        message.status = "sent"
+                        message.attempts += 1
+                        message.sent_at = datetime.utcnow()
+                        message.last_error = None
+                        sent += 1
+                    except (smtplib.SMTPRecipientsRefused, KeyError, ValueError) as e:
+                        # 收件人被拒绝或模板参数错误，重试也不会成功
+                        self._schedule_retry(message, str(e), permanent=True)
+                    except Exception as e:
+                        self._schedule_retry(message, str(e))
+                    # 逐封提交，进程中途退出时已发送的邮件不会被重复发送
+                    db.commit()
+            finally:
+                if server is not None:
+                    close_smtp_connection(server)
+
+            logger.info(f"邮件投递完成：成功 {sent} 封，共 {len(messages)} 封")
+            return len(messages)
+        finally:
+            db.close()
+
+    def get_stats(self, db: Session) -> Dict[str, int]:
+        """按状态统计发件箱中的邮件数量"""
+        rows = db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all()
+        return {status: count for status, count in rows}
+
+
+# 创建服务实例
+email_outbox_service = EmailOutboxService()
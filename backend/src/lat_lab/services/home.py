@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+首页数据服务
+首页首屏需要的文章、标签、分类、关于博主、博主信息和小部件由一个接口一次返回。
+各部分分别以编码后的JSON缓存一段时间，未命中的部分在线程池中并发查询（各自使用独立的数据库会话）
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.lat_lab.core.config import settings
+from src.lat_lab.core.database import SessionLocal
+from src.lat_lab.crud.article import get_articles
+from src.lat_lab.crud.category import get_categories
+from src.lat_lab.models.tag import Tag as TagModel
+from src.lat_lab.models.user import User
+from src.lat_lab.schemas.article import Article, Category
+from src.lat_lab.services.system_config import system_config_service
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+_articles_adapter = TypeAdapter(List[Article])
+_categories_adapter = TypeAdapter(List[Category])
+
+# 首页响应中各部分的顺序
+HOME_SECTIONS = ("articles", "categories", "tags", "about", "blog_owner", "widgets")
+
+
+def get_blog_owner(db: Session) -> Dict[str, Any]:
+    """获取博主信息（第一个用户），没有用户时返回默认信息"""
+    first_user = db.query(User).order_by(User.id).first()
+    if first_user:
+        return {
+            "id": first_user.id,
+            "username": first_user.username,
+            "avatar": first_user.avatar,
+            "bio": first_user.bio
+        }
+    return {
+        "id": None,
+        "username": "LAT-Lab",
+        "avatar": None,
+        "bio": None
+    }
+
+
+def list_home_widgets(db: Session) -> List[Dict[str, Any]]:
+    """获取首页小部件列表（插件暂未提供小部件配置）"""
+    return []
+
+
+class HomeService:
+    """首页数据服务"""
+
+    def __init__(self):
+        """初始化服务"""
+        # 缓存键 -> (过期时间, 编码后的JSON)
+        self._cache: "OrderedDict[Tuple, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """清除首页缓存（文章、分类、标签、博主信息等变化后调用）"""
+        with self._lock:
+            self._cache.clear()
+
+    def _cache_get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _cache_set(self, key: Tuple, body: bytes):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + settings.HOME_CACHE_TTL_SECONDS, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > settings.HOME_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _load(loader: Callable[[Session], bytes]) -> bytes:
+        """在独立的数据库会话中加载并编码一部分数据（运行在线程池中）"""
+        db = SessionLocal()
+        try:
+            return loader(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _encode_articles(db: Session, params: Dict[str, Any], current_user_id: Optional[int]) -> bytes:
+        articles = get_articles(
+            db,
+            skip=params["skip"],
+            limit=params["limit"],
+            category_id=params["category_id"],
+            tag_name=params["tag"],
+            search_query=params["search"],
+            current_user_id=current_user_id
+        )
+        return _articles_adapter.dump_json(_articles_adapter.validate_python(articles, from_attributes=True))
+
+    @staticmethod
+    def _encode_categories(db: Session) -> bytes:
+        categories = get_categories(db)
+        return _categories_adapter.dump_json(_categories_adapter.validate_python(categories, from_attributes=True))
+
+    @staticmethod
+    def _encode_tags(db: Session) -> bytes:
+        tags = db.query(TagModel.id, TagModel.name).order_by(TagModel.id).all()
+        return json.dumps([{"id": tag_id, "name": name} for tag_id, name in tags], ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _encode_about(db: Session) -> bytes:
+        return json.dumps(system_config_service.get_about_section(db), ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _encode_blog_owner(db: Session) -> bytes:
+        return json.dumps(get_blog_owner(db), ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _encode_widgets(db: Session) -> bytes:
+        return json.dumps(list_home_widgets(db), ensure_ascii=False).encode("utf-8")
+
+    async def get_home(self, params: Dict[str, Any], current_user_id: Optional[int] = None) -> Tuple[bytes, str]:
+        """
+        获取首页数据
+
+        Args:
+            params: 文章列表参数（skip、limit、category_id、tag、search）
+            current_user_id: 当前登录用户ID，登录用户可以看到自己的私有文章，文章列表不缓存
+
+        Returns:
+            Tuple[bytes, str]: (编码后的JSON, 由各部分内容组合而成的ETag)
+        """
+        article_key = ("articles",) + tuple(params[k] for k in ("skip", "limit", "category_id", "tag", "search"))
+        loaders: Dict[str, Tuple[Optional[Tuple], Callable[[Session], bytes]]] = {
+            "articles": (
+                None if current_user_id else article_key,
+                lambda db: self._encode_articles(db, params, current_user_id)
+            ),
+            "categories": (("categories",), self._encode_categories),
+            "tags": (("tags",), self._encode_tags),
+            "about": (("about",), self._encode_about),
+            "blog_owner": (("blog_owner",), self._encode_blog_owner),
+            "widgets": (("widgets",), self._encode_widgets),
+        }
+
+        sections: Dict[str, bytes] = {}
+        pending: List[str] = []
+        for name in HOME_SECTIONS:
+            key = loaders[name][0]
+            cached = self._cache_get(key) if key is not None else None
+            if cached is None:
+                pending.append(name)
+            else:
+                sections[name] = cached
+
+        if pending:
+            results = await asyncio.gather(*(run_in_threadpool(self._load, loaders[name][1]) for name in pending))
+            for name, body in zip(pending, results):
+                sections[name] = body
+                key = loaders[name][0]
+                if key is not None:
+                    self._cache_set(key, body)
+
+        body = b"{" + b",".join(
+            json.dumps(name).encode("utf-8") + b":" + sections[name] for name in HOME_SECTIONS
+        ) + b"}"
+
+        # 组合ETag：各部分内容哈希的哈希
+        digest = hashlib.sha256()
+        for name in HOME_SECTIONS:
+            digest.update(hashlib.sha256(sections[name]).digest())
+        etag = '"' + digest.hexdigest()[:32] + '"'
+
+        return body, etag
+
+
+# 创建服务实例
+home_service = HomeService()
+
+
+def invalidate_home_cache():
+    """清除首页缓存"""
+    home_service.invalidate()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片变体生成服务
+上传的图片保存后，在进程池中生成缩略图、中等尺寸和WebP版本，保存在原图旁边，
+前端可以据此使用 srcset 按需加载合适尺寸的图片
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from src.lat_lab.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 未安装时只保存原图
+    Image = None
+    ImageOps = None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 变体名称 -> (最长边像素, 输出格式，None表示与原图相同)
+IMAGE_VARIANTS: Dict[str, Tuple[int, Optional[str]]] = {
+    "thumb": (320, None),
+    "medium": (1024, None),
+    "webp": (1024, "WEBP"),
+}
+
+# 输出格式 -> 扩展名
+_FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+# 原图扩展名 -> 与原图格式相同的变体的输出格式（与 _output_format 一致）
+_SOURCE_FORMATS = {".jpg": "JPEG", ".webp": "WEBP"}
+
+
+def variant_filename(filename: str, variant: str, fmt: str) -> str:
+    """生成变体文件名，例如 abc.jpg -> abc_thumb.jpg"""
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{variant}{_FORMAT_EXTENSIONS[fmt]}"
+
+
+def expected_variants(filename: str) -> Dict[str, str]:
+    """根据原图文件名推算各变体的文件名"""
+    source_format = _SOURCE_FORMATS.get(os.path.splitext(filename)[1].lower(), "PNG")
+    return {
+        variant: variant_filename(filename, variant, variant_format or source_format)
+        for variant, (_, variant_format) in IMAGE_VARIANTS.items()
+    }
+
+
+def _output_format(image, variant_format: Optional[str]) -> str:
+    if variant_format:
+        return variant_format
+    if image.format == "JPEG":
+        return "JPEG"
+    if image.format == "WEBP":
+        return "WEBP"
+    # PNG、GIF（取第一帧）输出为PNG以保留透明度
+    return "PNG"
+
+
+def generate_variants(source_path: str) -> Dict[str, str]:
+    """
+    生成图片变体（在工作进程中运行）
+
+    Returns:
+        Dict[str, str]: 变体名称到文件名的映射
+    """
+    directory, filename = os.path.split(source_path)
+    results: Dict[str, str] = {}
+
+    with Image.open(source_path) as original:
+        source_format = original.format
+        # 按EXIF方向信息旋转（手机照片）
+        image = ImageOps.exif_transpose(original)
+        image.format = source_format
+
+        for variant, (max_side, variant_format) in IMAGE_VARIANTS.items():
+            fmt = _output_format(image, variant_format)
+            resized = image.copy()
+            resized.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            if fmt == "JPEG" and resized.mode not in ("RGB", "L"):
+                resized = resized.convert("RGB")
+            elif resized.mode == "P":
+                resized = resized.convert("RGBA")
+
+            save_kwargs = {
+                "JPEG": {"quality": 82, "optimize": True, "progressive": True},
+                "PNG": {"optimize": True},
+                "WEBP": {"quality": 80, "method": 4},
+            }[fmt]
+
+            name = variant_filename(filename, variant, fmt)
+            tmp_path = os.path.join(directory, f".{name}.part")
+            try:
+                resized.save(tmp_path, fmt, **save_kwargs)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, os.path.join(directory, name))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            results[variant] = name
+
+    return results
+
+
+class ImageVariantService:
+    """图片变体生成服务"""
+
+    def __init__(self):
+        """初始化服务"""
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """是否可以生成变体（需要安装Pillow）"""
+        return settings.IMAGE_VARIANTS_ENABLED and Image is not None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=settings.IMAGE_VARIANT_WORKERS)
+            return self._executor
+
+    async def create_variants(self, source_path: str) -> Dict[str, str]:
+        """
+        为上传的图片生成变体
+
+        生成在进程池中进行，不占用事件循环；超时或失败时返回空结果，
+        原图仍然可用（超时的任务会在后台继续完成）
+
+        Returns:
+            Dict[str, str]: 变体名称到文件名的映射
+        """
+        # 相同内容的图片之前已经生成过变体
+        directory, filename = os.path.split(str(source_path))
+        expected = expected_variants(filename)
+        if all(os.path.exists(os.path.join(directory, name)) for name in expected.values()):
+            return expected
+
+        if not self.available:
+            return {}
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._get_executor(), generate_variants, str(source_path))
+            # 超时后任务仍在后台运行，这里取走其结果避免未处理异常的警告
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return await asyncio.wait_for(asyncio.shield(future), settings.IMAGE_VARIANT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"生成图片变体超时: {os.path.basename(str(source_path))}")
+        except BrokenProcessPool:
+            # 工作进程异常退出（例如内存不足被杀），下次使用时重建进程池
+            logger.error("图片处理进程池已损坏，将重新创建")
+            self.shutdown()
+        except Exception as e:
+            logger.warning(f"生成图片变体失败: {os.path.basename(str(source_path))}: {e}")
+        return {}
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+# 创建服务实例
+image_variant_service = ImageVariantService()
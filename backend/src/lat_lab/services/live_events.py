@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章实时事件服务
+按文章推送新评论、评论审核通过和点赞数变化等增量事件（Server-Sent Events），
+读者不必刷新页面或重新获取整个评论树。
+
+事件先交给代理（broker）再分发给本进程中订阅该文章的连接：默认的本地代理直接分发，
+多worker部署时可以替换为跨进程的代理（例如基于Redis发布订阅），由其在每个进程中调用分发函数。
+每个连接有独立的有界队列，消费过慢的连接会收到 resync 事件后被断开，不会拖慢发布者或其他连接
+"""
+
+import json
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+
+from src.lat_lab.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 队列积压过多时发给客户端的事件，客户端应重新获取评论后重连
+RESYNC_EVENT = "event: resync\ndata: {}\n\n"
+
+
+def format_event(event_type: str, data: Dict[str, Any]) -> str:
+    """把事件编码为SSE消息"""
+    payload = json.dumps(data, ensure_ascii=False, default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o))
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+class Broker:
+    """事件代理基类，负责把事件送到所有进程"""
+
+    def start(self, deliver: Callable[[int, str], None]):
+        """
+        开始接收事件
+
+        Args:
+            deliver: 本进程的分发函数，参数为文章ID和编码后的SSE消息
+        """
+        raise NotImplementedError
+
+    def publish(self, article_id: int, message: str):
+        """发布事件"""
+        raise NotImplementedError
+
+    def stop(self):
+        """停止接收事件"""
+
+
+class LocalBroker(Broker):
+    """进程内代理，只分发给当前进程的连接（单进程部署或开发环境）"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[int, str], None]] = None
+
+    def start(self, deliver: Callable[[int, str], None]):
+        self._deliver = deliver
+
+    def publish(self, article_id: int, message: str):
+        if self._deliver is not None:
+            self._deliver(article_id, message)
+
+    def stop(self):
+        self._deliver = None
+
+
+class Subscription:
+    """一个SSE连接的订阅，队列只在所属的事件循环中读写"""
+
+    def __init__(self, article_id: int, loop: asyncio.AbstractEventLoop):
+        self.article_id = article_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, settings.LIVE_EVENTS_QUEUE_SIZE))
+        self.overflowed = False
+
+    def offer(self, message: Optional[str]):
+        """放入一条消息（None 表示关闭连接），队列已满时丢弃积压并通知客户端重新同步"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+            self.queue.put_nowait(None)
+
+
+class LiveEventHub:
+    """按文章分组的事件订阅中心"""
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped = 0
+        self._broker = broker or LocalBroker()
+        self._broker.start(self._deliver)
+
+    @property
+    def is_full(self) -> bool:
+        """连接数是否已达上限"""
+        return self._count >= settings.LIVE_EVENTS_MAX_SUBSCRIBERS
+
+    def set_broker(self, broker: Broker):
+        """替换事件代理（例如多worker部署时使用跨进程代理）"""
+        self._broker.stop()
+        self._broker = broker
+        self._broker.start(self._deliver)
+
+    def subscribe(self, article_id: int) -> Optional[Subscription]:
+        """
+        订阅文章的事件（需要在事件循环中调用）
+
+        Returns:
+            Optional[Subscription]: 订阅，连接数已达上限时返回None
+        """
+        subscription = Subscription(article_id, asyncio.get_running_loop())
+        with self._lock:
+            if self._count >= settings.LIVE_EVENTS_MAX_SUBSCRIBERS:
+                return None
+            self._subscribers.setdefault(article_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """取消订阅"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.article_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.article_id]
+            self._count -= 1
+            if subscription.overflowed:
+                self._dropped += 1
+
+    def publish(self, article_id: int, event_type: str, data: Dict[str, Any]):
+        """发布文章事件（可以在任意线程中调用，不会阻塞）"""
+        if not settings.LIVE_EVENTS_ENABLED:
+            return
+        try:
+            self._broker.publish(article_id, format_event(event_type, data))
+        except Exception as e:
+            # 实时事件只是增量通知，发布失败不影响请求本身
+            logger.error(f"发布实时事件失败: {str(e)}")
+
+    def _deliver(self, article_id: int, message: str):
+        """把消息分发给本进程中订阅该文章的连接"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(article_id, ()))
+            self._published += 1
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.unsubscribe(subscription)
+
+    def close_all(self):
+        """关闭所有连接（应用关闭时调用）"""
+        with self._lock:
+            subscribers = [s for group in self._subscribers.values() for s in group]
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, None)
+            except RuntimeError:
+                pass
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取订阅统计"""
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "articles": len(self._subscribers),
+                "published": self._published,
+                "dropped_slow_consumers": self._dropped,
+            }
+
+
+def comment_event_data(comment, user=None) -> Dict[str, Any]:
+    """评论事件的数据（不包含评论者邮箱等非公开信息），user 为空时使用评论关联的用户"""
+    user = user or comment.user
+    return {
+        "id": comment.id,
+        "content": comment.content,
+        "article_id": comment.article_id,
+        "parent_id": comment.parent_id,
+        "user_id": comment.user_id,
+        "likes": comment.likes or 0,
+        "is_approved": comment.is_approved,
+        "created_at": comment.created_at,
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "role": user.role,
+        },
+        "replies": [],
+    }
+
+
+# 创建服务实例
+live_event_hub = LiveEventHub()
@@ -10,14 +10,25 @@ import json
 import time
 import logging
 import requests
+import requests.adapters
 import re
-from typing import Dict, List, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 from src.lat_lab.core.config import settings
 from src.lat_lab.utils.config_loader import config_loader
+from src.lat_lab.utils.http_cache import make_etag
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 插件列表支持的排序字段
+MARKETPLACE_SORT_FIELDS = {"name", "downloads", "rating", "created_at", "updated_at"}
+
+# 刷新失败后再次尝试前的最短间隔（秒），不超过缓存有效期
+MARKETPLACE_RETRY_INTERVAL = 30
+
 class MarketplaceService:
     """插件市场服务类"""
     
@@ -26,6 +37,20 @@ class MarketplaceService:
         self.cache = {}
         self.cache_time = 0
         self.cache_ttl = settings.PLUGIN_MARKETPLACE_CACHE_TTL
+        self._session: Optional[requests.Session] = None
+        self._index: Optional[Dict[str, Any]] = None
+        # 保证同一时间只有一个刷新任务
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self.last_error: Optional[str] = None
+        # 最近一次刷新失败的时间，用于失败后退避，避免每次读取都重新加载
+        self._last_failure = 0.0
+        # 数据版本号，每次加载新数据时递增；各视图预编码的JSON按版本失效
+        self.data_version = 0
+        # (版本号, 数据)，作为一个元组整体替换，读取方不会拿到不匹配的版本和数据
+        self._snapshot: Tuple[int, Dict[str, Any]] = (0, self.cache)
+        self._snapshot_lock = threading.Lock()
+        self._encoded: Dict[str, Tuple[int, bytes, str]] = {}
         
         # 记录初始化时的路径信息
         logger.info(f"插件市场服务初始化")
@@ -37,37 +62,164 @@ class MarketplaceService:
         """
         获取插件市场数据
         
+        缓存过期时立即返回旧数据，并在后台刷新（同一时间只有一个刷新任务）；
+        尚无缓存或强制刷新时同步加载
+        
         Args:
             force_refresh: 是否强制刷新缓存
             
         Returns:
             Dict[str, Any]: 插件市场数据
         """
-        # 检查缓存是否有效
-        current_time = time.time()
-        if (not force_refresh and 
-            self.cache and 
-            current_time - self.cache_time < self.cache_ttl):
+        if force_refresh:
+            return self.refresh()
+        if not self.cache:
+            # 数据源不可用时，在重试间隔内直接返回空数据，不让每个请求都排队加载一次
+            if self._in_retry_backoff():
+                return self.cache
+            return self.refresh(wait_for_running=True)
+        
+        if time.time() - self.cache_time >= self.cache_ttl and not self._in_retry_backoff():
+            self.refresh_in_background()
+        else:
             logger.debug("使用缓存的插件市场数据")
-            return self.cache
+        return self.cache
+    
+    def refresh(self, wait_for_running: bool = False) -> Dict[str, Any]:
+        """
+        同步刷新插件市场数据
         
-        # 根据配置选择数据源
-        source = settings.PLUGIN_MARKETPLACE_SOURCE.lower()
+        Args:
+            wait_for_running: 已有刷新任务时是否直接等待其结果，而不是再次加载
+            
+        Returns:
+            Dict[str, Any]: 刷新后的数据，加载失败时返回原缓存
+        """
+        loaded_before = self.cache_time
+        with self._refresh_lock:
+            # 等待期间其他线程已经完成刷新
+            if wait_for_running and self.cache and self.cache_time != loaded_before:
+                return self.cache
+            # 等待期间的加载失败了，重试间隔内不再重复加载
+            if wait_for_running and self._in_retry_backoff():
+                return self.cache
+            return self._load()
+    
+    def _in_retry_backoff(self) -> bool:
+        """最近一次刷新失败后是否仍在重试间隔内"""
+        return time.time() - self._last_failure < min(self.cache_ttl, MARKETPLACE_RETRY_INTERVAL)
+    
+    def refresh_in_background(self) -> bool:
+        """
+        在后台线程中刷新插件市场数据
+        
+        Returns:
+            bool: 是否启动了新的刷新任务（已有刷新任务时返回False）
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
         
-        if source == "git":
-            data = self._get_data_from_git()
-        else:  # 默认使用本地文件
-            data = self._get_data_from_local()
+        def _run():
+            try:
+                self._load()
+            except Exception as e:
+                logger.error(f"后台刷新插件市场数据失败: {str(e)}")
+            finally:
+                self._refresh_lock.release()
         
-        # 更新缓存
-        if data:
-            self.cache = data
-            self.cache_time = current_time
-            logger.info(f"成功加载插件市场数据，共{len(data.get('plugins', []))}个插件")
+        try:
+            threading.Thread(target=_run, name="marketplace-refresh", daemon=True).start()
+        except Exception:
+            self._refresh_lock.release()
+            raise
+        return True
+    
+    def _load(self) -> Dict[str, Any]:
+        """从数据源加载数据并更新缓存（调用方需持有刷新锁）"""
+        self._refreshing = True
+        started = time.time()
+        try:
+            # 根据配置选择数据源
+            source = settings.PLUGIN_MARKETPLACE_SOURCE.lower()
+            
+            if source == "git":
+                data = self._get_data_from_git()
+            else:  # 默认使用本地文件
+                data = self._get_data_from_local()
+        except Exception:
+            self._last_failure = time.time()
+            raise
         else:
+            # 更新缓存
+            if data:
+                self._index = self._build_index(data)
+                self._set_data(data)
+                self.cache_time = time.time()
+                self.last_error = None
+                logger.info(f"成功加载插件市场数据，共{len(data.get('plugins', []))}个插件，耗时{time.time() - started:.2f}秒")
+                return data
+            
+            self.last_error = "加载插件市场数据失败"
+            self._last_failure = time.time()
             logger.error("加载插件市场数据失败")
+            # 加载失败时继续使用旧数据
+            return self.cache or data
+        finally:
+            self._refreshing = False
+    
+    def _set_data(self, data: Dict[str, Any]):
+        """替换市场数据并递增版本号，丢弃所有预编码的视图"""
+        with self._snapshot_lock:
+            self._snapshot = (self.data_version + 1, data)
+            self.data_version, self.cache = self._snapshot
+            self._encoded = {}
+    
+    def get_encoded(self, view: str, encoder: Callable[[Dict[str, Any]], Optional[bytes]]) -> Optional[Tuple[bytes, str]]:
+        """
+        获取某个视图预先编码的JSON及其ETag
+        
+        同一版本的数据只编码一次，之后的请求直接返回缓存的字节
+        
+        Args:
+            view: 视图名称，如 "info"、"plugin:<id>"
+            encoder: 根据市场数据生成JSON字节的函数，返回None表示视图不存在
+            
+        Returns:
+            Optional[Tuple[bytes, str]]: (JSON字节, ETag)，视图不存在时返回None
+        """
+        # 触发过期刷新后，从同一个快照中读取版本号和数据
+        self.get_marketplace_data()
+        version, data = self._snapshot
+        cached = self._encoded.get(view)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+        
+        body = encoder(data)
+        if body is None:
+            return None
+        etag = make_etag(body)
+        self._encoded[view] = (version, body, etag)
+        return body, etag
+    
+    def get_health(self) -> Dict[str, Any]:
+        """
+        获取插件市场缓存状态
         
-        return data
+        Returns:
+            Dict[str, Any]: 缓存是否已加载、缓存时长、是否过期、是否正在刷新等
+        """
+        loaded = bool(self.cache)
+        cache_age = round(time.time() - self.cache_time, 1) if loaded else None
+        return {
+            "source": settings.PLUGIN_MARKETPLACE_SOURCE,
+            "loaded": loaded,
+            "plugin_count": len(self.cache.get("plugins", [])) if loaded else 0,
+            "cache_age_seconds": cache_age,
+            "cache_ttl_seconds": self.cache_ttl,
+            "stale": loaded and cache_age >= self.cache_ttl,
+            "refreshing": self._refreshing,
+            "last_error": self.last_error,
+        }
     
     def _get_data_from_local(self) -> Dict[str, Any]:
         """从本地文件获取插件市场数据"""
@@ -239,7 +391,7 @@ class MarketplaceService:
                 repo_name = parts[-1]
                 
                 # 先获取仓库内容列表
-                api_url = f"https://api.github.com/repos/{owner}/{repo_name}/contents"
+                api_url = f"{settings.PLUGIN_MARKETPLACE_GITHUB_API.rstrip('/')}/repos/{owner}/{repo_name}/contents"
                 
                 # 设置请求头
                 headers = {
@@ -248,8 +400,19 @@ class MarketplaceService:
                 if token:
                     headers["Authorization"] = f"token {token}"
                 
-                # 发送请求获取仓库内容
-                response = requests.get(api_url, headers=headers, timeout=10)
+                # 上次成功拉取的结果，仓库变化后不再复用
+                git_cache = self._load_git_cache()
+                if git_cache.get("repo") != repo or git_cache.get("branch") != branch:
+                    git_cache = {"repo": repo, "branch": branch, "files": {}}
+                
+                # 发送条件请求获取仓库内容，未变化时只需一次304
+                listing_headers = dict(headers)
+                if git_cache.get("listing_etag") and git_cache.get("payload"):
+                    listing_headers["If-None-Match"] = git_cache["listing_etag"]
+                response = self._get_session().get(api_url, headers=listing_headers, timeout=10)
+                if response.status_code == 304:
+                    logger.info("Git仓库内容未变化，使用本地缓存的插件市场数据")
+                    return git_cache["payload"]
                 response.raise_for_status()
                 
                 # 解析仓库内容
@@ -263,43 +426,60 @@ class MarketplaceService:
                 
                 logger.info(f"在GitHub仓库中找到 {len(plugin_files)} 个插件文件")
                 
-                # 加载每个插件文件
+                # 并发加载插件文件，内容未变化（sha相同）的文件直接复用缓存
+                cached_files = git_cache.get("files", {})
+                fetched_files: Dict[str, Dict[str, Any]] = {}
+                workers = max(1, min(settings.PLUGIN_MARKETPLACE_GIT_MAX_WORKERS, len(plugin_files) or 1))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(self._fetch_git_file, plugin_file, headers, cached_files.get(plugin_file["name"])): plugin_file
+                        for plugin_file in plugin_files
+                    }
+                    for future in futures:
+                        plugin_file = futures[future]
+                        try:
+                            entry = future.result()
+                        except Exception as e:
+                            logger.error(f"加载插件文件 {plugin_file['name']} 失败: {str(e)}")
+                            continue
+                        fetched_files[plugin_file["name"]] = entry
+                
+                # 保持仓库列表中的顺序
                 for plugin_file in plugin_files:
-                    try:
-                        # 获取文件内容
-                        file_url = plugin_file["download_url"]
-                        file_response = requests.get(file_url, headers=headers, timeout=10)
-                        file_response.raise_for_status()
-                        
-                        # 解析插件数据
-                        plugin_data = file_response.json()
-                        
-                        # 验证插件数据格式
-                        if isinstance(plugin_data, dict) and "id" in plugin_data and "name" in plugin_data:
-                            # 添加到插件列表
-                            marketplace_data["plugins"].append(plugin_data)
-                            logger.info(f"加载了插件: {plugin_data.get('name')} (ID: {plugin_data.get('id')})")
-                        else:
-                            logger.warning(f"插件文件格式不正确: {plugin_file['name']}")
+                    entry = fetched_files.get(plugin_file["name"])
+                    if not entry:
+                        continue
+                    plugin_data = entry["data"]
                     
-                    except Exception as e:
-                        logger.error(f"加载插件文件 {plugin_file['name']} 失败: {str(e)}")
+                    # 验证插件数据格式
+                    if isinstance(plugin_data, dict) and "id" in plugin_data and "name" in plugin_data:
+                        # 添加到插件列表
+                        marketplace_data["plugins"].append(plugin_data)
+                        logger.debug(f"加载了插件: {plugin_data.get('name')} (ID: {plugin_data.get('id')})")
+                    else:
+                        logger.warning(f"插件文件格式不正确: {plugin_file['name']}")
                 
                 # 如果没有找到单独的插件文件，尝试查找marketplace_config.json
                 if not marketplace_data["plugins"]:
                     try:
                         config_url = f"https://raw.githubusercontent.com/{owner}/{repo_name}/{branch}/marketplace_config.json"
-                        config_response = requests.get(config_url, headers=headers, timeout=10)
-                        config_response.raise_for_status()
+                        config_entry = self._fetch_json(config_url, headers, git_cache.get("config"))
                         
-                        config_data = config_response.json()
+                        config_data = config_entry["data"]
                         if "plugins" in config_data:
                             logger.info(f"从marketplace_config.json加载了 {len(config_data['plugins'])} 个插件")
-                            return config_data
+                            git_cache["config"] = config_entry
+                            marketplace_data = config_data
                     
                     except Exception as e:
                         logger.error(f"加载marketplace_config.json失败: {str(e)}")
                 
+                # 保存本次成功的结果，供下次条件请求和上游故障时使用
+                git_cache["listing_etag"] = response.headers.get("ETag")
+                git_cache["files"] = fetched_files
+                git_cache["payload"] = marketplace_data
+                self._save_git_cache(git_cache)
+                
                 # 返回收集到的插件数据
                 logger.info(f"从GitHub仓库加载了 {len(marketplace_data['plugins'])} 个插件")
                 return marketplace_data
@@ -312,20 +492,143 @@ class MarketplaceService:
             logger.error(f"从Git仓库加载插件市场数据失败: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
+            
+            # 上游不可用时退回到最近一次成功拉取的数据
+            git_cache = self._load_git_cache()
+            if git_cache.get("repo") == settings.PLUGIN_MARKETPLACE_GIT_REPO.lstrip('@') and git_cache.get("payload"):
+                logger.warning("使用本地缓存的Git插件市场数据")
+                return git_cache["payload"]
+            return {}
+    
+    def _get_session(self) -> requests.Session:
+        """获取共享的HTTP会话（复用连接）"""
+        if self._session is None:
+            session = requests.Session()
+            pool_size = max(1, settings.PLUGIN_MARKETPLACE_GIT_MAX_WORKERS)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+    
+    def _fetch_json(self, url: str, headers: Dict[str, str], cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        条件请求JSON文件
+        
+        Returns:
+            Dict[str, Any]: 包含 data 和 etag 的缓存条目，未变化时返回原缓存条目
+        """
+        request_headers = dict(headers)
+        if cached and cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        
+        response = self._get_session().get(url, headers=request_headers, timeout=10)
+        if response.status_code == 304 and cached:
+            return cached
+        response.raise_for_status()
+        return {"etag": response.headers.get("ETag"), "data": response.json()}
+    
+    def _fetch_git_file(self, plugin_file: Dict[str, Any], headers: Dict[str, str],
+                        cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """获取单个插件文件，sha未变化时不发请求"""
+        sha = plugin_file.get("sha")
+        if cached and sha and cached.get("sha") == sha:
+            return cached
+        
+        entry = self._fetch_json(plugin_file["download_url"], headers, cached)
+        return {**entry, "sha": sha}
+    
+    def _load_git_cache(self) -> Dict[str, Any]:
+        """读取Git数据源的本地缓存"""
+        try:
+            with open(settings.PLUGIN_MARKETPLACE_GIT_CACHE_PATH, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
             return {}
     
+    def _save_git_cache(self, data: Dict[str, Any]):
+        """写入Git数据源的本地缓存（先写临时文件再替换）"""
+        cache_path = str(settings.PLUGIN_MARKETPLACE_GIT_CACHE_PATH)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"保存Git插件市场缓存失败: {str(e)}")
+    
+    def _get_index(self) -> Dict[str, Any]:
+        """获取与当前缓存对应的索引，缓存被替换后重新构建"""
+        index = self._index
+        if index is None or index["source"] is not self.cache:
+            index = self._build_index(self.cache)
+            self._index = index
+        return index
+    
+    def _build_index(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        为插件列表构建查询索引
+        
+        插件以其在列表中的位置表示，筛选条件转化为位置集合的交集；
+        搜索使用名称和描述的二元字符组索引缩小候选范围后再做子串校验
+        """
+        plugins = data.get("plugins", []) if data else []
+        by_id: Dict[str, Dict[str, Any]] = {}
+        by_category: Dict[Any, Set[int]] = defaultdict(set)
+        by_tag: Dict[str, Set[int]] = defaultdict(set)
+        by_featured: Dict[Any, Set[int]] = defaultdict(set)
+        by_bigram: Dict[str, Set[int]] = defaultdict(set)
+        search_fields: List[tuple] = []
+        
+        for position, plugin in enumerate(plugins):
+            plugin_id = plugin.get("id")
+            if plugin_id is not None and plugin_id not in by_id:
+                by_id[plugin_id] = plugin
+            by_category[plugin.get("category_id")].add(position)
+            for tag in plugin.get("tags", []) or []:
+                by_tag[tag].add(position)
+            by_featured[plugin.get("featured")].add(position)
+            
+            # 名称和描述分别检索，与原先的子串匹配规则一致
+            name = (plugin.get("name") or "").lower()
+            description = (plugin.get("description") or "").lower()
+            search_fields.append((name, description))
+            for text in (name, description):
+                for i in range(len(text) - 1):
+                    by_bigram[text[i:i + 2]].add(position)
+        
+        return {
+            "source": data,
+            "plugins": plugins,
+            "by_id": by_id,
+            "by_category": dict(by_category),
+            "by_tag": dict(by_tag),
+            "by_featured": dict(by_featured),
+            "by_bigram": dict(by_bigram),
+            "search_fields": search_fields,
+        }
+    
     def get_plugins(self, category_id: Optional[int] = None, 
                    tags: Optional[List[str]] = None,
                    search_term: Optional[str] = None,
-                   featured: Optional[bool] = None) -> List[Dict[str, Any]]:
+                   featured: Optional[bool] = None,
+                   sort_by: Optional[str] = None,
+                   descending: bool = False,
+                   skip: int = 0,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         获取插件列表，支持筛选
         
         Args:
             category_id: 分类ID
-            tags: 标签列表
+            tags: 标签列表（满足任一标签即可）
             search_term: 搜索关键词
             featured: 是否精选
+            sort_by: 排序字段（name、downloads、rating、created_at、updated_at），默认保持市场配置中的顺序
+            descending: 是否降序
+            skip: 跳过的数量
+            limit: 返回的最大数量
             
         Returns:
             List[Dict[str, Any]]: 插件列表
@@ -335,27 +638,60 @@ class MarketplaceService:
             logger.warning("未找到插件数据或格式不正确")
             return []
         
-        plugins = data["plugins"]
-        logger.debug(f"筛选前插件数量: {len(plugins)}")
+        index = self._get_index()
+        plugins = index["plugins"]
+        candidates: Optional[Set[int]] = None
+        
+        def narrow(positions: Set[int]):
+            nonlocal candidates
+            candidates = set(positions) if candidates is None else candidates & positions
         
         # 应用筛选
         if category_id is not None:
-            plugins = [p for p in plugins if p.get("category_id") == category_id]
+            narrow(index["by_category"].get(category_id, set()))
         
         if tags:
-            plugins = [p for p in plugins if any(tag in p.get("tags", []) for tag in tags)]
+            matched: Set[int] = set()
+            for tag in tags:
+                matched |= index["by_tag"].get(tag, set())
+            narrow(matched)
         
         if featured is not None:
-            plugins = [p for p in plugins if p.get("featured") == featured]
+            narrow(index["by_featured"].get(featured, set()))
         
         if search_term:
             search_term = search_term.lower()
-            plugins = [p for p in plugins if 
-                      search_term in p.get("name", "").lower() or 
-                      search_term in p.get("description", "").lower()]
+            if len(search_term) >= 2:
+                # 用二元字符组缩小候选范围
+                for i in range(len(search_term) - 1):
+                    narrow(index["by_bigram"].get(search_term[i:i + 2], set()))
+                    if not candidates:
+                        break
+            base = range(len(plugins)) if candidates is None else candidates
+            search_fields = index["search_fields"]
+            narrow({
+                position for position in base
+                if search_term in search_fields[position][0] or search_term in search_fields[position][1]
+            })
         
-        logger.debug(f"筛选后插件数量: {len(plugins)}")
-        return plugins
+        positions = sorted(candidates) if candidates is not None else list(range(len(plugins)))
+        result = [plugins[position] for position in positions]
+        
+        if sort_by in MARKETPLACE_SORT_FIELDS:
+            # 缺少排序字段的插件始终排在最后
+            present = [p for p in result if p.get(sort_by) is not None]
+            missing = [p for p in result if p.get(sort_by) is None]
+            present.sort(key=lambda p: p[sort_by].lower() if isinstance(p[sort_by], str) else p[sort_by],
+                         reverse=descending)
+            result = present + missing
+        
+        if skip:
+            result = result[skip:]
+        if limit is not None:
+            result = result[:limit]
+        
+        logger.debug(f"筛选后插件数量: {len(result)}")
+        return result
     
     def get_plugin_by_id(self, plugin_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -371,11 +707,7 @@ class MarketplaceService:
         if not data or "plugins" not in data:
             return None
         
-        for plugin in data["plugins"]:
-            if plugin.get("id") == plugin_id:
-                return plugin
-        
-        return None
+        return self._get_index()["by_id"].get(plugin_id)
     
     def get_categories(self) -> List[Dict[str, Any]]:
         """
@@ -432,8 +764,9 @@ class MarketplaceService:
             settings.PLUGIN_MARKETPLACE_GIT_REPO = git_repo
         
         # 清除缓存，强制重新加载
-        self.cache = {}
+        self._set_data({})
         self.cache_time = 0
+        self._index = None
         
         # 返回当前设置
         return {
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+插件代码静态分析服务
+在保存插件时对代码做一次AST分析并保存结果，运行前据此快速拒绝无法执行的插件，
+并判断插件是否可以复用缓存结果
+"""
+
+import ast
+import json
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Set
+from urllib.parse import urlparse
+from sqlalchemy.orm import Session
+from src.lat_lab.models.plugin import Plugin
+from src.lat_lab.services.plugin_runner import SAFE_MODULES, ALLOWED_GET_DOMAINS, ALLOWED_POST_DOMAINS
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 分析结果格式版本，格式变化时旧结果会被重新计算
+ANALYSIS_VERSION = 3
+
+# 输出依赖外部状态的模块（时间、随机数、网络）
+NONDETERMINISTIC_MODULES = {'datetime', 'time', 'random', 'uuid', 'requests'}
+
+# 捕获这些异常的try块中的导入是可选导入，模块不可用时插件仍然可以运行
+IMPORT_ERROR_HANDLERS = {'ImportError', 'ModuleNotFoundError', 'Exception', 'BaseException'}
+
+# 动态导入或执行代码的调用，静态分析无法确定实际使用的模块
+DYNAMIC_CALLS = {'__import__', 'eval', 'exec', 'import_module'}
+
+
+def _is_allowed_domain(domain: str, allowed_domains: List[str]) -> bool:
+    # 与沙箱中的判断方式保持一致
+    return any(allowed_domain in domain for allowed_domain in allowed_domains)
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(isinstance(t, ast.Name) and t.id in IMPORT_ERROR_HANDLERS for t in types)
+
+
+class _PluginVisitor(ast.NodeVisitor):
+    """收集导入模块、URL常量、顶层result赋值和使用到的名称"""
+
+    def __init__(self):
+        self.imports: Set[str] = set()
+        # 不在可选导入保护中的模块，不可用时插件无法运行
+        self.required_imports: Set[str] = set()
+        self.urls: Set[str] = set()
+        self.loaded_names: Set[str] = set()
+        self.defines_result = False
+        self.dynamic_code = False
+        self._depth = 0
+        self._guarded = 0
+
+    def _add_import(self, name: str):
+        module = name.split('.')[0]
+        self.imports.add(module)
+        if not self._guarded:
+            self.required_imports.add(module)
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._add_import(alias.name)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module and not node.level:
+            self._add_import(node.module)
+        self.generic_visit(node)
+
+    def visit_Try(self, node: ast.Try):
+        # try: import numpy / except ImportError: numpy = None
+        guarded = any(_catches_import_error(handler) for handler in node.handlers)
+        self._guarded += guarded
+        for stmt in node.body:
+            self.visit(stmt)
+        self._guarded -= guarded
+        for stmt in node.handlers + node.orelse + node.finalbody:
+            self.visit(stmt)
+
+    visit_TryStar = visit_Try
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in DYNAMIC_CALLS:
+            self.dynamic_code = True
+        elif isinstance(func, ast.Attribute) and (
+            func.attr in DYNAMIC_CALLS
+            or (isinstance(func.value, ast.Name) and func.value.id == 'importlib')
+        ):
+            self.dynamic_code = True
+        self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant):
+        if isinstance(node.value, str) and node.value.startswith(('http://', 'https://')):
+            self.urls.add(node.value)
+
+    def visit_JoinedStr(self, node: ast.JoinedStr):
+        # f-string 只取开头的常量部分（通常包含协议和域名）
+        if node.values and isinstance(node.values[0], ast.Constant):
+            self.visit_Constant(node.values[0])
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        if isinstance(node.ctx, ast.Load):
+            self.loaded_names.add(node.id)
+        elif node.id == 'result' and self._depth == 0:
+            self.defines_result = True
+
+    def _visit_scope(self, node: ast.AST):
+        # 函数和类内部的result赋值不会成为插件输出
+        self._depth += 1
+        self.generic_visit(node)
+        self._depth -= 1
+
+    visit_FunctionDef = _visit_scope
+    visit_AsyncFunctionDef = _visit_scope
+    visit_ClassDef = _visit_scope
+    visit_Lambda = _visit_scope
+
+
+class PluginAnalyzer:
+    """插件代码分析器"""
+
+    def analyze(self, code: str) -> Dict[str, Any]:
+        """
+        分析插件代码
+
+        Returns:
+            Dict[str, Any]: 分析结果，errors 非空表示插件无法运行，warnings 只是提示
+        """
+        analysis: Dict[str, Any] = {
+            "version": ANALYSIS_VERSION,
+            "code_hash": hashlib.sha256(code.encode('utf-8')).hexdigest(),
+            "imports": [],
+            "disallowed_imports": [],
+            "optional_imports": [],
+            "domains": [],
+            "disallowed_domains": [],
+            "uses_network": False,
+            "defines_result": False,
+            "deterministic": False,
+            "errors": [],
+            "warnings": [],
+        }
+
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            analysis["errors"].append(f"语法错误（第{e.lineno}行）: {e.msg}")
+            return analysis
+
+        visitor = _PluginVisitor()
+        visitor.visit(tree)
+
+        allowed_modules = {m.split('.')[0] for m in SAFE_MODULES} | {'requests'}
+        disallowed_imports = sorted(visitor.imports - allowed_modules)
+        # 沙箱中导入不允许的模块会抛出ImportError，可选导入由插件自己处理
+        optional_imports = sorted(set(disallowed_imports) - visitor.required_imports)
+        required_disallowed = sorted(set(disallowed_imports) & visitor.required_imports)
+
+        domains = sorted({urlparse(url).netloc for url in visitor.urls if urlparse(url).netloc})
+        allowed_domains = ALLOWED_GET_DOMAINS + ALLOWED_POST_DOMAINS
+        disallowed_domains = [d for d in domains if not _is_allowed_domain(d, allowed_domains)]
+
+        # 沙箱预加载了白名单模块和requests，未导入也可以直接使用
+        used_modules = visitor.imports | (visitor.loaded_names & allowed_modules)
+        uses_network = 'requests' in used_modules
+
+        analysis.update({
+            "imports": sorted(visitor.imports),
+            "disallowed_imports": disallowed_imports,
+            "optional_imports": optional_imports,
+            "domains": domains,
+            "disallowed_domains": disallowed_domains,
+            "uses_network": uses_network,
+            "defines_result": visitor.defines_result,
+            # 仅为提示：未使用时间、随机数和网络的插件，相同参数总是得到相同输出；
+            # 动态导入或执行代码时无法判断，按非确定性处理
+            "deterministic": not (
+                used_modules & NONDETERMINISTIC_MODULES
+                or visitor.dynamic_code
+                or 'importlib' in used_modules
+            ),
+        })
+
+        if required_disallowed:
+            analysis["errors"].append("不允许导入的模块: " + ", ".join(required_disallowed))
+        if optional_imports:
+            analysis["warnings"].append("可选导入的模块在沙箱中不可用: " + ", ".join(optional_imports))
+        if not visitor.defines_result:
+            analysis["errors"].append("插件未定义'result'变量")
+
+        return analysis
+
+    def dumps(self, code: str) -> str:
+        """分析插件代码并序列化为JSON，便于保存到数据库"""
+        return json.dumps(self.analyze(code), ensure_ascii=False)
+
+    def get_analysis(self, db: Session, plugin: Plugin) -> Dict[str, Any]:
+        """
+        获取插件的分析结果
+
+        旧数据没有分析结果，或分析结果与当前代码不一致时重新分析；
+        这里只在读取路径上使用，不写入数据库，保存插件时会写入新的分析结果
+        """
+        analysis: Optional[Dict[str, Any]] = None
+        if plugin.analysis:
+            try:
+                analysis = json.loads(plugin.analysis)
+            except ValueError:
+                analysis = None
+
+        code_hash = hashlib.sha256(plugin.code.encode('utf-8')).hexdigest()
+        if (
+            analysis is None
+            or analysis.get("version") != ANALYSIS_VERSION
+            or analysis.get("code_hash") != code_hash
+        ):
+            analysis = self.analyze(plugin.code)
+            logger.debug(f"已重新分析插件 {plugin.id} 的代码")
+
+        return analysis
+
+
+# 创建服务实例
+plugin_analyzer = PluginAnalyzer()
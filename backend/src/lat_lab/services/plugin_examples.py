@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+示例插件索引服务
+在内存中缓存示例插件的描述、代码和内容哈希，仅在目录变化或显式重新加载时重建
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from src.lat_lab.core.config import settings
+from src.lat_lab.utils.security import secure_filename
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 描述只从文件开头的注释中提取
+DESCRIPTION_MAX_LINES = 10
+
+README_NAME = "README"
+README_DESCRIPTION = "插件系统使用和开发说明"
+
+
+def _decode(raw: bytes) -> str:
+    """按UTF-8解码，失败时退回latin1（不再回写文件）"""
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin1")
+
+
+def extract_description(code: str) -> str:
+    """从代码开头的注释中提取插件描述"""
+    description = ""
+    for i, line in enumerate(code.split('\n')):
+        if i >= DESCRIPTION_MAX_LINES:
+            break
+        if line.startswith('#'):
+            if description:
+                description += " "
+            description += line[1:].strip()
+        elif line.strip():
+            break
+    return description
+
+
+class PluginExampleIndex:
+    """示例插件索引"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        """初始化索引"""
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._examples: Dict[str, Dict[str, Any]] = {}
+        self._readme: Optional[str] = None
+
+    @property
+    def directory(self) -> Path:
+        """示例插件目录（默认跟随配置）"""
+        return Path(self._directory or settings.PLUGIN_EXAMPLES_DIR)
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ensure_fresh(self):
+        """目录修改时间变化时重建索引"""
+        mtime = self._current_mtime()
+        if mtime is not None and mtime == self._mtime_ns:
+            return
+        with self._lock:
+            if mtime != self._mtime_ns or mtime is None:
+                self._rebuild(mtime)
+
+    def _rebuild(self, mtime: Optional[int]):
+        examples: Dict[str, Dict[str, Any]] = {}
+        readme: Optional[str] = None
+
+        if mtime is not None:
+            for filename in sorted(os.listdir(self.directory)):
+                path = self.directory / filename
+                try:
+                    if filename.endswith('.py'):
+                        raw = path.read_bytes()
+                        code = _decode(raw)
+                        name = secure_filename(filename[:-3])
+                        examples[name] = {
+                            "name": name,
+                            "description": extract_description(code),
+                            "code": code,
+                            "hash": hashlib.sha256(raw).hexdigest(),
+                        }
+                    elif filename == "README.md":
+                        readme = _decode(path.read_bytes())
+                except OSError as e:
+                    logger.warning(f"读取示例插件 {filename} 失败: {str(e)}")
+                    if filename.endswith('.py'):
+                        name = secure_filename(filename[:-3])
+                        examples[name] = {
+                            "name": name,
+                            "description": "无法读取描述",
+                            "code": None,
+                            "hash": "",
+                        }
+
+        self._examples = examples
+        self._readme = readme
+        self._mtime_ns = mtime
+        logger.info(f"示例插件索引已重建，共{len(examples)}个示例")
+
+    def reload(self) -> int:
+        """强制重建索引，返回示例数量"""
+        with self._lock:
+            self._rebuild(self._current_mtime())
+            return len(self._examples)
+
+    def list_examples(self) -> List[Dict[str, str]]:
+        """列出示例插件（名称、描述、内容哈希）"""
+        self._ensure_fresh()
+        result = [
+            {"name": item["name"], "description": item["description"], "hash": item["hash"]}
+            for item in self._examples.values()
+        ]
+        if self._readme is not None:
+            result.append({"name": README_NAME, "description": README_DESCRIPTION, "hash": ""})
+        return result
+
+    def get_example(self, name: str) -> Optional[Dict[str, Any]]:
+        """获取示例插件，不存在时返回None"""
+        self._ensure_fresh()
+        return self._examples.get(name)
+
+    def get_readme(self) -> Optional[str]:
+        """获取插件开发说明"""
+        self._ensure_fresh()
+        return self._readme
+
+    def names(self) -> List[str]:
+        """所有示例插件名称"""
+        self._ensure_fresh()
+        return list(self._examples.keys())
+
+
+# 创建服务实例
+plugin_example_index = PluginExampleIndex()
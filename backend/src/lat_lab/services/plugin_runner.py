@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+插件运行服务
+负责在沙箱子进程中执行插件代码，供API路由和定时调度器共用
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from src.lat_lab.core.config import settings
+from src.lat_lab.utils.security import SecurityError
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class PluginExecutionError(Exception):
+    """插件执行失败"""
+
+
+class PluginTimeoutError(PluginExecutionError):
+    """插件执行超时"""
+
+
+# 沙箱白名单（需与下方包装脚本中的定义保持一致，供静态分析使用）
+SAFE_MODULES = [
+    'datetime', 'json', 'base64', 'hashlib', 'math',
+    'random', 're', 'time', 'uuid',
+    'collections', 'io', 'string'
+]
+ALLOWED_GET_DOMAINS = ['api.openweathermap.org', 'api.openrouter.ai', 'picsum.photos']
+ALLOWED_POST_DOMAINS = ['api.openrouter.ai']
+
+
+# 沙箱包装脚本：安全地执行插件并捕获结果
+SANDBOX_WRAPPER_CODE = """# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import traceback
+import types
+
+# 确保使用UTF-8编码
+import io
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# 添加当前目录到路径以便导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 首先打印出参数和环境信息，用于调试（写入stderr，避免污染插件输出）
+print("Python版本:", sys.version, file=sys.stderr)
+print("参数:", sys.argv, file=sys.stderr)
+print("当前目录:", os.getcwd(), file=sys.stderr)
+print("文件目录:", os.path.dirname(os.path.abspath(__file__)), file=sys.stderr)
+print("模块路径:", sys.path, file=sys.stderr)
+
+# 从环境变量中安全获取prompt参数
+plugin_prompt = os.environ.get('PLUGIN_PROMPT', '')
+
+# 定义安全的标准库白名单（仅限安全子集）
+SAFE_MODULES = [
+    'datetime', 'json', 'base64', 'hashlib', 'math', 
+    'random', 're', 'time', 'uuid',
+    'collections', 'io', 'string'
+]
+
+# 创建安全的执行环境
+safe_globals = dict()
+
+# 定义受限的内置函数集合
+safe_builtins = {}
+
+# 添加安全的内置函数
+for name in ['abs', 'all', 'any', 'ascii', 'bin', 'bool', 'bytes', 'chr', 
+            'complex', 'dict', 'dir', 'divmod', 'enumerate', 'filter', 
+            'float', 'format', 'frozenset', 'hash', 'hex', 'int', 'isinstance',
+            'issubclass', 'iter', 'len', 'list', 'map', 'max', 'min', 'next',
+            'object', 'oct', 'ord', 'pow', 'print', 'range', 'repr', 'reversed',
+            'round', 'set', 'slice', 'sorted', 'str', 'sum', 'tuple', 'type', 'zip']:
+    try:
+        if isinstance(__builtins__, dict):
+            if name in __builtins__:
+                safe_builtins[name] = __builtins__[name]
+        else:
+            if hasattr(__builtins__, name):
+                safe_builtins[name] = getattr(__builtins__, name)
+    except (AttributeError, KeyError):
+        pass
+
+# 实现受限导入：仅允许白名单模块和伪 requests
+_allowed_modules = set([m.split('.')[0] for m in SAFE_MODULES])
+_allowed_modules.add('requests')
+
+# 允许访问的域名
+ALLOWED_GET_DOMAINS = ['api.openweathermap.org', 'api.openrouter.ai', 'picsum.photos']
+ALLOWED_POST_DOMAINS = ['api.openrouter.ai']
+
+# HTTP响应缓存配置（由父进程通过环境变量传入）
+HTTP_CACHE_DIR = os.environ.get('PLUGIN_HTTP_CACHE_DIR', '')
+HTTP_CACHE_MAX_TTL = int(os.environ.get('PLUGIN_HTTP_CACHE_MAX_TTL', '0') or 0)
+HTTP_COALESCE_WAIT = float(os.environ.get('PLUGIN_HTTP_COALESCE_WAIT', '0') or 0)
+
+# 从缓存中还原的响应，提供与requests.Response相近的常用属性
+class CachedResponse:
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.ok = 200 <= status_code < 400
+        self.from_cache = True
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+    def json(self):
+        return json.loads(self.content)
+    def raise_for_status(self):
+        if not self.ok:
+            raise Exception("HTTP " + str(self.status_code))
+
+class SafeRequests:
+    def __init__(self):
+        self._session = None
+        self._memory_cache = {}
+        try:
+            import requests as real_requests
+            from requests.adapters import HTTPAdapter
+            self._requests = real_requests
+            # 复用连接：每个允许的域名一个连接池
+            self._session = real_requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(ALLOWED_GET_DOMAINS), pool_maxsize=4)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+        except Exception:
+            self._requests = None
+
+    def _check_domain(self, url, allowed_domains):
+        from urllib.parse import urlparse
+        domain = urlparse(url).netloc
+        if not any(allowed_domain in domain for allowed_domain in allowed_domains):
+            return "不允许访问域名: " + domain
+        return None
+
+    def _cache_key(self, url, kwargs):
+        import hashlib
+        key_data = json.dumps({
+            "url": url,
+            "params": kwargs.get('params'),
+            "headers": kwargs.get('headers'),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    def _cache_ttl(self, response):
+        # 根据Cache-Control计算可缓存时间，不可缓存时返回0
+        if response.status_code != 200:
+            return 0
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        directives = [d.strip() for d in cache_control.split(',') if d.strip()]
+        if any(d in ('no-store', 'no-cache', 'private') for d in directives):
+            return 0
+        max_age = 0
+        for directive in directives:
+            if directive.startswith('s-maxage=') or directive.startswith('max-age='):
+                try:
+                    value = int(directive.split('=', 1)[1])
+                except ValueError:
+                    continue
+                # s-maxage 优先于 max-age
+                if directive.startswith('s-maxage='):
+                    max_age = value
+                    break
+                max_age = value
+        try:
+            max_age -= int(response.headers.get('Age', '0'))
+        except ValueError:
+            pass
+        return max(0, min(max_age, HTTP_CACHE_MAX_TTL))
+
+    def _cache_path(self, key):
+        return os.path.join(HTTP_CACHE_DIR, key + '.json')
+
+    def _read_cache(self, key):
+        entry = self._memory_cache.get(key)
+        if entry is None and HTTP_CACHE_DIR:
+            try:
+                with open(self._cache_path(key), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+        if entry is None or entry.get('expires', 0) <= time.time():
+            return None
+        self._memory_cache[key] = entry
+        import base64
+        return CachedResponse(entry['url'], entry['status_code'], entry['headers'],
+                              base64.b64decode(entry['content']))
+
+    def _write_cache(self, key, url, response, ttl):
+        import base64
+        entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "content": base64.b64encode(response.content).decode('ascii'),
+            "expires": time.time() + ttl,
+        }
+        self._memory_cache[key] = entry
+        if not HTTP_CACHE_DIR:
+            return
+        # 先写临时文件再原子替换，避免其他进程读到半个文件
+        tmp_path = self._cache_path(key) + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._cache_path(key))
+        except OSError:
+            pass
+
+    def _acquire_fetch_lock(self, key):
+        # 合并并发请求：同一URL只由一个进程访问上游，其余进程等待其写入缓存
+        # 返回锁文件路径；等待后命中缓存时返回缓存响应
+        lock_path = self._cache_path(key) + '.lock'
+        deadline = time.time() + HTTP_COALESCE_WAIT
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                # 拿到锁前其他进程可能刚写完缓存
+                cached = self._read_cache(key)
+                if cached is not None:
+                    os.unlink(lock_path)
+                    return None, cached
+                return lock_path, None
+            except FileExistsError:
+                # 持锁进程超时被强制结束时不会删除锁文件，超过等待时间的锁视为已失效
+                try:
+                    if time.time() - os.stat(lock_path).st_mtime > HTTP_COALESCE_WAIT:
+                        os.unlink(lock_path)
+                        continue
+                except OSError:
+                    # 锁可能刚被释放，稍后重新尝试获取
+                    pass
+            except OSError:
+                return None, None
+            cached = self._read_cache(key)
+            if cached is not None:
+                return None, cached
+            if time.time() >= deadline:
+                # 持锁进程可能已异常退出，放弃等待并直接请求
+                return None, None
+            time.sleep(0.05)
+
+    def get(self, url, **kwargs):
+        if not self._requests:
+            return {"error": "requests模块不可用"}
+        try:
+            error = self._check_domain(url, ALLOWED_GET_DOMAINS)
+            if error:
+                return {"error": error}
+            if 'timeout' not in kwargs:
+                kwargs['timeout'] = 3
+            if HTTP_CACHE_MAX_TTL <= 0:
+                return self._session.get(url, **kwargs)
+
+            key = self._cache_key(url, kwargs)
+            cached = self._read_cache(key)
+            if cached is not None:
+                return cached
+
+            lock_path = None
+            if HTTP_CACHE_DIR and HTTP_COALESCE_WAIT > 0:
+                lock_path, cached = self._acquire_fetch_lock(key)
+                if cached is not None:
+                    return cached
+            try:
+                response = self._session.get(url, **kwargs)
+                ttl = self._cache_ttl(response)
+                if ttl > 0:
+                    self._write_cache(key, url, response, ttl)
+                return response
+            finally:
+                if lock_path:
+                    try:
+                        os.unlink(lock_path)
+                    except OSError:
+                        pass
+        except Exception as e:
+            return {"error": str(e)}
+
+    def post(self, url, **kwargs):
+        if not self._requests:
+            return {"error": "requests模块不可用"}
+        try:
+            error = self._check_domain(url, ALLOWED_POST_DOMAINS)
+            if error:
+                return {"error": error}
+            if 'timeout' not in kwargs:
+                kwargs['timeout'] = 3
+            return self._session.post(url, **kwargs)
+        except Exception as e:
+            return {"error": str(e)}
+
+_safe_requests = SafeRequests()
+SafeRequestsModule = types.SimpleNamespace(get=_safe_requests.get, post=_safe_requests.post)
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    root = name.split('.')[0]
+    if root == 'requests':
+        return SafeRequestsModule
+    if root not in _allowed_modules:
+        raise ImportError("模块不允许导入: " + root)
+    return __import__(name, globals, locals, fromlist, level)
+
+# 将受限导入注入内置
+safe_builtins['__import__'] = _restricted_import
+
+# 将安全内置注入执行环境
+safe_globals['__builtins__'] = safe_builtins
+
+# 预加载安全模块到全局（便于直接使用）
+for module_name in SAFE_MODULES:
+    try:
+        if '.' in module_name:
+            package, submodule = module_name.split('.', 1)
+            module = __import__(package, fromlist=[submodule])
+            safe_module = getattr(module, submodule)
+        else:
+            safe_module = __import__(module_name)
+        safe_globals[module_name.split('.')[-1]] = safe_module
+    except ImportError:
+        pass
+
+# 也提供一个 requests 变量（非必需，import 更常见）
+safe_globals['requests'] = _safe_requests
+
+# 将prompt参数安全地传递给插件
+safe_globals['prompt'] = plugin_prompt
+
+# 读取原始代码文件
+plugin_path = "TEMP_PATH_PLACEHOLDER"
+with open(plugin_path, "r", encoding="utf-8") as code_file:
+    plugin_code = code_file.read()
+
+# 批量模式：同一沙箱进程内依次处理多组参数，每组输出一行JSON
+batch_path = os.environ.get('PLUGIN_BATCH_FILE', '')
+
+if batch_path:
+    import signal
+    import contextlib
+
+    item_timeout = float(os.environ.get('PLUGIN_ITEM_TIMEOUT', '0') or 0)
+    compiled_code = compile(plugin_code, plugin_path, 'exec')
+
+    # 继承 BaseException，插件中的 except Exception 不会吞掉超时
+    class _ItemTimeout(BaseException):
+        pass
+
+    item_state = {"timed_out": False}
+
+    def _on_alarm(signum, frame):
+        item_state["timed_out"] = True
+        # 插件用裸 except 吞掉超时后继续打断，直到退出插件代码
+        signal.setitimer(signal.ITIMER_REAL, 0.05)
+        raise _ItemTimeout()
+
+    use_alarm = item_timeout > 0 and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+    with open(batch_path, "r", encoding="utf-8") as batch_file:
+        batch_items = json.load(batch_file)
+
+    for index, item_params in enumerate(batch_items):
+        # 每组参数使用全新的全局环境，避免数据在输入之间泄漏
+        item_globals = dict(safe_globals)
+        item_globals['prompt'] = str(item_params['prompt']) if 'prompt' in item_params else ''
+        # 与单次运行相同，参数作为插件代码的局部变量，不会覆盖 requests、__builtins__ 等沙箱名称
+        item_locals = dict(item_params)
+        captured = io.StringIO()
+        line = {"index": index}
+        item_state["timed_out"] = False
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, item_timeout)
+            try:
+                with contextlib.redirect_stdout(captured):
+                    exec(compiled_code, item_globals, item_locals)
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            if item_state["timed_out"]:
+                raise _ItemTimeout()
+            if 'result' in item_locals:
+                line["success"] = True
+                line["output"] = captured.getvalue() + str(item_locals['result']) + "\\n"
+            else:
+                line["success"] = False
+                line["error"] = "错误: 插件未定义'result'变量"
+        except _ItemTimeout:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            line["success"] = False
+            line["error"] = "插件执行超时（" + str(item_timeout) + "秒）"
+        except Exception as e:
+            line["success"] = False
+            line["error"] = "插件执行错误: " + str(type(e).__name__)
+        sys.stdout.write(json.dumps(line, ensure_ascii=False) + "\\n")
+        sys.stdout.flush()
+    sys.exit(0)
+
+# 执行插件代码
+try:
+    local_vars = {}
+    
+    # 执行插件代码
+    exec(plugin_code, safe_globals, local_vars)
+    
+    # 获取结果
+    if 'result' in local_vars:
+        print(local_vars['result'])
+    else:
+        print("错误: 插件未定义'result'变量")
+except Exception as e:
+    # 只输出安全的错误信息，不包含堆栈跟踪
+    error_msg = "插件执行错误: " + str(type(e).__name__)
+    print(error_msg)
+    sys.exit(1)
+"""
+
+
+class PluginRunner:
+    """插件运行器"""
+
+    def __init__(self):
+        """初始化运行器"""
+        # 确定性插件的输出缓存: (代码哈希, 参数JSON) -> 输出
+        self._result_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def run(
+        self,
+        code: str,
+        params: Optional[Dict[str, Any]] = None,
+        plugin_id: Optional[int] = None,
+        analysis: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        执行插件代码并返回输出
+
+        Args:
+            code: 插件代码
+            params: 插件参数
+            plugin_id: 插件ID（仅用于日志）
+            analysis: 插件静态分析结果，确定性插件会复用相同参数的输出
+
+        Returns:
+            str: 插件输出
+
+        Raises:
+            PluginTimeoutError: 执行超时
+            PluginExecutionError: 执行失败
+        """
+        params = params or {}
+
+        cache_key = None
+        if analysis and analysis.get("deterministic") and settings.PLUGIN_RESULT_CACHE_SIZE > 0:
+            try:
+                cache_key = (analysis["code_hash"], json.dumps(params, sort_keys=True, ensure_ascii=False))
+            except (KeyError, TypeError, ValueError):
+                cache_key = None
+        if cache_key is not None:
+            with self._cache_lock:
+                if cache_key in self._result_cache:
+                    self._result_cache.move_to_end(cache_key)
+                    return self._result_cache[cache_key]
+
+        output = self._execute(code, params, plugin_id)
+
+        if cache_key is not None:
+            with self._cache_lock:
+                self._result_cache[cache_key] = output
+                self._result_cache.move_to_end(cache_key)
+                while len(self._result_cache) > settings.PLUGIN_RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+
+        return output
+
+    def _execute(self, code: str, params: Dict[str, Any], plugin_id: Optional[int]) -> str:
+        """写入临时文件并在沙箱（或开发模式下直接）执行插件"""
+        temp_path = ""
+        wrapper_path = ""
+
+        try:
+            with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w', encoding='utf-8') as temp:
+                temp_path = temp.name
+
+                # 如果有参数，将参数添加到代码顶部
+                temp.write(self._with_params(code, params))
+
+            if settings.PLUGIN_SANDBOX_ENABLED:
+                # 替换临时文件路径，避免使用format和特殊字符
+                wrapper_code = SANDBOX_WRAPPER_CODE.replace("TEMP_PATH_PLACEHOLDER", temp_path.replace("\\", "\\\\"))
+
+                # 创建包装器脚本文件
+                wrapper_path = temp_path + "_wrapper.py"
+                with open(wrapper_path, 'w', encoding='utf-8') as f:
+                    f.write(wrapper_code)
+
+                return self._run_sandboxed(wrapper_path, params, plugin_id)
+
+            with open(temp_path, 'r', encoding='utf-8') as f:
+                return self._run_inline(f.read(), params)
+        finally:
+            # 清理临时文件
+            for path in [temp_path, wrapper_path]:
+                if path and os.path.exists(path):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+    def run_batch(
+        self,
+        code: str,
+        params_list: List[Dict[str, Any]],
+        plugin_id: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        在同一个沙箱进程中对多组参数依次执行插件，逐条产出结果
+
+        每条结果包含 index、success，以及 output 或 error。
+        单条输入的超时为 PLUGIN_TIMEOUT_SECONDS，整批的超时按输入数量累加。
+        """
+        if not params_list:
+            return
+
+        if not settings.PLUGIN_SANDBOX_ENABLED:
+            for index, params in enumerate(params_list):
+                try:
+                    output = self._run_inline(self._with_params(code, params), params)
+                    yield {"index": index, "success": True, "output": output}
+                except PluginExecutionError as e:
+                    yield {"index": index, "success": False, "error": str(e)}
+            return
+
+        temp_path = ""
+        wrapper_path = ""
+        batch_path = ""
+        process = None
+        timer = None
+        timed_out = threading.Event()
+
+        def _kill_on_timeout():
+            timed_out.set()
+            if process is not None:
+                process.kill()
+
+        try:
+            with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w', encoding='utf-8') as temp:
+                temp_path = temp.name
+                temp.write(code)
+
+            wrapper_path = temp_path + "_wrapper.py"
+            with open(wrapper_path, 'w', encoding='utf-8') as f:
+                f.write(SANDBOX_WRAPPER_CODE.replace("TEMP_PATH_PLACEHOLDER", temp_path.replace("\\", "\\\\")))
+
+            batch_path = temp_path + "_batch.json"
+            with open(batch_path, 'w', encoding='utf-8') as f:
+                json.dump(params_list, f, ensure_ascii=False)
+
+            env = os.environ.copy()
+            env['PLUGIN_PROMPT'] = ''
+            env['PLUGIN_BATCH_FILE'] = batch_path
+            env['PLUGIN_ITEM_TIMEOUT'] = str(settings.PLUGIN_TIMEOUT_SECONDS)
+            env.update(self._http_cache_env())
+
+            process = subprocess.Popen(
+                [sys.executable, wrapper_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding='utf-8',
+                env=env
+            )
+            timer = threading.Timer(settings.PLUGIN_TIMEOUT_SECONDS * len(params_list), _kill_on_timeout)
+            timer.daemon = True
+            timer.start()
+
+            finished = set()
+            for line in process.stdout:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                finished.add(item.get("index"))
+                yield item
+
+            return_code = process.wait()
+            if len(finished) < len(params_list):
+                if timed_out.is_set():
+                    error = "批量执行超时"
+                else:
+                    SecurityError.log_error_safe(
+                        Exception(f"批量插件运行失败，返回码: {return_code}"),
+                        "plugin_batch_execution",
+                        {"plugin_id": plugin_id, "return_code": return_code, "finished": len(finished)}
+                    )
+                    error = "插件运行失败"
+                for index in range(len(params_list)):
+                    if index not in finished:
+                        yield {"index": index, "success": False, "error": error}
+        finally:
+            if timer is not None:
+                timer.cancel()
+            # 调用方提前停止读取时（如客户端断开）确保子进程被回收
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+            for path in [temp_path, wrapper_path, batch_path]:
+                if path and os.path.exists(path):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+    def _with_params(self, code: str, params: Dict[str, Any]) -> str:
+        """将参数作为变量赋值添加到代码顶部"""
+        if not params:
+            return code
+        param_lines = []
+        for key, value in params.items():
+            param_lines.append(f"{key} = {repr(value)}")
+        logger.debug(f"插件参数: {params}")
+        return "\n".join(param_lines) + "\n\n" + code
+
+    def _http_cache_env(self) -> Dict[str, str]:
+        """沙箱内HTTP响应缓存的配置，所有插件运行共享同一缓存目录"""
+        if not settings.PLUGIN_HTTP_CACHE_ENABLED:
+            return {'PLUGIN_HTTP_CACHE_MAX_TTL': '0'}
+        cache_dir = str(settings.PLUGIN_HTTP_CACHE_DIR)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"无法创建插件HTTP缓存目录: {str(e)}")
+            cache_dir = ''
+        return {
+            'PLUGIN_HTTP_CACHE_DIR': cache_dir,
+            'PLUGIN_HTTP_CACHE_MAX_TTL': str(settings.PLUGIN_HTTP_CACHE_MAX_TTL),
+            'PLUGIN_HTTP_COALESCE_WAIT': str(settings.PLUGIN_HTTP_COALESCE_WAIT_SECONDS),
+        }
+
+    def _run_sandboxed(self, wrapper_path: str, params: Dict[str, Any], plugin_id: Optional[int]) -> str:
+        """在子进程沙箱中运行包装脚本"""
+        # 准备运行参数 - 移除不安全的命令行参数传递
+        run_args = [sys.executable, wrapper_path]
+
+        # 通过环境变量安全传递prompt参数，避免命令行注入
+        env = os.environ.copy()
+        env['PLUGIN_PROMPT'] = str(params['prompt']) if 'prompt' in params else ''
+        env.update(self._http_cache_env())
+
+        try:
+            result = subprocess.run(
+                run_args,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                timeout=settings.PLUGIN_TIMEOUT_SECONDS,
+                env=env
+            )
+        except subprocess.TimeoutExpired:
+            raise PluginTimeoutError("插件执行超时（" + str(settings.PLUGIN_TIMEOUT_SECONDS) + "秒）")
+
+        if result.returncode != 0:
+            SecurityError.log_error_safe(
+                Exception(f"插件运行失败，返回码: {result.returncode}"),
+                "plugin_subprocess_execution",
+                {
+                    "plugin_id": plugin_id,
+                    "return_code": result.returncode,
+                    "stderr_length": len(result.stderr) if result.stderr else 0
+                }
+            )
+            raise PluginExecutionError("插件运行失败")
+
+        output = result.stdout
+
+        # 如果没有输出，记录错误
+        if not output.strip():
+            output = "警告: 插件没有生成任何输出"
+
+        return output
+
+    def _run_inline(self, code: str, params: Dict[str, Any]) -> str:
+        """不安全的执行方式，仅用于开发环境"""
+        # 警告：在生产环境中，永远不要直接执行用户提供的代码
+        # 这里仅作为示例，实际应该使用更安全的沙箱机制
+        safe_builtins = {}
+
+        # 获取安全内置函数
+        for name in ['abs', 'all', 'any', 'ascii', 'bin', 'bool', 'bytes', 'chr',
+                     'complex', 'dict', 'dir', 'divmod', 'enumerate', 'filter',
+                     'float', 'format', 'frozenset', 'hash', 'hex', 'int', 'isinstance',
+                     'issubclass', 'iter', 'len', 'list', 'map', 'max', 'min', 'next',
+                     'object', 'oct', 'ord', 'pow', 'print', 'range', 'repr', 'reversed',
+                     'round', 'set', 'slice', 'sorted', 'str', 'sum', 'tuple', 'type', 'zip']:
+            if isinstance(__builtins__, dict):
+                if name in __builtins__:
+                    safe_builtins[name] = __builtins__[name]
+            else:
+                if hasattr(__builtins__, name):
+                    safe_builtins[name] = getattr(__builtins__, name)
+
+        local_vars = {}
+        # 允许访问部分安全模块
+        global_vars = {'__builtins__': safe_builtins}
+
+        # 允许导入一些安全的模块
+        for module_name in ['datetime', 'json', 'base64', 'math', 'random', 're']:
+            try:
+                module = __import__(module_name)
+                global_vars[module_name] = module
+            except ImportError:
+                pass
+
+        # 添加prompt参数支持
+        if 'prompt' in params:
+            global_vars['prompt'] = params['prompt']
+
+        try:
+            exec(code, global_vars, local_vars)
+        except Exception as e:
+            raise PluginExecutionError("插件执行错误: " + type(e).__name__) from e
+
+        if 'result' in local_vars:
+            return str(local_vars.get('result'))
+
+        output = "警告: 插件没有定义'result'变量"
+
+        # 调试信息
+        var_names = list(local_vars.keys())
+        if var_names:
+            output += "\n\n可用变量: " + ', '.join(var_names)
+        return output
+
+
+# 创建服务实例
+plugin_runner = PluginRunner()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+插件定时调度服务
+按插件配置的cron表达式在后台执行插件，并保存最近一次的输出供读取
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from sqlalchemy.orm import Session
+from src.lat_lab.core.config import settings
+from src.lat_lab.core.database import SessionLocal
+from src.lat_lab.models.plugin import Plugin
+from src.lat_lab.services.plugin_runner import plugin_runner, PluginExecutionError
+from src.lat_lab.services.plugin_analyzer import plugin_analyzer
+from src.lat_lab.utils.cron import CronExpression
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 保存的错误信息最大长度
+MAX_ERROR_LENGTH = 500
+
+
+class PluginScheduler:
+    """插件定时调度器"""
+
+    def __init__(self):
+        """初始化调度器"""
+        self.interval = settings.PLUGIN_SCHEDULER_INTERVAL_SECONDS
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._last_tick: Optional[datetime] = None
+
+    @property
+    def is_running(self) -> bool:
+        """调度线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台调度线程"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="plugin-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"插件调度器已启动，检查间隔 {self.interval} 秒")
+
+    def stop(self, timeout: float = 5.0):
+        """停止后台调度线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info("插件调度器已停止")
+
+    def _loop(self):
+        """调度循环"""
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"插件调度执行异常: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """
+        检查并执行到期的插件
+
+        Args:
+            now: 当前时间（默认为本地时间）
+
+        Returns:
+            int: 本次执行的插件数量
+        """
+        now = now or datetime.now()
+        self._last_tick = now
+        executed = 0
+
+        db = SessionLocal()
+        try:
+            plugins = db.query(Plugin).filter(
+                Plugin.is_active == True,
+                Plugin.schedule.isnot(None),
+                Plugin.schedule != ""
+            ).all()
+
+            for plugin in plugins:
+                next_run = self.get_next_run(plugin)
+                if next_run is not None and next_run <= now:
+                    if self.run_now(db, plugin, now):
+                        executed += 1
+        finally:
+            db.close()
+
+        return executed
+
+    def get_next_run(self, plugin: Plugin) -> Optional[datetime]:
+        """
+        计算插件的下一次执行时间
+
+        从未执行过的插件立即到期，便于读取方尽快拿到输出；
+        表达式无效时返回None
+        """
+        if not plugin.schedule:
+            return None
+        try:
+            cron = CronExpression(plugin.schedule)
+        except ValueError:
+            return None
+        if plugin.last_run_at is None:
+            return datetime.min
+        try:
+            return cron.next_after(plugin.last_run_at)
+        except ValueError:
+            return None
+
+    def _claim(self, db: Session, plugin: Plugin, now: datetime) -> bool:
+        """
+        通过条件更新抢占本次执行，避免多个worker重复执行同一插件
+        """
+        previous = plugin.last_run_at
+        query = db.query(Plugin).filter(Plugin.id == plugin.id)
+        if previous is None:
+            query = query.filter(Plugin.last_run_at.is_(None))
+        else:
+            query = query.filter(Plugin.last_run_at == previous)
+        claimed = query.update({Plugin.last_run_at: now}, synchronize_session=False) == 1
+        db.commit()
+        db.refresh(plugin)
+        return claimed
+
+    def run_now(self, db: Session, plugin: Plugin, now: Optional[datetime] = None) -> bool:
+        """
+        立即执行插件并保存输出
+
+        Returns:
+            bool: 是否由当前进程执行
+        """
+        now = now or datetime.now()
+        if not self._claim(db, plugin, now):
+            logger.debug(f"插件 {plugin.id} 已被其他进程执行，跳过")
+            return False
+
+        params: Dict[str, Any] = {}
+        started = time.time()
+        try:
+            if plugin.schedule_params:
+                params = json.loads(plugin.schedule_params)
+            analysis = plugin_analyzer.get_analysis(db, plugin)
+            if analysis["errors"]:
+                raise PluginExecutionError("插件代码无法运行: " + "；".join(analysis["errors"]))
+            output = plugin_runner.run(plugin.code, params, plugin_id=plugin.id, analysis=analysis)
+            plugin.last_output = output
+            plugin.last_error = None
+            logger.info(f"定时插件 {plugin.name} 执行完成，耗时 {time.time() - started:.2f} 秒")
+        except (PluginExecutionError, ValueError) as e:
+            plugin.last_error = str(e)[:MAX_ERROR_LENGTH]
+            logger.warning(f"定时插件 {plugin.name} 执行失败: {plugin.last_error}")
+        except Exception as e:
+            plugin.last_error = f"插件执行错误: {type(e).__name__}"
+            logger.error(f"定时插件 {plugin.name} 执行异常: {str(e)}")
+
+        db.commit()
+        return True
+
+    def describe(self, plugin: Plugin) -> Dict[str, Any]:
+        """获取单个插件的定时执行状态"""
+        next_run = self.get_next_run(plugin)
+        return {
+            "id": plugin.id,
+            "name": plugin.name,
+            "is_active": plugin.is_active,
+            "schedule": plugin.schedule,
+            "schedule_params": json.loads(plugin.schedule_params) if plugin.schedule_params else {},
+            "last_run_at": plugin.last_run_at,
+            "next_run_at": next_run if next_run and next_run != datetime.min else None,
+            "last_error": plugin.last_error,
+            "has_output": plugin.last_output is not None,
+        }
+
+    def get_status(self, db: Session) -> Dict[str, Any]:
+        """获取调度器及所有定时插件的状态"""
+        plugins = db.query(Plugin).filter(
+            Plugin.schedule.isnot(None),
+            Plugin.schedule != ""
+        ).order_by(Plugin.id).all()
+
+        items: List[Dict[str, Any]] = [self.describe(plugin) for plugin in plugins]
+
+        return {
+            "enabled": settings.PLUGIN_SCHEDULER_ENABLED,
+            "running": self.is_running,
+            "interval_seconds": self.interval,
+            "last_tick": self._last_tick,
+            "plugins": items,
+        }
+
+
+# 创建服务实例
+plugin_scheduler = PluginScheduler()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传文件存储后端
+上传的文件先写入本地暂存目录（内容寻址命名、生成变体），再由存储后端保存：
+本地存储直接使用上传目录作为暂存目录（多节点部署需要共享磁盘）；
+S3兼容存储（AWS S3、MinIO等）把文件保存到对象存储，/uploads 的访问重定向到预签名地址或公开地址，
+后端节点不再依赖共享磁盘
+"""
+
+import os
+import logging
+import mimetypes
+import threading
+from typing import Optional
+
+from src.lat_lab.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+UPLOAD_URL_PREFIX = "/uploads"
+
+# 内容寻址的文件内容不会改变，对象存储中也设置长期缓存
+OBJECT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class Storage:
+    """存储后端基类"""
+
+    # 上传文件写入的本地暂存目录
+    staging_dir: str = ""
+    # 本地存储的文件可以由 /uploads 静态服务直接发送
+    is_local: bool = False
+
+    def persist(self, path: str, content_type: Optional[str] = None) -> bool:
+        """
+        保存暂存的本地文件（以文件名作为存储中的名称）
+
+        Returns:
+            bool: False 表示存储中已有相同内容的文件，本次没有写入
+        """
+        raise NotImplementedError
+
+    def exists(self, filename: str) -> bool:
+        """文件是否已保存"""
+        raise NotImplementedError
+
+    def delete(self, filename: str):
+        """删除文件（不存在时忽略）"""
+        raise NotImplementedError
+
+    def url(self, filename: str) -> str:
+        """保存到数据库和返回给前端的访问地址"""
+        return f"{UPLOAD_URL_PREFIX}/{filename}"
+
+    def signed_url(self, filename: str, expires_in: Optional[int] = None) -> str:
+        """可以直接下载文件的临时地址"""
+        return self.url(filename)
+
+
+class LocalStorage(Storage):
+    """本地文件系统存储，暂存目录就是上传目录，文件写入后即已保存"""
+
+    is_local = True
+
+    def __init__(self, directory):
+        self.staging_dir = str(directory)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.staging_dir, filename)
+
+    def persist(self, path: str, content_type: Optional[str] = None) -> bool:
+        final_path = self._path(os.path.basename(path))
+        if os.path.abspath(path) == os.path.abspath(final_path):
+            return True
+        if os.path.exists(final_path):
+            os.remove(path)
+            return False
+        os.replace(path, final_path)
+        return True
+
+    def exists(self, filename: str) -> bool:
+        return os.path.exists(self._path(filename))
+
+    def delete(self, filename: str):
+        try:
+            os.remove(self._path(filename))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(Storage):
+    """S3兼容对象存储（需要安装 boto3）"""
+
+    def __init__(
+        self,
+        bucket: str,
+        staging_dir,
+        prefix: str = "",
+        public_base_url: str = "",
+        signed_url_expires: int = 3600,
+        client=None
+    ):
+        """
+        初始化存储
+
+        Args:
+            bucket: 存储桶名称
+            staging_dir: 本地暂存目录（每次上传在其中创建独立的子目录）
+            prefix: 对象键前缀
+            public_base_url: 存储桶（或CDN）的公开访问地址，为空时通过预签名地址访问
+            signed_url_expires: 预签名地址有效期（秒）
+            client: S3客户端，为空时根据配置创建（测试时可以传入本地替身）
+        """
+        if not bucket:
+            raise ValueError("S3存储需要配置 S3_BUCKET")
+        self.bucket = bucket
+        self.staging_dir = str(staging_dir)
+        self.prefix = prefix.strip("/")
+        self.public_base_url = public_base_url.rstrip("/")
+        self.signed_url_expires = signed_url_expires
+        self.client = client or self._create_client()
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    @staticmethod
+    def _create_client():
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("使用S3存储需要安装 boto3（pip install lat_lab[s3]）")
+        return boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None
+        )
+
+    def _key(self, filename: str) -> str:
+        return f"{self.prefix}/{filename}" if self.prefix else filename
+
+    def persist(self, path: str, content_type: Optional[str] = None) -> bool:
+        filename = os.path.basename(path)
+        if self.exists(filename):
+            return False
+        extra_args = {
+            "CacheControl": OBJECT_CACHE_CONTROL,
+            "ContentType": content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        }
+        self.client.upload_file(path, self.bucket, self._key(filename), ExtraArgs=extra_args)
+        return True
+
+    def exists(self, filename: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(filename))
+            return True
+        except Exception as e:
+            # botocore 的 ClientError，错误码 404 表示对象不存在
+            error = getattr(e, "response", None) or {}
+            if error.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def delete(self, filename: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(filename))
+
+    def url(self, filename: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self._key(filename)}"
+        return super().url(filename)
+
+    def signed_url(self, filename: str, expires_in: Optional[int] = None) -> str:
+        if self.public_base_url:
+            return self.url(filename)
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(filename)},
+            ExpiresIn=expires_in or self.signed_url_expires
+        )
+
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+
+
+def create_storage() -> Storage:
+    """根据配置创建存储后端"""
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "local":
+        return LocalStorage(settings.UPLOADS_DIR)
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            staging_dir=settings.UPLOADS_STAGING_DIR,
+            prefix=settings.S3_PREFIX,
+            public_base_url=settings.S3_PUBLIC_BASE_URL,
+            signed_url_expires=settings.S3_SIGNED_URL_EXPIRES
+        )
+    raise ValueError(f"不支持的存储后端: {settings.STORAGE_BACKEND}")
+
+
+def get_storage() -> Storage:
+    """获取当前的存储后端（首次使用时创建）"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+                logger.info(f"上传文件存储后端: {type(_storage).__name__}")
+    return _storage
+
+
+def set_storage(storage: Optional[Storage]):
+    """替换存储后端（为空时下次使用按配置重新创建）"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
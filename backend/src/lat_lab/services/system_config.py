@@ -1,99 +1,206 @@
 """
 系统配置服务层
+
+所有系统配置的读写都经过本服务。配置值缓存在进程内，并通过数据库中单调递增的
+配置版本号在多个worker之间保持一致：任何写入都会在同一事务中递增版本号，
+各进程定期（最多每 SYSTEM_CONFIG_VERSION_CHECK_SECONDS 秒）读取版本号，变化时丢弃本地缓存。
 """
 
+import copy
 import json
+import time
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+import threading
+from typing import Dict, Any, Iterable, Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from src.lat_lab.models.system import SystemConfig
-from src.lat_lab.schemas.system import AboutSectionSchema, SystemConfigCreate, SystemConfigUpdate
-from src.lat_lab.core.security import SecurityError
+from src.lat_lab.core.config import settings
+from src.lat_lab.models.system import SystemConfig, SystemConfigVersion
+from src.lat_lab.schemas.system import AboutSectionSchema
 
 logger = logging.getLogger(__name__)
 
+# 配置版本表中唯一一行的ID
+VERSION_ROW_ID = 1
+
+# 关于博主区域的默认配置
+DEFAULT_ABOUT_SECTION = {
+    "title": "关于博主",
+    "description": "欢迎来到我的博客！这里记录了我的学习、思考和分享。",
+    "social_links": [
+        {"name": "GitHub", "url": "#", "icon": "github"},
+        {"name": "Twitter", "url": "#", "icon": "twitter"},
+        {"name": "知乎", "url": "#", "icon": "zhihu"}
+    ]
+}
+
+# 缓存中表示“数据库中不存在该配置”
+_ABSENT = object()
+
+
+class SystemConfigError(Exception):
+    """系统配置读写失败"""
+
 
 class SystemConfigService:
     """系统配置服务"""
-    
+
     def __init__(self):
-        self._cache = {}
-        self._cache_timestamps = {}
-        self._cache_ttl = timedelta(minutes=5)  # 缓存5分钟
-    
-    def _is_cache_valid(self, key: str) -> bool:
-        """检查缓存是否有效"""
-        if key not in self._cache_timestamps:
-            return False
-        return datetime.now() - self._cache_timestamps[key] < self._cache_ttl
-    
-    def _set_cache(self, key: str, value: Any):
-        """设置缓存"""
-        self._cache[key] = value
-        self._cache_timestamps[key] = datetime.now()
-    
-    def _get_cache(self, key: str) -> Optional[Any]:
-        """获取缓存"""
-        if self._is_cache_valid(key):
-            return self._cache.get(key)
-        return None
-    
-    def _clear_cache(self, key: str = None):
-        """清除缓存"""
-        if key:
-            self._cache.pop(key, None)
-            self._cache_timestamps.pop(key, None)
-        else:
-            self._cache.clear()
-            self._cache_timestamps.clear()
-    
-    def get_config(self, db: Session, key: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
-        """获取配置"""
+        self._cache: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # 本地缓存对应的配置版本，None表示尚未与数据库同步
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        # 是否已加载全部配置（此时缓存未命中即表示配置不存在）
+        self._complete = False
+        # 每次清除缓存时递增，查询期间缓存被清除时不写入查询结果
+        self._generation = 0
+
+    @property
+    def version(self) -> Optional[int]:
+        """本地缓存对应的配置版本"""
+        return self._version
+
+    def _read_version(self, db: Session) -> int:
+        """读取数据库中的配置版本"""
+        row = db.query(SystemConfigVersion.version).filter(SystemConfigVersion.id == VERSION_ROW_ID).first()
+        return row[0] if row else 0
+
+    def _sync(self, db: Session):
+        """检查配置版本，其他进程修改过配置时丢弃本地缓存"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < settings.SYSTEM_CONFIG_VERSION_CHECK_SECONDS:
+            return
+
+        version = self._read_version(db)
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    logger.debug(f"配置版本变化 {self._version} -> {version}，清除本地缓存")
+                self._cache = {}
+                self._complete = False
+                self._version = version
+                self._generation += 1
+            self._checked_at = now
+
+    def _bump_version(self, db: Session):
+        """在当前事务中递增配置版本"""
+        updated = db.query(SystemConfigVersion).filter(
+            SystemConfigVersion.id == VERSION_ROW_ID
+        ).update({SystemConfigVersion.version: SystemConfigVersion.version + 1}, synchronize_session=False)
+        if not updated:
+            db.add(SystemConfigVersion(id=VERSION_ROW_ID, version=1))
+
+    def _invalidate(self):
+        """清除本地缓存，下次读取时重新同步"""
+        with self._lock:
+            self._cache = {}
+            self._complete = False
+            self._version = None
+            self._generation += 1
+
+    def _parse(self, key: str, raw: str) -> Any:
         try:
-            # 尝试从缓存获取
-            if use_cache:
-                cached_value = self._get_cache(key)
-                if cached_value is not None:
-                    return cached_value
-            
-            # 从数据库查询
-            config = db.query(SystemConfig).filter(SystemConfig.key == key).first()
-            if not config:
-                return None
-            
-            # 解析JSON值
-            try:
-                value = json.loads(config.value)
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON for config key: {key}")
-                raise SecurityError("配置数据格式错误")
-            
-            # 设置缓存
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse JSON for config key: {key}")
+            raise SystemConfigError("配置数据格式错误")
+
+    def preload(self, db: Session) -> int:
+        """
+        预加载全部配置（应用启动时调用）
+
+        Returns:
+            int: 加载的配置数量
+        """
+        try:
+            # 确保版本行存在，之后的写入只需UPDATE
+            if not db.query(SystemConfigVersion).filter(SystemConfigVersion.id == VERSION_ROW_ID).first():
+                try:
+                    db.add(SystemConfigVersion(id=VERSION_ROW_ID, version=0))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+
+            with self._lock:
+                generation = self._generation
+            version = self._read_version(db)
+            rows = db.query(SystemConfig.key, SystemConfig.value).all()
+            cache = {key: self._parse(key, value) for key, value in rows}
+        except SystemConfigError:
+            raise
+        except Exception as e:
+            logger.error(f"Error preloading configs: {str(e)}")
+            raise SystemConfigError("加载配置失败") from e
+
+        with self._lock:
+            if generation == self._generation:
+                self._cache = cache
+                self._complete = True
+                self._version = version
+                self._checked_at = time.monotonic()
+
+        logger.info(f"已预加载{len(cache)}项系统配置（版本 {version}）")
+        return len(cache)
+
+    def get_many(self, db: Session, keys: Iterable[str], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        批量获取配置，未缓存的配置通过一次查询读取
+
+        Returns:
+            Dict[str, Any]: 配置键到值的映射，不存在的配置不包含在结果中
+        """
+        keys = list(dict.fromkeys(keys))
+        result: Dict[str, Any] = {}
+        try:
+            missing = keys
             if use_cache:
-                self._set_cache(key, value)
-            
-            return value
-            
+                self._sync(db)
+                with self._lock:
+                    cache = self._cache
+                    generation = self._generation
+                missing = []
+                for key in keys:
+                    cached = cache.get(key)
+                    if cached is None:
+                        if not self._complete:
+                            missing.append(key)
+                    elif cached is not _ABSENT:
+                        result[key] = copy.deepcopy(cached)
+
+            if missing:
+                rows = db.query(SystemConfig.key, SystemConfig.value).filter(SystemConfig.key.in_(missing)).all()
+                loaded = {key: self._parse(key, value) for key, value in rows}
+                if use_cache:
+                    with self._lock:
+                        # 查询期间配置被修改过，结果可能已过期，不写入缓存
+                        if generation == self._generation:
+                            for key in missing:
+                                self._cache[key] = loaded.get(key, _ABSENT)
+                result.update(copy.deepcopy(loaded))
+
+            return result
+
+        except SystemConfigError:
+            raise
         except Exception as e:
-            logger.error(f"Error getting config {key}: {str(e)}")
-            raise SecurityError("获取配置失败")
-    
+            logger.error(f"Error getting configs {keys}: {str(e)}")
+            raise SystemConfigError("获取配置失败") from e
+
+    def get_config(self, db: Session, key: str, use_cache: bool = True) -> Optional[Any]:
+        """获取配置，不存在时返回None"""
+        return self.get_many(db, [key], use_cache=use_cache).get(key)
+
     def set_config(self, db: Session, key: str, value: Any, description: str = None) -> bool:
         """设置配置"""
         try:
-            # 验证和序列化值
-            if isinstance(value, dict) and key == "about_section":
-                # 验证关于博主配置
-                AboutSectionSchema(**value)
-            
             json_value = json.dumps(value, ensure_ascii=False)
-            
+
             # 查询现有配置
             config = db.query(SystemConfig).filter(SystemConfig.key == key).first()
-            
+
             if config:
                 # 更新现有配置
                 config.value = json_value
@@ -108,83 +215,77 @@ class SystemConfigService:
                     description=description
                 )
                 db.add(config)
-            
+
+            self._bump_version(db)
             db.commit()
-            
+
             # 清除缓存
-            self._clear_cache(key)
-            
+            self._invalidate()
+
             logger.info(f"Config {key} updated successfully")
             return True
-            
-        except IntegrityError:
+
+        except IntegrityError as e:
             db.rollback()
             logger.error(f"Integrity error when setting config {key}")
-            raise SecurityError("配置键已存在")
+            raise SystemConfigError("配置键已存在") from e
         except Exception as e:
             db.rollback()
             logger.error(f"Error setting config {key}: {str(e)}")
-            raise SecurityError("设置配置失败")
-    
+            raise SystemConfigError("设置配置失败") from e
+
+    def delete_config(self, db: Session, key: str) -> bool:
+        """删除配置"""
+        try:
+            config = db.query(SystemConfig).filter(SystemConfig.key == key).first()
+            if not config:
+                return False
+
+            db.delete(config)
+            self._bump_version(db)
+            db.commit()
+
+            # 清除缓存
+            self._invalidate()
+
+            logger.info(f"Config {key} deleted successfully")
+            return True
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error deleting config {key}: {str(e)}")
+            raise SystemConfigError("删除配置失败") from e
+
     def get_about_section(self, db: Session) -> Dict[str, Any]:
         """获取关于博主配置"""
         config = self.get_config(db, "about_section")
-        
+
         if not config:
             # 返回默认配置
-            default_config = {
-                "title": "关于博主",
-                "description": "欢迎来到我的博客！这里记录了我的学习、思考和分享。",
-                "social_links": [
-                    {"name": "GitHub", "url": "https://github.com", "icon": "github"},
-                    {"name": "邮箱", "url": "mailto:example@email.com", "icon": "email"}
-                ]
-            }
-            return default_config
-        
+            return copy.deepcopy(DEFAULT_ABOUT_SECTION)
+
         # 数据兼容性处理：支持旧的socialLinks字段
         if "socialLinks" in config and "social_links" not in config:
             config["social_links"] = config["socialLinks"]
             del config["socialLinks"]
-        
+
         return config
-    
+
     def update_about_section(self, db: Session, about_data: Dict[str, Any]) -> Dict[str, Any]:
-        """更新关于博主配置"""
+        """更新关于博主配置（按AboutSectionSchema严格校验）"""
         # 数据兼容性处理
         if "socialLinks" in about_data and "social_links" not in about_data:
             about_data["social_links"] = about_data["socialLinks"]
             del about_data["socialLinks"]
-        
+
         # 验证数据
-        validated_data = AboutSectionSchema(**about_data).dict()
-        
+        validated_data = json.loads(AboutSectionSchema(**about_data).json())
+
         # 保存配置
         self.set_config(db, "about_section", validated_data, "关于博主区域配置")
-        
+
         return validated_data
-    
-    def delete_config(self, db: Session, key: str) -> bool:
-        """删除配置"""
-        try:
-            config = db.query(SystemConfig).filter(SystemConfig.key == key).first()
-            if not config:
-                return False
-            
-            db.delete(config)
-            db.commit()
-            
-            # 清除缓存
-            self._clear_cache(key)
-            
-            logger.info(f"Config {key} deleted successfully")
-            return True
-            
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error deleting config {key}: {str(e)}")
-            raise SecurityError("删除配置失败")
 
 
 # 创建全局服务实例
-system_config_service = SystemConfigService() 
\ No newline at end of file
+system_config_service = SystemConfigService()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传存储服务
+上传的图片按内容哈希保存，重复上传相同内容时只增加一条引用记录，不再写入新文件；
+没有引用的文件（例如被替换的头像）由垃圾回收删除。文件通过存储后端（本地目录或S3兼容存储）保存
+
+上传复用已有文件时会更新其最近使用时间（行锁与垃圾回收的带条件删除互斥），
+垃圾回收在提交删除记录之前删除文件，因此上传提交引用后检查文件是否存在即可发现并修复竞争
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+from fastapi import UploadFile
+from sqlalchemy import exists, func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from src.lat_lab.core.config import settings
+from src.lat_lab.models.upload import UploadBlob, UploadRef
+from src.lat_lab.services.image_variants import image_variant_service, expected_variants
+from src.lat_lab.services.storage import Storage, get_storage
+from src.lat_lab.utils.upload import save_image_upload, discard_duplicate, StoredImage
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def upload_url(filename: str) -> str:
+    """上传文件的访问地址"""
+    return get_storage().url(filename)
+
+
+class UploadService:
+    """上传存储服务"""
+
+    def _get_or_create_blob(self, db: Session, stored: StoredImage) -> UploadBlob:
+        blob = db.query(UploadBlob).filter(UploadBlob.sha256 == stored.sha256).first()
+        if blob:
+            # 更新最近使用时间；记录已被垃圾回收删除时重新创建
+            touched = db.query(UploadBlob).filter(UploadBlob.id == blob.id).update(
+                {UploadBlob.last_used_at: datetime.utcnow()}, synchronize_session=False
+            )
+            if touched:
+                return blob
+            db.expunge(blob)
+
+        blob = UploadBlob(
+            sha256=stored.sha256,
+            filename=stored.filename,
+            mime_type=stored.mime,
+            size=stored.size
+        )
+        db.add(blob)
+        try:
+            db.flush()
+        except IntegrityError:
+            # 相同内容被并发上传，使用已经写入的记录
+            db.rollback()
+            blob = db.query(UploadBlob).filter(UploadBlob.sha256 == stored.sha256).first()
+        return blob
+
+    async def _store(self, storage: Storage, stored: StoredImage, directory: str) -> Tuple[Dict[str, str], bool]:
+        """
+        生成变体并把原图和变体保存到存储后端
+
+        Returns:
+            Tuple[Dict[str, str], bool]: (变体名称到文件名的映射, 是否写入了新文件)
+        """
+        expected = expected_variants(stored.filename)
+        if not storage.is_local and await run_in_threadpool(
+            lambda: all(storage.exists(name) for name in expected.values())
+        ):
+            # 相同内容的图片之前已经生成并保存过变体
+            variants = expected
+        else:
+            # 生成缩略图等变体（本地已存在时直接返回，失败时只返回原图）
+            variants = await image_variant_service.create_variants(os.path.join(directory, stored.filename))
+            for name in variants.values():
+                await run_in_threadpool(storage.persist, os.path.join(directory, name))
+
+        created = await run_in_threadpool(storage.persist, os.path.join(directory, stored.filename), stored.mime)
+        return variants, stored.created and created
+
+    async def save_image(
+        self,
+        db: Session,
+        file: UploadFile,
+        kind: str,
+        user_id: Optional[int] = None,
+        replace: bool = False
+    ) -> Dict[str, Any]:
+        """
+        保存上传的图片并记录引用
+
+        Args:
+            db: 数据库会话
+            file: 上传的文件
+            kind: 用途（image/avatar）
+            user_id: 上传用户ID
+            replace: 是否释放该用户同一用途的旧引用（例如替换头像）
+
+        Returns:
+            Dict[str, Any]: 包含 filename、url、variants、deduplicated
+        """
+        original_filename = file.filename
+        storage = get_storage()
+        if storage.is_local:
+            directory = storage.staging_dir
+        else:
+            # 远程存储时每次上传使用独立的暂存目录，保存后整体删除
+            directory = await run_in_threadpool(tempfile.mkdtemp, prefix=".upload-", dir=storage.staging_dir)
+
+        try:
+            stored = await save_image_upload(file, directory, settings.MAX_UPLOAD_SIZE)
+            try:
+                blob = self._get_or_create_blob(db, stored)
+                ref = UploadRef(
+                    blob_id=blob.id,
+                    user_id=user_id,
+                    kind=kind,
+                    original_filename=(original_filename or "")[:255] or None
+                )
+                db.add(ref)
+                db.flush()
+
+                if replace and user_id is not None:
+                    db.query(UploadRef).filter(
+                        UploadRef.user_id == user_id,
+                        UploadRef.kind == kind,
+                        UploadRef.id != ref.id
+                    ).delete(synchronize_session=False)
+
+                db.commit()
+            except Exception:
+                db.rollback()
+                discard_duplicate(stored)
+                raise
+
+            if stored.duplicate_path:
+                # 复用的文件可能在引用提交前被垃圾回收删除，用本次上传的副本恢复
+                await run_in_threadpool(self._restore_duplicate, storage, stored, directory)
+
+            variants, created = await self._store(storage, stored, directory)
+        finally:
+            if not storage.is_local:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        if not created:
+            logger.info(f"上传内容已存在，复用文件 {stored.filename}")
+
+        return {
+            "filename": blob.filename,
+            "url": upload_url(blob.filename),
+            "variants": {name: upload_url(filename) for name, filename in variants.items()},
+            "deduplicated": not created,
+        }
+
+    def _restore_duplicate(self, storage: Storage, stored: StoredImage, directory: str):
+        try:
+            if storage.is_local and not storage.exists(stored.filename):
+                logger.warning(f"上传文件 {stored.filename} 已被垃圾回收删除，使用本次上传的内容恢复")
+                os.replace(stored.duplicate_path, os.path.join(directory, stored.filename))
+        finally:
+            discard_duplicate(stored)
+
+    def collect_garbage(self, db: Session, grace_seconds: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        删除没有任何引用的上传文件及其变体
+
+        Args:
+            db: 数据库会话
+            grace_seconds: 只删除超过该秒数未被使用的文件，避免删除正在上传中的文件
+            dry_run: 只统计，不删除
+
+        Returns:
+            Dict[str, Any]: 删除的文件数量和释放的字节数
+        """
+        if grace_seconds is None:
+            grace_seconds = settings.UPLOAD_GC_GRACE_SECONDS
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+
+        last_used = func.coalesce(UploadBlob.last_used_at, UploadBlob.created_at)
+        orphans = db.query(UploadBlob.id, UploadBlob.filename, UploadBlob.size).filter(
+            ~UploadBlob.refs.any(),
+            last_used < cutoff
+        ).all()
+
+        removed = 0
+        freed = 0
+        storage = get_storage()
+        for blob_id, filename, size in orphans:
+            if dry_run:
+                freed += size
+                removed += 1
+                continue
+
+            try:
+                # 带条件删除：列出孤立文件之后又有相同内容的上传复用了它时不删除
+                deleted = db.query(UploadBlob).filter(
+                    UploadBlob.id == blob_id,
+                    last_used < cutoff,
+                    ~exists().where(UploadRef.blob_id == blob_id)
+                ).delete(synchronize_session=False)
+                if deleted == 1:
+                    # 在提交前删除文件：并发上传要么等待本次提交后重新创建记录并发现文件缺失，
+                    # 要么先提交引用使这里的删除不生效
+                    for name in [filename, *expected_variants(filename).values()]:
+                        try:
+                            storage.delete(name)
+                        except Exception as e:
+                            logger.warning(f"删除上传文件 {name} 失败: {e}")
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"删除上传文件记录 {filename} 失败: {e}")
+                continue
+            if deleted != 1:
+                continue
+
+            freed += size
+            removed += 1
+
+        if removed and not dry_run:
+            logger.info(f"上传文件垃圾回收：删除 {removed} 个文件，释放 {freed} 字节")
+
+        return {"removed": removed, "freed_bytes": freed, "dry_run": dry_run}
+
+
+# 创建服务实例
+upload_service = UploadService()
@@ -0,0 +1,136 @@
+"""
+Cron表达式工具 - 解析标准5段式cron表达式并计算下次执行时间
+
+支持的语法: *、*/n、a-b、a-b/n、a,b,c，以及 @hourly/@daily/@weekly/@monthly/@yearly 别名
+"""
+
+from datetime import datetime, timedelta
+from typing import Set, Tuple
+
+# 常用别名
+CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# 各字段取值范围: 分钟、小时、日、月、星期（0和7都表示周日）
+_FIELD_RANGES: Tuple[Tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# 最多向后搜索的年数，避免无法满足的表达式（如2月30日）导致死循环
+_MAX_SEARCH_YEARS = 5
+
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    """解析单个cron字段为允许值集合"""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            if not step_str.isdigit() or int(step_str) <= 0:
+                raise ValueError(f"无效的步长: {step_str}")
+            step = int(step_str)
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            if not start_str.isdigit() or not end_str.isdigit():
+                raise ValueError(f"无效的范围: {part}")
+            start, end = int(start_str), int(end_str)
+        elif part.isdigit():
+            start = int(part)
+            # a/n 表示从a开始直到上限
+            end = high if step > 1 else start
+        else:
+            raise ValueError(f"无效的字段值: {part}")
+
+        if start < low or end > high or start > end:
+            raise ValueError(f"字段值超出范围 {low}-{high}: {part}")
+
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """5段式cron表达式: 分 时 日 月 周"""
+
+    def __init__(self, expression: str):
+        expression = (expression or "").strip()
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError("cron表达式必须包含5个字段: 分 时 日 月 周")
+
+        parsed = [_parse_field(f, low, high) for f, (low, high) in zip(fields, _FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 7 与 0 同为周日
+        if 7 in weekdays:
+            weekdays.discard(7)
+            weekdays.add(0)
+        self.weekdays = weekdays
+
+        # 与标准cron一致: 日和星期都被限制时，满足其一即可
+        self._day_restricted = fields[2] != "*"
+        self._weekday_restricted = fields[4] != "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        # Python中周一为0，cron中周日为0
+        cron_weekday = (dt.weekday() + 1) % 7
+        day_ok = dt.day in self.days
+        weekday_ok = cron_weekday in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def matches(self, dt: datetime) -> bool:
+        """判断给定时间（精确到分钟）是否满足表达式"""
+        return (
+            dt.minute in self.minutes
+            and dt.hour in self.hours
+            and dt.month in self.months
+            and self._day_matches(dt)
+        )
+
+    def next_after(self, dt: datetime) -> datetime:
+        """计算严格晚于给定时间的下一次执行时间"""
+        current = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = current + timedelta(days=366 * _MAX_SEARCH_YEARS)
+
+        while current < limit:
+            if current.month not in self.months:
+                # 跳到下个月第一天
+                if current.month == 12:
+                    current = current.replace(year=current.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    current = current.replace(month=current.month + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(current):
+                current = (current + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if current.hour not in self.hours:
+                current = (current + timedelta(hours=1)).replace(minute=0)
+                continue
+            if current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+                continue
+            return current
+
+        raise ValueError(f"cron表达式在{_MAX_SEARCH_YEARS}年内没有可执行时间: {self.expression}")
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+
+def validate_cron_expression(expression: str) -> bool:
+    """校验cron表达式是否合法"""
+    try:
+        CronExpression(expression)
+        return True
+    except ValueError:
+        return False
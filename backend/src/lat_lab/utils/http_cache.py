@@ -0,0 +1,52 @@
+"""
+HTTP缓存工具 - 为预先编码的响应生成ETag并处理条件请求（If-None-Match）
+"""
+
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+
+def make_etag(body: bytes) -> str:
+    """根据响应内容生成强ETag"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """判断请求的If-None-Match是否与ETag匹配（按弱比较处理W/前缀）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    etag: Optional[str] = None,
+    media_type: str = "application/json",
+    cache_control: str = "no-cache"
+) -> Response:
+    """
+    返回带ETag的响应，客户端缓存仍然有效时返回304
+
+    Args:
+        request: 当前请求
+        body: 已编码的响应内容
+        etag: 预先计算的ETag，为空时根据内容计算
+        media_type: 响应类型
+        cache_control: Cache-Control头，默认要求客户端每次重新验证
+    """
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,79 @@
+"""
+上传文件静态服务 - 为 /uploads 设置缓存头，并可交给前置 nginx 发送文件
+
+按内容哈希命名的文件（及其变体）内容永不改变，返回一年的 immutable 缓存；
+其他旧文件名使用较短的缓存时间。Range 请求和条件请求（ETag/Last-Modified）
+由 Starlette 的 FileResponse 处理。配置 UPLOADS_ACCEL_REDIRECT_PREFIX 后，
+只返回 X-Accel-Redirect 头，由 nginx 的 internal location 读取并发送文件。
+使用远程存储后端（S3）时，重定向到存储的预签名地址或公开地址。
+"""
+
+import os
+import re
+import mimetypes
+from typing import Optional
+from urllib.parse import quote
+from starlette.exceptions import HTTPException
+from starlette.responses import Response, RedirectResponse
+from starlette.staticfiles import StaticFiles
+
+from src.lat_lab.core.config import settings
+from src.lat_lab.services.storage import Storage
+
+# 内容寻址的文件名：64位十六进制SHA-256，可带变体后缀（例如 <sha256>_thumb.jpg）
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def uploads_cache_control(filename: str) -> str:
+    """根据文件名返回 Cache-Control 头"""
+    if CONTENT_ADDRESSED_NAME.match(filename):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={settings.UPLOADS_CACHE_MAX_AGE}"
+
+
+class UploadsStaticFiles(StaticFiles):
+    """上传文件静态服务"""
+
+    def __init__(self, *args, accel_redirect_prefix: str = "", storage: Optional[Storage] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 为空时由Python发送文件
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/")
+        self._root = os.path.realpath(str(self.directory))
+        # 远程存储后端，文件不在本地目录中
+        self.storage = storage if storage is not None and not storage.is_local else None
+
+    async def get_response(self, path: str, scope) -> Response:
+        if self.storage is None:
+            return await super().get_response(path, scope)
+
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        filename = path.replace(os.sep, "/").strip("/")
+        if not filename or any(part in ("", ".", "..") for part in filename.split("/")):
+            raise HTTPException(status_code=404)
+
+        # 重定向的缓存时间不能超过预签名地址的有效期
+        return RedirectResponse(
+            self.storage.signed_url(filename),
+            status_code=307,
+            headers={"Cache-Control": f"private, max-age={settings.S3_SIGNED_URL_EXPIRES // 2}"}
+        )
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        headers = {
+            "Cache-Control": uploads_cache_control(os.path.basename(full_path)),
+            "X-Content-Type-Options": "nosniff",
+        }
+
+        if self.accel_redirect_prefix:
+            # 由nginx处理Range和条件请求，这里只告诉它文件的内部路径
+            relative = os.path.relpath(os.path.realpath(full_path), self._root).replace(os.sep, "/")
+            media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+            headers["X-Accel-Redirect"] = f"{self.accel_redirect_prefix}/{quote(relative)}"
+            return Response(status_code=status_code, media_type=media_type, headers=headers)
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers.update(headers)
+        return response
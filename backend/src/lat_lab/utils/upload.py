@@ -0,0 +1,129 @@
+"""
+上传文件工具 - 分块流式保存上传的图片
+
+上传内容按块写入目标目录中的临时文件（文件读写在线程池中进行，不阻塞事件循环），
+首块数据用于魔数检测，写入过程中累计检查大小并计算SHA-256，
+全部成功后以内容哈希作为文件名原子重命名；相同内容的文件已存在时保留临时文件作为副本，
+由调用方在确认文件仍然存在（未被垃圾回收删除）后丢弃。
+"""
+
+import os
+import hashlib
+import tempfile
+from typing import NamedTuple, Optional, Union
+from pathlib import Path
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from src.lat_lab.utils.security import detect_image_type
+
+# 每次读取的块大小
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# 魔数检测需要的最少字节数（WEBP 需要 12 字节）
+SNIFF_SIZE = 12
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class StoredImage(NamedTuple):
+    """已保存的上传图片"""
+    filename: str  # 内容哈希 + 扩展名
+    mime: str
+    sha256: str
+    size: int
+    created: bool  # False 表示相同内容的文件已存在，本次没有写入新文件
+    duplicate_path: Optional[str] = None  # 文件已存在时保留的临时副本，调用方负责删除
+
+
+def discard_duplicate(stored: StoredImage):
+    """删除保留的临时副本"""
+    if stored.duplicate_path:
+        _discard(stored.duplicate_path)
+
+
+def _finalize(tmp_path: str, final_path: str) -> bool:
+    """将临时文件移动到最终位置，目标已存在（内容相同）时保留临时文件"""
+    if os.path.exists(final_path):
+        return False
+    try:
+        os.chmod(tmp_path, 0o644)
+    except Exception:
+        # 非关键路径，忽略权限设置错误（不同平台可能不支持）
+        pass
+    os.replace(tmp_path, final_path)
+    return True
+
+
+async def save_image_upload(
+    file: UploadFile,
+    directory: Union[str, Path],
+    max_size: int
+) -> StoredImage:
+    """
+    流式保存上传的图片（按内容寻址）
+
+    Args:
+        file: 上传的文件
+        directory: 保存目录
+        max_size: 最大文件大小（字节）
+
+    Returns:
+        StoredImage: 保存结果
+
+    Raises:
+        HTTPException: 文件为空(400)、格式不支持(400)、文件过大(413)
+    """
+    directory = str(directory)
+    # 临时文件与目标文件位于同一目录，保证重命名是原子的
+    fd, tmp_path = await run_in_threadpool(
+        tempfile.mkstemp, prefix=".upload-", suffix=".part", dir=directory
+    )
+    out = os.fdopen(fd, "wb")
+    try:
+        # 读取足够进行魔数检测的首块数据
+        head = b""
+        while len(head) < SNIFF_SIZE:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            head += chunk
+
+        if not head:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件内容为空")
+
+        # 基于魔数检测图片类型（拒绝svg等非位图）
+        mime, detected_ext = detect_image_type(head)
+        if not mime or not detected_ext:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不支持的图片格式")
+
+        size = 0
+        digest = hashlib.sha256()
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="文件过大")
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+        await run_in_threadpool(out.close)
+
+        # 以内容哈希作为文件名（扩展名基于检测到的类型），相同内容只保存一份
+        sha256 = digest.hexdigest()
+        filename = f"{sha256}{detected_ext}"
+        created = await run_in_threadpool(_finalize, tmp_path, os.path.join(directory, filename))
+        return StoredImage(filename, mime, sha256, size, created, None if created else tmp_path)
+
+    except BaseException:
+        # 请求可能已被取消，这里直接同步清理临时文件
+        out.close()
+        _discard(tmp_path)
+        raise
+    finally:
+        await file.close()
@@ -428,6 +428,8 @@ const initApp = async () => {
     devToolsStyleLoader.init().catch(error => {
       console.error('开发工具样式加载器初始化失败:', error);
     });
+    // 页面专属样式随路由切换生效
+    router.afterEach(to => devToolsStyleLoader.setPage(to.path));
   } catch (error) {
     console.error('开发工具样式加载器初始化失败:', error);
   }
@@ -714,6 +714,14 @@ export const adminApi = {
   }
 }
 
+// 首页API
+export const homeApi = {
+  // 获取首页首屏数据（文章、分类、标签、关于博主、博主信息、小部件）
+  getHome(params) {
+    return api.get('/home', { params })
+  }
+}
+
 // 公开API（无需认证）
 export const publicApi = {
   // 获取关于博主配置（公开接口）
@@ -724,6 +732,11 @@ export const publicApi = {
   // 获取博主信息（公开接口）
   getBlogOwner() {
     return api.get('/public/blog-owner')
+  },
+  
+  // 获取开发工具样式包地址（公开接口）
+  getDevToolsManifest() {
+    return api.get('/public/dev-tools/manifest')
   }
 }
 
@@ -1,14 +1,21 @@
 /**
  * 开发工具样式加载器
  * 用于在前端页面加载时自动应用后端保存的样式配置
+ *
+ * 后端将配置编译为带内容哈希的CSS和文本映射，这里只需获取一个很小的清单，
+ * 然后以<link>引入样式（可被浏览器长期缓存），页面专属的样式通过
+ * <html data-dev-page="路径"> 生效
  */
 
-import { devToolsService } from '../services/devToolsService'
+import api, { publicApi } from '../services/api'
+
+const STYLESHEET_ID = 'dev-tools-bundle'
 
 class DevToolsStyleLoader {
   constructor() {
     this.isLoaded = false
     this.currentPageUrl = window.location.pathname
+    this.texts = null
   }
 
   /**
@@ -16,28 +23,22 @@ class DevToolsStyleLoader {
    */
   async init() {
     if (this.isLoaded) return
-    
+
     try {
-      console.log('开发工具样式加载器：开始加载配置...')
-      
-      // 从后端获取样式配置
-      const response = await devToolsService.getDevToolsConfig()
-      
-      if (response?.success && response?.data?.page_data) {
-        const pageData = response.data.page_data
-        console.log('获取到页面配置数据:', pageData)
-        
-        // 应用当前页面的配置
-        await this.applyPageConfig(pageData)
-        
-        // 应用全局配置（如果有）
-        if (pageData['current']) {
-          await this.applyConfigToCurrentPage(pageData['current'])
-        }
-        
-        console.log('开发工具样式配置应用完成')
+      this.setPage(this.currentPageUrl)
+
+      // 获取当前样式包的地址
+      const manifest = await publicApi.getDevToolsManifest()
+      if (!manifest?.version) return
+
+      this.applyStylesheet(this.resolveUrl(manifest.css_url))
+
+      const response = await fetch(this.resolveUrl(manifest.texts_url))
+      if (response.ok) {
+        this.texts = await response.json()
+        await this.applyTexts()
       }
-      
+
       this.isLoaded = true
     } catch (error) {
       console.error('开发工具样式加载失败:', error)
@@ -45,77 +46,61 @@ class DevToolsStyleLoader {
   }
 
   /**
-   * 应用页面配置
+   * 将后端返回的路径解析为完整地址（API可能部署在其他域名下）
    */
-  async applyPageConfig(pageData) {
-    // 尝试匹配当前页面的配置
-    const currentPage = this.currentPageUrl
-    
-    // 检查是否有当前页面的特定配置
-    if (pageData[currentPage]) {
-      console.log('应用页面特定配置:', currentPage)
-      await this.applyConfigToCurrentPage(pageData[currentPage])
-    }
-    
-    // 检查是否有通用配置
-    const commonPages = ['/', '/home', '/index']
-    for (const page of commonPages) {
-      if (pageData[page] && page !== currentPage) {
-        console.log('应用通用页面配置:', page)
-        await this.applyConfigToCurrentPage(pageData[page])
-        break
-      }
+  resolveUrl(path) {
+    const base = new URL(api.defaults.baseURL, window.location.origin)
+    return new URL(path, base).toString()
+  }
+
+  /**
+   * 引入样式包，地址变化时替换旧的样式表
+   */
+  applyStylesheet(href) {
+    let link = document.getElementById(STYLESHEET_ID)
+    if (link && link.href === href) return
+
+    if (!link) {
+      link = document.createElement('link')
+      link.id = STYLESHEET_ID
+      link.rel = 'stylesheet'
+      document.head.appendChild(link)
     }
+    link.href = href
   }
 
   /**
-   * 将配置应用到当前页面
+   * 设置当前页面路径，使页面专属的样式生效
    */
-  async applyConfigToCurrentPage(pageConfig) {
-    if (!pageConfig) return
+  setPage(path) {
+    this.currentPageUrl = path
+    document.documentElement.dataset.devPage = path
+  }
 
-    try {
-      // 应用CSS变量
-      if (pageConfig.styles && Array.isArray(pageConfig.styles)) {
-        pageConfig.styles.forEach(style => {
-          if (style.value !== style.originalValue) {
-            console.log('应用CSS变量:', style.name, style.value)
-            document.documentElement.style.setProperty(style.name, style.value)
-          }
-        })
-      }
+  /**
+   * 应用文本修改（全局配置在前，当前页面的配置优先） - 使用安全的HTML应用
+   */
+  async applyTexts() {
+    if (!this.texts) return
 
-      // 应用文本修改 - 使用安全的HTML应用
-      if (pageConfig.texts && Array.isArray(pageConfig.texts)) {
-        // 动态导入 HTML 净化工具
-        const { safelyApplyContent } = await import('./htmlSanitizer.js')
-        
-        pageConfig.texts.forEach(text => {
-          if (text.currentValue !== text.originalValue) {
-            console.log('应用文本修改:', text.selector, text.currentValue)
-            const elements = document.querySelectorAll(text.selector)
-            elements.forEach(el => {
-              // 使用安全的内容应用方法
-              safelyApplyContent(el, text.currentValue)
-            })
-          }
-        })
-      }
+    const replacements = {
+      ...(this.texts.global || {}),
+      ...(this.texts.pages?.[this.currentPageUrl] || {})
+    }
+    if (Object.keys(replacements).length === 0) return
 
-      // 应用布局修改
-      if (pageConfig.layouts && Array.isArray(pageConfig.layouts)) {
-        pageConfig.layouts.forEach(layout => {
-          if (layout.currentValue !== layout.originalValue) {
-            console.log('应用布局修改:', layout.selector, layout.property, layout.currentValue)
-            const elements = document.querySelectorAll(layout.selector)
-            elements.forEach(el => {
-              el.style[layout.property] = layout.currentValue
-            })
-          }
+    try {
+      // 动态导入 HTML 净化工具
+      const { safelyApplyContent } = await import('./htmlSanitizer.js')
+
+      Object.entries(replacements).forEach(([selector, value]) => {
+        document.querySelectorAll(selector).forEach(el => {
+          // 使用安全的内容应用方法
+          safelyApplyContent(el, value)
         })
-      }
+      })
     } catch (error) {
-      console.error('应用页面配置失败:', error)
+      console.error('应用文本修改失败:', error)
     }
   }
 